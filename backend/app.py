@@ -1,4 +1,8 @@
 from flask import Flask
+import click
+import importlib
+from sqlalchemy import inspect
+import json
 from flask_cors import CORS
 import os
 import sys
@@ -6,9 +10,67 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from config import get_config
-from models import db
+from models import db, User
+from models.sqlite_tuning import init_sqlite
+from services import sql_profiler, metrics, email_validation
 from routes import register_routes
 
+# Databases created by db.create_all() before migrations existed match this revision
+BASELINE_REVISION = '0001'
+
+# Modules the request path imports on first use; a preloading master imports them before forking
+DEFERRED_IMPORTS = ('email_validator', 'smtplib', 'email.mime.multipart', 'email.mime.text')
+
+def preload_deferred_imports():
+    """Import the deferred modules now so forked workers share them instead of importing on first request"""
+    for name in DEFERRED_IMPORTS:
+        importlib.import_module(name)
+
+def init_migrations(app):
+    """
+    Register Flask-Migrate when something will use it: schema upgrades on startup or a
+    `flask` CLI command such as `flask db upgrade`. Alembic is the slowest import in the
+    app, so production workers (DB_SCHEMA_SETUP=none) skip it
+    """
+    if app.config['DB_SCHEMA_SETUP'] != 'migrate' and click.get_current_context(silent=True) is None:
+        return
+    
+    from flask_migrate import Migrate
+    
+    Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'),
+            render_as_batch=True)
+
+def dispose_engines_after_fork(app):
+    """
+    Drop pooled connections inherited from a preloading parent in forked workers;
+    sharing a socket between processes corrupts it (close=False leaves the parent's open)
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    
+    engines = list(db.engines.values())
+    os.register_at_fork(after_in_child=lambda: [engine.dispose(close=False) for engine in engines])
+
+def prepare_database(app):
+    """
+    Set up the schema according to DB_SCHEMA_SETUP: 'migrate' upgrades to the latest
+    migration, 'create_all' creates missing tables directly, 'none' leaves it to
+    `flask db upgrade` at deploy time
+    """
+    mode = app.config['DB_SCHEMA_SETUP']
+    
+    if mode == 'create_all':
+        db.create_all()
+    elif mode == 'migrate':
+        from flask_migrate import upgrade, stamp
+        
+        tables = inspect(db.engine).get_table_names()
+        
+        if 'users' in tables and 'alembic_version' not in tables:
+            stamp(revision=BASELINE_REVISION)
+        
+        upgrade()
+
 def create_app(config=None):
     """Initialize the Flask application"""
     app = Flask(__name__)
@@ -24,13 +86,113 @@ def create_app(config=None):
     
     # Initialize extensions
     db.init_app(app)
+    init_migrations(app)
+    
+    with app.app_context():
+        init_sqlite(app, db.engines.values())
+        sql_profiler.init_app(app, db.engines.values())
+        dispose_engines_after_fork(app)
     
     # Register API routes
     register_routes(app)
+    metrics.init_app(app)
     
-    # Create database tables
+    # Prepare the database schema
     with app.app_context():
-        db.create_all()
+        prepare_database(app)
+    
+    # Each worker looks up the common email domains on its first request
+    email_validation.init_app(app)
+    
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute the running completion totals for every user"""
+        for user in User.query.all():
+            user.rebuild_completion_totals()
+        db.session.commit()
+    
+    @app.cli.command('build-leaderboards')
+    def build_leaderboards():
+        """Store the friends leaderboard of every user who doesn't have one yet"""
+        from services.leaderboard_service import build_missing_leaderboards
+        
+        built = build_missing_leaderboards()
+        db.session.commit()
+        click.echo(f'Built {built} leaderboard(s)')
+    
+    @app.cli.command('simulate-rewards')
+    @click.argument('policy')
+    @click.option('--chunk-size', default=10000, help='Completions scored per chunk')
+    @click.option('--output', type=click.File('w'), default='-', help='Where to write the JSON report')
+    def simulate_rewards(policy, chunk_size, output):
+        """Report per-user coin deltas if POLICY (JSON tiers/fallback) had been used for all completions"""
+        from services.coins_service import RewardPolicy
+        from services.coins_simulation import simulate_reward_policy
+        
+        report = simulate_reward_policy(RewardPolicy.from_dict(json.loads(policy)), chunk_size=chunk_size)
+        json.dump(report, output, indent=2)
+        output.write('\n')
+    
+    @app.cli.command('compact-tombstones')
+    @click.option('--retention-days', type=int, default=None, help='Override SYNC_TOMBSTONE_RETENTION_DAYS')
+    def compact_tombstones_command(retention_days):
+        """Delete assignment tombstones older than the sync retention window"""
+        from services.sync_service import compact_tombstones
+        
+        removed = compact_tombstones(retention_days)
+        click.echo(f'Removed {removed} tombstone(s)')
+    
+    @app.cli.command('check-indexes')
+    def check_indexes():
+        """EXPLAIN the hot-path queries and fail if any of them scans a whole table"""
+        from services.query_plans import check_hot_paths
+        
+        failures = 0
+        
+        for result in check_hot_paths():
+            status = 'FULL SCAN' if result['fullScans'] else 'ok'
+            failures += bool(result['fullScans'])
+            click.echo(f"{status:9}  {result['name']}")
+            for line in result['plan']:
+                click.echo(f'           {line}')
+        
+        if failures:
+            raise SystemExit(f'{failures} hot-path queries scan a whole table')
+    
+    @app.cli.command('send-reminders')
+    @click.option('--once', is_flag=True, help='Send what is due now and exit (for cron)')
+    @click.option('--since-minutes', default=60,
+                  help='With --once, the furthest back events count as unsent (when the last run is older or unknown)')
+    def send_reminders(once, since_minutes):
+        """
+        Email deadline reminders and bonus-tier warnings for open assignments
+        With --once, each run picks up where the previous one stopped (REMINDER_WATERMARK_FILE),
+        so cron can run it at any interval without sending duplicates
+        """
+        from datetime import datetime, timedelta
+        from services.reminder_service import create_scheduler, read_watermark, write_watermark
+        from services.email_service import get_delivery_worker
+        
+        if not once:
+            create_scheduler(app).run(interval=app.config['REMINDER_INTERVAL'])
+            return
+        
+        now = datetime.utcnow()
+        watermark_file = app.config['REMINDER_WATERMARK_FILE'] or os.path.join(app.instance_path, 'reminders_sent_until')
+        since = now - timedelta(minutes=since_minutes)
+        last_run = read_watermark(watermark_file)
+        
+        if last_run is not None and last_run > since:
+            since = last_run
+        
+        scheduler = create_scheduler(app, since=since, one_shot=True)
+        sent = scheduler.tick(now)
+        
+        if app.config['MAIL_ASYNC']:
+            get_delivery_worker(app).flush(timeout=30)
+        
+        write_watermark(watermark_file, scheduler.sent_until)
+        click.echo(f'Queued {sent} reminder email(s)')
     
     return app
 
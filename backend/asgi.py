@@ -0,0 +1,297 @@
+"""
+ASGI entry point: uvicorn "asgi:create_asgi_app" --factory
+The I/O-bound login endpoints run natively on the event loop (cached DNS checks, async SMTP and database),
+so a slow mail server holds a coroutine rather than a worker thread; every other route is
+served by the Flask app from create_app() in a thread pool
+"""
+import asyncio
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from asgiref.sync import async_to_sync, sync_to_async
+from sqlalchemy import select
+
+from app import create_app
+from models import User, db
+from models.async_session import create_async_session_factory
+from models.sqlite_tuning import IMMEDIATE_OPTION
+from services import metrics
+from services.auth_service import generate_magic_link, generate_auth_token
+from services.email_service import _mail_settings, magic_link_message, send_email_async
+from services.email_validation import get_deliverability_checker
+from services.ranking_service import get_rank_registry
+from services.serializers import dumps
+
+class WsgiBridge:
+    """
+    Serves a WSGI app over ASGI, each request on the event loop's default executor
+    (asgiref's WsgiToAsgi runs them thread-sensitively, i.e. one at a time; Flask is thread-safe)
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send, body=b''):
+        if scope['type'] != 'http':
+            raise ValueError(f"WSGI apps can only serve http, not {scope['type']}")
+
+        await sync_to_async(self.run, thread_sensitive=False)(scope, body, send)
+
+    def environ(self, scope, body):
+        """PEP 3333 environ for an ASGI http scope and its request body"""
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('ascii'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+            environ['REMOTE_PORT'] = str(scope['client'][1])
+
+        for name, value in scope['headers']:
+            name = name.decode('latin1')
+            value = value.decode('latin1')
+
+            if name == 'content-length':
+                key = 'CONTENT_LENGTH'
+            elif name == 'content-type':
+                key = 'CONTENT_TYPE'
+            else:
+                key = 'HTTP_' + name.upper().replace('-', '_')
+
+            # Repeated headers are joined, as a WSGI server would
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+
+        return environ
+
+    def run(self, scope, body, send):
+        """Call the WSGI app in this (worker) thread and stream its response back to the loop"""
+        send = async_to_sync(send)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers
+            ]
+
+        def send_start():
+            if not response.get('sent'):
+                send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+                response['sent'] = True
+
+        result = self.wsgi_application(self.environ(scope, body), start_response)
+
+        try:
+            for chunk in result:
+                if chunk:
+                    send_start()
+                    send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        send_start()
+        send({'type': 'http.response.body', 'body': b''})
+
+class AsyncApp:
+    """ASGI app serving the native async routes and handing everything else to Flask"""
+
+    def __init__(self, flask_app, async_engine, session_factory):
+        self.flask_app = flask_app
+        self.wsgi = WsgiBridge(flask_app)
+        self.engine = async_engine
+        self.sessions = session_factory
+        self.mail_settings = _mail_settings(flask_app.config)
+        self.deliverability = get_deliverability_checker(flask_app)
+
+        # Without an async driver for the database, Flask serves these too
+        self.routes = {
+            ('POST', '/api/auth/login'): ('auth.login', self.login),
+            ('GET', '/api/auth/verify'): ('auth.verify', self.verify)
+        } if session_factory is not None else {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        route = self.routes.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+
+        if route is None:
+            if scope['type'] != 'http':
+                return
+
+            return await self.wsgi(scope, receive, send, await self._read_body(receive))
+
+        endpoint, handler = route
+        started = time.perf_counter()
+        status, payload = await handler(scope, await self._read_body(receive))
+
+        await self._respond(scope, send, status, payload)
+        metrics.observe_request('auth', endpoint, scope['method'], status, time.perf_counter() - started)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                threads = self.flask_app.config['ASYNC_WSGI_THREADS']
+                asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(threads, 'flask'))
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        body = b''
+
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+
+            if not message.get('more_body'):
+                return body
+
+    def _cors_headers(self, scope):
+        """Same headers Flask-CORS adds to /api/* responses (origins from CORS_ORIGINS, with credentials)"""
+        origin = dict(scope['headers']).get(b'origin')
+        origins = self.flask_app.config['CORS_ORIGINS']
+
+        if origin is None or ('*' not in origins and origin.decode('latin1') not in origins):
+            return []
+
+        return [
+            (b'access-control-allow-origin', origin),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin')
+        ]
+
+    async def _respond(self, scope, send, status, payload):
+        body = dumps(payload)
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode())
+        ] + self._cors_headers(scope)
+
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def login(self, scope, body):
+        """Send magic link for authentication (async twin of routes.auth.login)"""
+        from email_validator import validate_email, EmailNotValidError
+
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict) or not data.get('email'):
+            return 400, {'error': 'Email is required!'}
+
+        email = data['email']
+        config = self.flask_app.config
+
+        # Syntax is checked inline (CPU only); a deliverability lookup is awaited within its budget
+        try:
+            validated = validate_email(email, check_deliverability=False)
+        except EmailNotValidError as e:
+            return 400, {'error': f'Invalid email: {str(e)}'}
+
+        if config['EMAIL_CHECK_DELIVERABILITY']:
+            problem = await self.deliverability.check_async(validated.ascii_domain)
+            if problem:
+                return 400, {'error': f'Invalid email: {problem}'}
+
+        with self.flask_app.app_context():
+            token, magic_link = generate_magic_link(email)
+
+        success = await send_email_async(
+            email, *magic_link_message(magic_link),
+            settings=self.mail_settings, timeout=config['ASYNC_MAIL_TIMEOUT']
+        )
+
+        if not success:
+            return 500, {'error': 'Failed to send magic link. Please try again later.'}
+
+        return 200, {
+            'message': 'Magic link sent successfully!',
+            'email': email,
+            # Only in development mode, return the token for testing
+            'token': token if config['DEBUG'] else None
+        }
+
+    async def verify(self, scope, body):
+        """Verify magic link token (async twin of routes.auth.verify)"""
+        from itsdangerous import URLSafeTimedSerializer
+
+        token = (parse_qs(scope['query_string'].decode('latin1')).get('token') or [None])[0]
+
+        if not token:
+            return 400, {'error': 'Token is required!'}
+
+        config = self.flask_app.config
+        serializer = URLSafeTimedSerializer(config['SECRET_KEY'])
+
+        try:
+            email = serializer.loads(token, salt=config['SECURITY_PASSWORD_SALT'], max_age=86400)
+        except Exception as e:
+            print(f"Error verifying magic link: {e}")
+            return 401, {'error': 'Invalid or expired token!'}
+
+        async with self.sessions() as session:
+            # Lookup-or-create: hold the write lock from the lookup (see models.session.begin_write)
+            await session.connection(execution_options={IMMEDIATE_OPTION: True})
+            user = (await session.execute(select(User).filter_by(email=email))).scalars().first()
+
+            created = user is None
+
+            if created:
+                user = User(email=email, name=email.split('@')[0])
+                session.add(user)
+
+            user.last_login = datetime.utcnow()
+            await session.commit()
+
+        if created:
+            # On the campus board right away (what queue_rank_update does for the sync session)
+            get_rank_registry(self.flask_app).record_coins(user.id, 0)
+
+        with self.flask_app.app_context():
+            access_token = generate_auth_token(user.id)
+
+        return 200, {
+            'message': 'Authentication successful!',
+            'token': access_token,
+            'user': user.to_dict()
+        }
+
+def create_asgi_app(config=None):
+    """Build the Flask app and wrap it with the async routes"""
+    flask_app = create_app(config)
+
+    with flask_app.app_context():
+        async_engine, session_factory = create_async_session_factory(flask_app, db.engine)
+
+    return AsyncApp(flask_app, async_engine, session_factory)
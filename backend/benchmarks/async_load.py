@@ -0,0 +1,215 @@
+"""
+Throughput of the sync app (gunicorn, threaded worker) against the ASGI app (uvicorn) under
+concurrent load, with a local SMTP stub that takes --smtp-delay to accept each message
+Usage: python -m benchmarks.async_load [--concurrency 50,200] [--seconds 5] [--threads 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+class StubSMTPServer:
+    """Minimal SMTP responder: accepts everything, waiting `delay` seconds before acknowledging DATA"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.messages = 0
+
+    async def handle(self, reader, writer):
+        writer.write(b'220 stub ESMTP\r\n')
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                command = line[:4].upper()
+
+                if command in (b'EHLO', b'HELO'):
+                    writer.write(b'250-stub\r\n250 8BITMIME\r\n')
+                elif command == b'DATA':
+                    writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                    await writer.drain()
+                    while (await reader.readline()) not in (b'.\r\n', b''):
+                        pass
+                    await asyncio.sleep(self.delay)
+                    self.messages += 1
+                    writer.write(b'250 OK queued\r\n')
+                elif command == b'QUIT':
+                    writer.write(b'221 Bye\r\n')
+                    await writer.drain()
+                    break
+                else:
+                    writer.write(b'250 OK\r\n')
+
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def request(port, method, path, body=None, headers=None):
+    """One HTTP/1.1 request on a fresh connection; returns the status code"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    payload = json.dumps(body).encode() if body is not None else b''
+    lines = [f'{method} {path} HTTP/1.1', 'Host: localhost', 'Connection: close', f'Content-Length: {len(payload)}']
+    lines += ['Content-Type: application/json'] if body is not None else []
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + payload)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+
+    return int(status_line.split()[1])
+
+async def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            await request(port, 'GET', '/api/leaderboard')
+            return
+        except (ConnectionError, OSError, IndexError):
+            await asyncio.sleep(0.2)
+
+    raise RuntimeError(f'Server on port {port} did not start')
+
+async def drive(port, scenario, concurrency, seconds, token):
+    """Keep `concurrency` requests in flight for `seconds`; returns latencies (s) and status counts"""
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + seconds
+
+    async def client(index):
+        serial = 0
+        while time.monotonic() < deadline:
+            serial += 1
+            started = time.perf_counter()
+            try:
+                if scenario == 'login':
+                    status = await request(port, 'POST', '/api/auth/login', {'email': f'load{index}.{serial}@example.edu'})
+                else:
+                    status = await request(port, 'GET', '/api/users/me', headers={'Authorization': f'Bearer {token}'})
+            except (ConnectionError, OSError, IndexError):
+                status = 'error'
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return latencies, statuses
+
+def server_command(kind, port, threads):
+    if kind == 'sync':
+        return [sys.executable, '-m', 'gunicorn', '-k', 'gthread', '-w', '1', '--threads', str(threads),
+                '-b', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:create_app()']
+
+    return [sys.executable, '-m', 'uvicorn', '--factory', 'asgi:create_asgi_app',
+            '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log']
+
+def seed(database):
+    """Create the schema and one user; returns that user's token"""
+    sys.path.insert(0, BACKEND)
+    from app import create_app
+    from config import Config
+    from models import User, db
+    from services.auth_service import generate_auth_token
+
+    config = type('LoadConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', 'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'SQLALCHEMY_BINDS': {}, 'DB_SCHEMA_SETUP': 'create_all'
+    })
+    app = create_app(config)
+
+    with app.app_context():
+        user = User(email='load@example.edu', name='Load')
+        db.session.add(user)
+        db.session.commit()
+        token = generate_auth_token(user.id)
+        db.engine.dispose()
+
+    return token
+
+async def run(args):
+    smtp = StubSMTPServer(args.smtp_delay)
+    smtp_port = free_port()
+    smtp_server = await asyncio.start_server(smtp.handle, '127.0.0.1', smtp_port)
+
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, 'load.db')
+    token = seed(database)
+
+    environment = dict(
+        os.environ, FLASK_ENV='production', DATABASE_URL=f'sqlite:///{database}', DB_SCHEMA_SETUP='none',
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=str(smtp_port), MAIL_USE_TLS='false', MAIL_ASYNC='false',
+        EMAIL_CHECK_DELIVERABILITY='false', SQL_LOG_REQUESTS='false', ASYNC_WSGI_THREADS=str(args.threads),
+        LOAD_DOTENV='false'
+    )
+    environment.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    results = {}
+
+    try:
+        for kind in ('sync', 'async'):
+            port = free_port()
+            process = subprocess.Popen(server_command(kind, port, args.threads), cwd=BACKEND, env=environment)
+
+            try:
+                await wait_until_up(port)
+
+                for scenario in args.scenarios.split(','):
+                    for concurrency in (int(c) for c in args.concurrency.split(',')):
+                        latencies, statuses = await drive(port, scenario, concurrency, args.seconds, token)
+                        ordered = sorted(latencies)
+                        results.setdefault(scenario, {}).setdefault(str(concurrency), {})[kind] = {
+                            'requestsPerSecond': round(len(latencies) / args.seconds, 1),
+                            'p50Ms': round(statistics.median(ordered) * 1000, 1),
+                            'p95Ms': round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 1),
+                            'statuses': {str(status): count for status, count in statuses.items()}
+                        }
+                        print(f'{kind:5} {scenario:7} c={concurrency:<5} '
+                              f"{results[scenario][str(concurrency)][kind]['requestsPerSecond']:8.1f} req/s", file=sys.stderr)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    finally:
+        smtp_server.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'smtpDelayMs': args.smtp_delay * 1000,
+        'syncThreads': args.threads,
+        'seconds': args.seconds,
+        'emailsAccepted': smtp.messages,
+        'results': results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='50,200', help='Comma-separated in-flight request counts')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--threads', type=int, default=8, help='Threads of the sync worker and the ASGI Flask pool')
+    parser.add_argument('--smtp-delay', type=float, default=0.1, help='Seconds the SMTP stub takes per message')
+    parser.add_argument('--scenarios', default='login,profile', help='login (SMTP-bound) and/or profile (served by Flask)')
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Synthetic campus data for benchmarks: users, a power-law spread of assignments
+(most students have a handful, a few have hundreds) and a friendship graph grown
+by preferential attachment, so some students are far better connected than others
+"""
+import random
+from datetime import datetime, timedelta
+from models import User, Assignment, Friendship, FriendshipStatus, DailyCoinTotal, db
+from services.coins_service import calculate_quack_coins, record_coin_award
+
+COURSES = [f'{subject}{number}' for subject in ('CS', 'MATH', 'BIO', 'HIST', 'ECON', 'PHYS') for number in (101, 201)]
+MAJORS = ['Computer Science', 'Mathematics', 'Biology', 'History', 'Economics', 'Physics']
+
+def _assignment_count(rng, mean, alpha, cap):
+    """Pareto-distributed count with the requested mean"""
+    scale = mean * (alpha - 1) / alpha
+    return max(1, min(int(rng.paretovariate(alpha) * scale), cap))
+
+def _friend_pairs(rng, user_ids, links_per_user):
+    """Barabasi-Albert style graph: new users befriend existing ones in proportion to their degree"""
+    pairs = set()
+    endpoints = []
+
+    for index, user_id in enumerate(user_ids):
+        existing = user_ids[:index]
+        targets = set()
+
+        while existing and len(targets) < min(links_per_user, len(existing)):
+            targets.add(rng.choice(endpoints) if endpoints and rng.random() < 0.8 else rng.choice(existing))
+
+        for target in targets:
+            pairs.add((user_id, target))
+            endpoints.extend((user_id, target))
+
+    return sorted(pairs)
+
+def generate(users=200, mean_assignments=20, alpha=1.6, links_per_user=4, seed=7, now=None):
+    """
+    Seed the database through the models and return a summary with the generated user ids
+    Completed assignments get ledger entries and stats consistent with calculate_quack_coins
+    """
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+
+    people = [
+        User(
+            email=f'student{i}@bench.example.edu',
+            name=f'Student {i}',
+            major=rng.choice(MAJORS),
+            year=rng.choice(['Freshman', 'Sophomore', 'Junior', 'Senior'])
+        )
+        for i in range(users)
+    ]
+    db.session.add_all(people)
+    db.session.flush()
+
+    assignments = 0
+
+    for user in people:
+        courses = rng.sample(COURSES, rng.randint(2, 5))
+        user.completed_assignments = user.early_completion_count = user.total_time_saved = user.quack_coins = 0
+        completions = []
+
+        for i in range(_assignment_count(rng, mean_assignments, alpha, mean_assignments * 50)):
+            start = now - timedelta(days=rng.uniform(0, 90))
+            deadline = start + timedelta(days=rng.uniform(1, 30))
+            assignment = Assignment(
+                user_id=user.id,
+                title=f'Problem set {i}',
+                description='Synthetic benchmark assignment',
+                course=rng.choice(courses),
+                start_date=start,
+                deadline=deadline,
+                estimated_hours=rng.choice([0.5, 1.0, 2.0, 4.0]),
+                coins_reward=rng.choice([10, 10, 20, 50]),
+                completed=False
+            )
+            db.session.add(assignment)
+            assignments += 1
+
+            # Most past-due work is done, usually somewhere between start and deadline
+            if deadline < now and rng.random() < 0.8:
+                completions.append((assignment, min(start + (deadline - start) * rng.uniform(0.1, 1.2), now)))
+
+        db.session.flush()
+        daily = {}
+
+        for assignment, completed_at in completions:
+            assignment.completed = True
+            assignment.completed_date = completed_at
+
+            earned = calculate_quack_coins(assignment, completed_at)
+            record_coin_award(user, earned, assignment, when=completed_at)
+            daily[completed_at.date()] = daily.get(completed_at.date(), 0) + earned
+
+            user.quack_coins += earned
+            user.completed_assignments += 1
+
+            if completed_at < assignment.deadline:
+                user.early_completion_count += 1
+                user.total_time_saved += round((assignment.deadline - completed_at).total_seconds() / 3600)
+
+        db.session.add_all(DailyCoinTotal(user_id=user.id, day=day, coins=coins) for day, coins in daily.items())
+        db.session.flush()
+        user.rebuild_completion_totals()
+
+    pairs = _friend_pairs(rng, [user.id for user in people], links_per_user)
+
+    db.session.add_all(
+        Friendship(
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            status=FriendshipStatus.ACCEPTED if rng.random() < 0.9 else FriendshipStatus.PENDING
+        )
+        for sender_id, receiver_id in pairs
+    )
+    db.session.commit()
+
+    return {
+        'users': users,
+        'assignments': assignments,
+        'friendships': len(pairs),
+        'userIds': [user.id for user in people]
+    }
@@ -0,0 +1,118 @@
+"""
+Compare the ORM to_dict() + jsonify path against column projection + orjson
+Usage: python -m benchmarks.serialization [--rows 5000] [--friends 200] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import jsonify
+from app import create_app
+from config import TestingConfig
+from models import User, Assignment, Friendship, FriendshipStatus, db
+from services.serializers import ASSIGNMENT_COLUMNS, assignment_dict, dumps
+from services.friends_service import get_friend_graph_records
+
+def seed(rows, friends):
+    """Create one user with `rows` assignments and `friends` accepted friends"""
+    random.seed(42)
+    now = datetime.utcnow()
+    
+    owner = User(email='owner@example.com', name='Owner')
+    db.session.add(owner)
+    db.session.flush()
+    
+    for i in range(rows):
+        start = now - timedelta(days=random.randint(0, 30), seconds=random.randint(0, 86400))
+        completed = random.random() < 0.5
+        db.session.add(Assignment(
+            user_id=owner.id,
+            title=f'Assignment {i}',
+            description='Read chapter and answer the questions',
+            course=random.choice(['CS101', 'MATH200', 'HIST150']),
+            start_date=start,
+            deadline=start + timedelta(days=random.randint(1, 30)),
+            estimated_hours=random.choice([0.5, 1.0, 2.5]),
+            coins_reward=10,
+            completed=completed,
+            completed_date=start + timedelta(days=1) if completed else None
+        ))
+    
+    for i in range(friends):
+        friend = User(email=f'friend{i}@example.com', name=f'Friend {i}', quack_coins=random.randint(0, 500))
+        db.session.add(friend)
+        db.session.flush()
+        db.session.add(Friendship(sender_id=owner.id, receiver_id=friend.id, status=FriendshipStatus.ACCEPTED))
+    
+    db.session.commit()
+    return owner.id
+
+def timed(fn, repeat):
+    """Best-of-repeat wall time in milliseconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+        db.session.expunge_all()
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--friends', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = create_app(TestingConfig)
+    
+    with app.test_request_context():
+        user_id = seed(args.rows, args.friends)
+        
+        cases = {
+            'assignments': (
+                lambda: jsonify({'assignments': [
+                    a.to_dict() for a in Assignment.query.filter_by(user_id=user_id).order_by(Assignment.deadline, Assignment.id)
+                ]}).get_data(),
+                lambda: dumps({'assignments': [
+                    assignment_dict(row) for row in db.session.query(*ASSIGNMENT_COLUMNS).filter(
+                        Assignment.user_id == user_id
+                    ).order_by(Assignment.deadline, Assignment.id)
+                ]})
+            ),
+            'friends': (
+                lambda: jsonify({'friends': [
+                    friend.to_dict() for friend in db.session.get(User, user_id).friend_graph()[0]
+                ]}).get_data(),
+                lambda: dumps({'friends': [
+                    record.to_dict() for record in get_friend_graph_records(user_id)[0]
+                ]})
+            )
+        }
+        
+        results = {}
+        
+        for name, (orm_path, fast_path) in cases.items():
+            orm_ms, orm_body = timed(orm_path, args.repeat)
+            fast_ms, fast_body = timed(fast_path, args.repeat)
+            
+            # The fast path must produce the same document
+            assert json.loads(orm_body) == json.loads(fast_body), f'{name}: responses differ'
+            
+            results[name] = {
+                'ormMs': round(orm_ms, 2),
+                'projectionMs': round(fast_ms, 2),
+                'speedup': round(orm_ms / fast_ms, 2),
+                'bytes': len(fast_body)
+            }
+    
+    print(json.dumps({'rows': args.rows, 'friends': args.friends, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Read/write throughput of a file SQLite database as worker processes are added,
+with the default connection settings versus the SQLITE_TUNED profile
+Usage: python -m benchmarks.sqlite_concurrency [--workers 1,2,4,8] [--seconds 3] [--write-ratio 0.2]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import Config
+from models import User, Assignment, db
+
+USERS = 50
+
+def make_config(path, tuned):
+    return type('BenchmarkConfig', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'SQLALCHEMY_BINDS': {},
+        'SQLITE_TUNED': tuned
+    })
+
+def seed(config):
+    app = create_app(config)
+
+    with app.app_context():
+        users = [User(email=f'user{i}@example.com', name=f'User {i}') for i in range(USERS)]
+        db.session.add_all(users)
+        db.session.flush()
+
+        now = datetime.utcnow()
+        db.session.add_all(
+            Assignment(user_id=user.id, title=f'Seed {i}', start_date=now, deadline=now + timedelta(days=i % 30 + 1))
+            for user in users for i in range(20)
+        )
+        db.session.commit()
+        db.engine.dispose()
+
+def worker(config, seconds, write_ratio, seed_value, results):
+    """Mix short reads (a user's upcoming assignments) and writes (one insert) until time is up"""
+    app = create_app(config)
+    rng = random.Random(seed_value)
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        user_id = rng.randint(1, USERS)
+        write = rng.random() < write_ratio
+
+        with app.test_request_context(method='POST' if write else 'GET'):
+            try:
+                if write:
+                    now = datetime.utcnow()
+                    db.session.add(Assignment(user_id=user_id, title='Bench', start_date=now, deadline=now + timedelta(days=7)))
+                    db.session.commit()
+                    counts['writes'] += 1
+                else:
+                    Assignment.query.filter(
+                        Assignment.user_id == user_id, Assignment.completed == False
+                    ).order_by(Assignment.deadline).limit(20).all()
+                    counts['reads'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counts['errors'] += 1
+            finally:
+                db.session.remove()
+
+    results.put(counts)
+
+def run(workers, seconds, write_ratio, tuned):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    config = make_config(path, tuned)
+    seed(config)
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(config, seconds, write_ratio, i, results))
+        for i in range(workers)
+    ]
+
+    for process in processes:
+        process.start()
+
+    totals = {'reads': 0, 'writes': 0, 'errors': 0}
+    for _ in processes:
+        for key, value in results.get().items():
+            totals[key] += value
+
+    for process in processes:
+        process.join()
+
+    return {
+        'workers': workers,
+        'readsPerSecond': round(totals['reads'] / seconds),
+        'writesPerSecond': round(totals['writes'] / seconds),
+        'lockErrors': totals['errors']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts')
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',')]
+
+    report = {
+        profile: [run(count, args.seconds, args.write_ratio, tuned) for count in worker_counts]
+        for profile, tuned in (('default', False), ('tuned', True))
+    }
+
+    print(json.dumps({'seconds': args.seconds, 'writeRatio': args.write_ratio, 'results': report}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Cold-start cost of a worker: time to import the app module and to run create_app,
+each measured in a fresh interpreter, for the development and production startup paths
+Usage: python -m benchmarks.startup [--runs 10] [--top 10]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from config import config
+application = app.create_app(config[{env!r}])
+created = time.perf_counter()
+print(json.dumps({{
+    'importMs': (imported - started) * 1000,
+    'createAppMs': (created - imported) * 1000,
+    'modules': len(sys.modules)
+}}))
+"""
+
+# env name, extra environment; production skips schema setup, dotenv and alembic
+PROFILES = {
+    'development': ('development', {}),
+    'production': ('production', {'LOAD_DOTENV': 'false'})
+}
+
+def _environment(database, extra):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', **extra)
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    return env
+
+def probe(env_name, environment, importtime=False):
+    """Run one cold start in a new interpreter and return its timings (and -X importtime output)"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [
+        '-c', PROBE.format(backend=BACKEND, env=env_name)
+    ]
+    result = subprocess.run(command, env=environment, cwd=BACKEND, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def slowest_imports(importtime_output, top):
+    """Packages imported by the app module, by cumulative import time (ms)"""
+    totals = {}
+
+    for line in importtime_output.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+
+        # Three spaces of indent: imported directly by app.py
+        if match and len(match.group(2)) == 3:
+            package = match.group(3).split('.')[0]
+            totals[package] = totals.get(package, 0) + int(match.group(1)) / 1000
+
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{'module': name, 'ms': round(ms, 1)} for name, ms in ranked]
+
+def summarize(samples, key):
+    values = [sample[key] for sample in samples]
+    return {'median': round(statistics.median(values), 1), 'min': round(min(values), 1), 'max': round(max(values), 1)}
+
+def run(profile, runs, top):
+    env_name, extra = PROFILES[profile]
+    directory = tempfile.mkdtemp()
+
+    try:
+        database = os.path.join(directory, 'startup.db')
+
+        # Create the schema first, so runs measure a restart rather than a first deploy
+        probe('development', _environment(database, {}))
+
+        environment = _environment(database, extra)
+        samples = [probe(env_name, environment)[0] for _ in range(runs)]
+        _, importtime = probe(env_name, environment, importtime=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'importMs': summarize(samples, 'importMs'),
+        'createAppMs': summarize(samples, 'createAppMs'),
+        'totalMs': summarize([{'total': s['importMs'] + s['createAppMs']} for s in samples], 'total'),
+        'modules': samples[-1]['modules'],
+        'slowestImports': slowest_imports(importtime, top)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10, help='How many of the slowest imports to list')
+    parser.add_argument('--profile', choices=sorted(PROFILES), action='append', help='Default: all')
+    args = parser.parse_args()
+
+    report = {profile: run(profile, args.runs, args.top) for profile in args.profile or PROFILES}
+    print(json.dumps({'runs': args.runs, 'results': report}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,387 @@
+"""
+Latency, SQL query count and peak memory for every API endpoint, against synthetic data
+Runs the blueprints through the Flask test client under TestingConfig with SMTP stubbed out
+Usage: python -m benchmarks.suite [--users 200] [--iterations 50] [--output results.json]
+                                  [--compare baseline.json] [--threshold 0.25]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from app import create_app
+from config import TestingConfig
+from models import User, Assignment, Friendship, FriendshipStatus, db
+from services.auth_service import generate_auth_token, generate_magic_link
+from benchmarks.data import generate
+
+class StubSMTP:
+    """Accepts every message without touching the network"""
+    sent = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        return (250, b'OK')
+
+    def sendmail(self, sender, to_email, message):
+        StubSMTP.sent += 1
+        return {}
+
+    def quit(self):
+        pass
+
+    close = quit
+
+def stub_external_services():
+    """Replace SMTP for the benchmark process"""
+    import smtplib
+
+    smtplib.SMTP = StubSMTP
+
+class BenchmarkConfig(TestingConfig):
+    # Send mail inline so its cost shows up in the request that triggers it
+    MAIL_ASYNC = False
+    # Deliverability checks run against a stub resolver, so timings include the cached path but no DNS
+    EMAIL_CHECK_DELIVERABILITY = True
+    EMAIL_DNS_STUB = '{"bench.example.edu": ["mx.bench.example.edu"]}'
+    EMAIL_PREWARM_DOMAINS = 'bench.example.edu'
+    EMAIL_PREWARM_TOP_DOMAINS = 0
+
+class Context:
+    """Seeded users, their tokens and a counter for unique fixture names"""
+
+    def __init__(self, app, user_ids, seed):
+        self.app = app
+        self.user_ids = user_ids
+        self.rng = random.Random(seed)
+        self.serial = 0
+
+        with app.app_context():
+            self.tokens = {user_id: generate_auth_token(user_id) for user_id in user_ids}
+
+    def user(self):
+        return self.rng.choice(self.user_ids)
+
+    def headers(self, user_id):
+        return {'Authorization': f'Bearer {self.tokens[user_id]}'}
+
+    def unique(self, prefix):
+        self.serial += 1
+        return f'{prefix}{self.serial}@bench.example.edu'
+
+    def open_assignment(self, user_id):
+        """Create an incomplete assignment outside the timed request"""
+        now = datetime.utcnow()
+        assignment = Assignment(
+            user_id=user_id, title='Bench fixture', course='CS101',
+            start_date=now - timedelta(days=2), deadline=now + timedelta(days=5)
+        )
+        db.session.add(assignment)
+        db.session.commit()
+        return assignment.id
+
+    def stranger(self, user_id, status):
+        """Create a new user with a friendship of the given status towards user_id"""
+        other = User(email=self.unique('stranger'), name='Stranger')
+        db.session.add(other)
+        db.session.flush()
+        db.session.add(Friendship(sender_id=other.id, receiver_id=user_id, status=status))
+        db.session.commit()
+        return other.id
+
+def _authed(method, path, body=None):
+    """Scenario for a fixed path called as a random user"""
+    def build(ctx):
+        user_id = ctx.user()
+        return method, path, {'headers': ctx.headers(user_id), 'json': body}
+    return build
+
+def _login(ctx):
+    user = db.session.get(User, ctx.user())
+    return 'POST', '/api/auth/login', {'json': {'email': user.email}}
+
+def _verify(ctx):
+    user = db.session.get(User, ctx.user())
+    token, _ = generate_magic_link(user.email)
+    return 'GET', f'/api/auth/verify?token={token}', {}
+
+def _get_assignment(ctx):
+    user_id = ctx.user()
+    assignment_id = db.session.query(Assignment.id).filter_by(user_id=user_id).limit(1).scalar()
+    return 'GET', f'/api/assignments/{assignment_id}', {'headers': ctx.headers(user_id)}
+
+def _create_assignment(ctx):
+    user_id = ctx.user()
+    now = datetime.utcnow()
+    return 'POST', '/api/assignments', {'headers': ctx.headers(user_id), 'json': {
+        'title': 'Bench essay', 'course': 'HIST101', 'estimatedHours': 2,
+        'startDate': now.isoformat(), 'deadline': (now + timedelta(days=7)).isoformat()
+    }}
+
+def _update_assignment(ctx):
+    user_id = ctx.user()
+    assignment_id = ctx.open_assignment(user_id)
+    return 'PUT', f'/api/assignments/{assignment_id}', {
+        'headers': ctx.headers(user_id), 'json': {'title': 'Renamed', 'estimatedHours': 3}
+    }
+
+def _complete_assignment(ctx):
+    user_id = ctx.user()
+    assignment_id = ctx.open_assignment(user_id)
+    return 'POST', f'/api/assignments/{assignment_id}/complete', {'headers': ctx.headers(user_id)}
+
+def _delete_assignment(ctx):
+    user_id = ctx.user()
+    assignment_id = ctx.open_assignment(user_id)
+    return 'DELETE', f'/api/assignments/{assignment_id}', {'headers': ctx.headers(user_id)}
+
+def _batch(ctx):
+    user_id = ctx.user()
+    now = datetime.utcnow()
+    data = {'title': 'Batch item', 'startDate': now.isoformat(), 'deadline': (now + timedelta(days=3)).isoformat()}
+    operations = [{'op': 'create', 'data': data} for _ in range(5)]
+    operations += [{'op': 'complete', 'id': ctx.open_assignment(user_id)} for _ in range(5)]
+    return 'POST', '/api/assignments/batch', {'headers': ctx.headers(user_id), 'json': {'operations': operations}}
+
+def _invite(ctx):
+    user_id = ctx.user()
+    return 'POST', '/api/friends/invite', {'headers': ctx.headers(user_id), 'json': {'email': ctx.unique('invitee')}}
+
+def _invite_bulk(ctx):
+    user_id = ctx.user()
+    emails = [ctx.unique('invitee') for _ in range(20)]
+    return 'POST', '/api/friends/invite/bulk', {'headers': ctx.headers(user_id), 'json': {'emails': emails}}
+
+def _respond(action):
+    def build(ctx):
+        user_id = ctx.user()
+        sender_id = ctx.stranger(user_id, FriendshipStatus.PENDING)
+        return 'POST', f'/api/friends/{action}/{sender_id}', {'headers': ctx.headers(user_id)}
+    return build
+
+def _remove_friend(ctx):
+    user_id = ctx.user()
+    friend_id = ctx.stranger(user_id, FriendshipStatus.ACCEPTED)
+    return 'DELETE', f'/api/friends/{friend_id}', {'headers': ctx.headers(user_id)}
+
+# name -> builder returning (method, path, client kwargs); builders do their setup untimed
+SCENARIOS = {
+    'auth.login': _login,
+    'auth.verify': _verify,
+    'auth.me': _authed('GET', '/api/auth/me'),
+    'auth.logout': _authed('POST', '/api/auth/logout'),
+    'assignments.list': _authed('GET', '/api/assignments'),
+    'assignments.list_open_page': _authed('GET', '/api/assignments?completed=false&limit=20'),
+    'assignments.changes': _authed('GET', '/api/assignments/changes?limit=200'),
+    'assignments.get': _get_assignment,
+    'assignments.create': _create_assignment,
+    'assignments.update': _update_assignment,
+    'assignments.complete': _complete_assignment,
+    'assignments.delete': _delete_assignment,
+    'assignments.batch': _batch,
+    'users.me': _authed('GET', '/api/users/me'),
+    'users.update': _authed('PUT', '/api/users/me', {'bio': 'Benchmarking', 'major': 'Physics'}),
+    'users.stats': _authed('GET', '/api/users/me/stats'),
+    'friends.list': _authed('GET', '/api/friends'),
+    'friends.invite': _invite,
+    'friends.invite_bulk': _invite_bulk,
+    'friends.accept': _respond('accept'),
+    'friends.reject': _respond('reject'),
+    'friends.remove': _remove_friend,
+    'friends.leaderboard': _authed('GET', '/api/friends/leaderboard'),
+    'leaderboard.global': _authed('GET', '/api/leaderboard'),
+    'leaderboard.week': _authed('GET', '/api/leaderboard?period=week'),
+    'leaderboard.me': _authed('GET', '/api/leaderboard/me'),
+}
+
+class QueryCounter:
+    """Counts statements sent to the engine while enabled"""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.enabled = False
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled:
+            self.count += 1
+
+    def measure(self, run):
+        self.count, self.enabled = 0, True
+        try:
+            response = run()
+        finally:
+            self.enabled = False
+        return response, self.count
+
+def percentile(samples, fraction):
+    """Linearly interpolated percentile of a list of numbers"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def bench_endpoint(ctx, client, counter, build, iterations, memory_iterations):
+    """Time one scenario; memory is sampled in a separate pass since tracemalloc slows everything down"""
+    latencies, queries, statuses = [], [], {}
+
+    def request_once():
+        with ctx.app.app_context():
+            method, path, kwargs = build(ctx)
+            db.session.remove()
+        return method, path, lambda: client.open(path, method=method, **kwargs)
+
+    for _ in range(iterations):
+        method, path, send = request_once()
+        started = time.perf_counter()
+        response, count = counter.measure(send)
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            _, _, send = request_once()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            send()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    rule, _ = ctx.app.url_map.bind('localhost').match(path.split('?')[0], method, return_rule=True)
+
+    return {
+        'method': method,
+        'route': rule.rule,
+        'p50Ms': round(percentile(latencies, 0.50), 3),
+        'p95Ms': round(percentile(latencies, 0.95), 3),
+        'p99Ms': round(percentile(latencies, 0.99), 3),
+        'meanMs': round(statistics.fmean(latencies), 3),
+        'queries': round(statistics.fmean(queries), 2),
+        'maxQueries': max(queries),
+        'peakMemoryKiB': round(peak / 1024, 1),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())}
+    }
+
+def run(users, mean_assignments, iterations, memory_iterations, warmup, seed, only=None):
+    stub_external_services()
+    app = create_app(BenchmarkConfig)
+
+    with app.app_context():
+        dataset = generate(users=users, mean_assignments=mean_assignments, seed=seed)
+
+    ctx = Context(app, dataset.pop('userIds'), seed)
+    client = app.test_client()
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+
+    results = {}
+
+    for name, build in SCENARIOS.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+
+        for _ in range(warmup):
+            with app.app_context():
+                method, path, kwargs = build(ctx)
+                db.session.remove()
+            client.open(path, method=method, **kwargs)
+
+        results[name] = bench_endpoint(ctx, client, counter, build, iterations, memory_iterations)
+        print(f"{name:32} p50 {results[name]['p50Ms']:8.2f}ms  p95 {results[name]['p95Ms']:8.2f}ms  "
+              f"{results[name]['queries']:6.1f} queries  {results[name]['peakMemoryKiB']:8.1f} KiB", file=sys.stderr)
+
+    return {
+        'meta': {
+            'createdAt': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'seed': seed,
+            'dataset': dataset,
+            'emailsSent': StubSMTP.sent
+        },
+        'endpoints': results
+    }
+
+# Metrics checked by --compare, with an absolute allowance on top of --threshold so tiny values don't flap
+# (query counts vary a little with token cache hits)
+COMPARED_METRICS = {'p50Ms': 1.0, 'p95Ms': 1.0, 'queries': 1.0, 'peakMemoryKiB': 16.0}
+
+def compare(baseline, current, threshold):
+    """Endpoints whose metrics got worse than the baseline by more than threshold (a fraction)"""
+    regressions = []
+
+    for name, result in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+
+        if before is None:
+            continue
+
+        for metric, allowance in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+
+            if old is not None and new is not None and new > old * (1 + threshold) + allowance:
+                regressions.append({'endpoint': name, 'metric': metric, 'baseline': old, 'current': new})
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--assignments', type=int, default=20, help='Mean assignments per user')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--memory-iterations', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--only', help='Comma-separated endpoint name prefixes, e.g. assignments,friends.list')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown')
+    args = parser.parse_args()
+
+    report = run(
+        args.users, args.assignments, args.iterations, args.memory_iterations, args.warmup, args.seed,
+        only=args.only.split(',') if args.only else None
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression['endpoint']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,31 @@
 import os
 from datetime import timedelta
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (deployments that set real env vars can skip the lookup)
+if os.environ.get('LOAD_DOTENV', 'true').lower() == 'true':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def engine_options(uri):
+    """Connection pool settings for an engine; SQLite keeps its default pool"""
+    options = {'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'}
+    
+    if not uri.startswith('sqlite'):
+        options.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+            pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),  # Seconds to wait for a connection
+            pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Seconds before reconnecting
+        )
+    
+    return options
+
+def replica_binds(urls):
+    """Flask-SQLAlchemy binds for read replicas, each with its own pool settings"""
+    return {
+        f'replica_{index}': {'url': url, **engine_options(url)}
+        for index, url in enumerate(url.strip() for url in urls.split(',')) if url
+    }
 
 class Config:
     """Base configuration."""
@@ -14,12 +36,62 @@ class Config:
     # Database Config
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///early_bird.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Schema setup on startup: 'migrate' (flask db upgrade), 'create_all' or 'none'
+    DB_SCHEMA_SETUP = os.environ.get('DB_SCHEMA_SETUP', 'migrate')
+    
+    # Read replicas (comma-separated URLs): authenticated GET requests read from one of these
+    SQLALCHEMY_BINDS = replica_binds(os.environ.get('DATABASE_REPLICA_URLS', ''))
+    # After a user writes, their reads stay on the primary this long (covers replication lag)
+    DB_STICKY_SECONDS = float(os.environ.get('DB_STICKY_SECONDS', 5))
+    
+    # SQLite concurrency profile for single-node deployments (file databases only)
+    SQLITE_TUNED = os.environ.get('SQLITE_TUNED', 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))  # Milliseconds
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # Pages, or KiB when negative
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 268435456))  # Bytes
+    SQLITE_BEGIN_IMMEDIATE = os.environ.get('SQLITE_BEGIN_IMMEDIATE', 'true').lower() == 'true'
     
     # JWT Config
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', SECRET_KEY)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # Verified-token cache used by token_required
+    AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 10000))
+    AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', 300))  # Seconds
+    
+    # Campus/course leaderboards: in-process rank index, rebuilt from SQL when stale
+    RANK_INDEX_ENABLED = os.environ.get('RANK_INDEX_ENABLED', 'true').lower() == 'true'
+    RANK_INDEX_REBUILD_INTERVAL = int(os.environ.get('RANK_INDEX_REBUILD_INTERVAL', 600))  # Seconds
+    RANK_INDEX_MAX_COURSES = int(os.environ.get('RANK_INDEX_MAX_COURSES', 200))  # Course cohorts kept in memory
+    
+    # Delta sync: deleted assignments are remembered this long; older cursors must resync
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+    # Cursors stay this far behind now, so changes still committing when they were stamped aren't skipped
+    SYNC_CURSOR_LAG_SECONDS = int(os.environ.get('SYNC_CURSOR_LAG_SECONDS', 10))
+    
+    # Per-request SQL profiling: Server-Timing header, a JSON log line per request, N+1 warnings
+    SQL_PROFILING = os.environ.get('SQL_PROFILING', 'true').lower() == 'true'
+    SQL_SERVER_TIMING = os.environ.get('SQL_SERVER_TIMING', 'true').lower() == 'true'
+    SQL_LOG_REQUESTS = os.environ.get('SQL_LOG_REQUESTS', 'true').lower() == 'true'
+    SQL_NPLUSONE_THRESHOLD = int(os.environ.get('SQL_NPLUSONE_THRESHOLD', 10))  # Same statement more often is flagged
+    
+    # Prometheus metrics; under gunicorn set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_PATH = os.environ.get('METRICS_PATH', '/metrics')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Require "Authorization: Bearer <token>" when set
+    METRICS_CACHE_SECONDS = float(os.environ.get('METRICS_CACHE_SECONDS', 1))  # Reuse a scrape this long
+    
+    # Response compression (gzip, or brotli when installed) for large text responses
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip, 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))  # 0-11
+    
     # Mail Config
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -27,6 +99,49 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@earlybird.com')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', 10))  # Seconds, for the connect and each SMTP command
+    
+    # Background delivery: queue mail and send it from a worker thread
+    MAIL_ASYNC = os.environ.get('MAIL_ASYNC', 'true').lower() == 'true'
+    MAIL_QUEUE_SIZE = int(os.environ.get('MAIL_QUEUE_SIZE', 1000))
+    MAIL_MAX_RETRIES = int(os.environ.get('MAIL_MAX_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = float(os.environ.get('MAIL_RETRY_BACKOFF', 1.0))  # Seconds, doubled per retry
+    MAIL_CONNECTION_IDLE_TIMEOUT = int(os.environ.get('MAIL_CONNECTION_IDLE_TIMEOUT', 60))  # Seconds
+    
+    # QuackCoin reward tiers as JSON, e.g. {"tiers": [[0.25, 0.5], [0.5, 0.3], [0.75, 0.15]], "fallback": 0.05}
+    REWARD_POLICY = os.environ.get('REWARD_POLICY')
+    
+    # Deadline and bonus-tier reminder emails (flask send-reminders)
+    REMINDER_LOOKAHEAD_DAYS = int(os.environ.get('REMINDER_LOOKAHEAD_DAYS', 30))  # Deadlines loaded ahead of now
+    REMINDER_TIER_LEAD_HOURS = int(os.environ.get('REMINDER_TIER_LEAD_HOURS', 12))  # Warning before a bonus tier drops
+    REMINDER_CHUNK_SIZE = int(os.environ.get('REMINDER_CHUNK_SIZE', 5000))
+    REMINDER_INTERVAL = int(os.environ.get('REMINDER_INTERVAL', 60))  # Seconds between ticks
+    # Where `send-reminders --once` records how far it got (default: instance/reminders_sent_until)
+    REMINDER_WATERMARK_FILE = os.environ.get('REMINDER_WATERMARK_FILE')
+    
+    # MX/A lookups on login and invite emails; turn off where DNS isn't reachable
+    EMAIL_CHECK_DELIVERABILITY = os.environ.get('EMAIL_CHECK_DELIVERABILITY', 'true').lower() == 'true'
+    EMAIL_DNS_TIMEOUT = float(os.environ.get('EMAIL_DNS_TIMEOUT', 3.0))  # Seconds a lookup may take in the background
+    EMAIL_DNS_BUDGET = float(os.environ.get('EMAIL_DNS_BUDGET', 0.5))  # Seconds a request waits before accepting the address
+    EMAIL_DNS_TTL = int(os.environ.get('EMAIL_DNS_TTL', 21600))  # Seconds a deliverable domain stays cached
+    EMAIL_DNS_NEGATIVE_TTL = int(os.environ.get('EMAIL_DNS_NEGATIVE_TTL', 900))  # ... an undeliverable one
+    EMAIL_DNS_UNKNOWN_TTL = int(os.environ.get('EMAIL_DNS_UNKNOWN_TTL', 60))  # ... one whose lookup timed out
+    EMAIL_DNS_CACHE_SIZE = int(os.environ.get('EMAIL_DNS_CACHE_SIZE', 10000))
+    EMAIL_DNS_WORKERS = int(os.environ.get('EMAIL_DNS_WORKERS', 4))
+    # Answer lookups from a JSON map (or file) of domain -> MX hosts instead of DNS, e.g. {"example.edu": ["mx.example.edu"]}
+    EMAIL_DNS_STUB = os.environ.get('EMAIL_DNS_STUB')
+    # Domains looked up at startup, plus the most common domains among existing users
+    EMAIL_PREWARM_DOMAINS = os.environ.get(
+        'EMAIL_PREWARM_DOMAINS',
+        'gmail.com,outlook.com,hotmail.com,yahoo.com,icloud.com,'
+        'g.harvard.edu,mit.edu,stanford.edu,berkeley.edu,umich.edu,nyu.edu,columbia.edu,'
+        'cornell.edu,ucla.edu,uw.edu,utexas.edu,illinois.edu,gatech.edu,cmu.edu,purdue.edu'
+    )
+    EMAIL_PREWARM_TOP_DOMAINS = int(os.environ.get('EMAIL_PREWARM_TOP_DOMAINS', 50))
+    
+    # ASGI entry point (asgi.py): threads for routes still served by the Flask app, async SMTP timeout
+    ASYNC_WSGI_THREADS = int(os.environ.get('ASYNC_WSGI_THREADS', 32))
+    ASYNC_MAIL_TIMEOUT = float(os.environ.get('ASYNC_MAIL_TIMEOUT', 10))  # Seconds
     
     # Magic Link Config
     MAGIC_LINK_EXPIRY = timedelta(minutes=15)
@@ -45,12 +160,19 @@ class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     # In production, you must set strong secret keys through environment variables
+    # Run `flask db upgrade` once per deploy instead of from every worker
+    DB_SCHEMA_SETUP = os.environ.get('DB_SCHEMA_SETUP', 'none')
     
     
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = {}
+    DB_SCHEMA_SETUP = 'create_all'
+    SQL_LOG_REQUESTS = False
+    EMAIL_CHECK_DELIVERABILITY = False
     
 
 config = {
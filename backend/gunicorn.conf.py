@@ -0,0 +1,42 @@
+"""
+gunicorn settings: gunicorn -c gunicorn.conf.py "app:create_app()"
+Workers write their metrics to files in PROMETHEUS_MULTIPROC_DIR so /metrics can merge them
+"""
+import gc
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+
+# Build the app once in the master and fork it, so workers start without importing anything
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Must be set before any worker (or a preloading master) imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join('/tmp', 'early_bird_metrics'))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+def on_starting(server):
+    # Files left by a previous master would be merged into the new one's counters
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    from app import preload_deferred_imports
+    preload_deferred_imports()
+
+    # Keep the preloaded objects out of the collector, so it never touches (and copies) their pages
+    gc.freeze()
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (in-flight requests, pool connections)
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+
+    multiprocess.mark_process_dead(worker.pid)
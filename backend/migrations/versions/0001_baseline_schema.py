@@ -0,0 +1,78 @@
+"""Baseline schema (users, assignments, friendships) as created by db.create_all()
+
+Databases created before migrations existed are stamped at this revision.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('avatar', sa.String(length=500), nullable=True),
+        sa.Column('quack_coins', sa.Integer(), nullable=True),
+        sa.Column('major', sa.String(length=100), nullable=True),
+        sa.Column('year', sa.String(length=50), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('preferences', sa.JSON(), nullable=True),
+        sa.Column('completed_assignments', sa.Integer(), nullable=True),
+        sa.Column('early_completion_count', sa.Integer(), nullable=True),
+        sa.Column('total_time_saved', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+    )
+    op.create_table(
+        'assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('course', sa.String(length=100), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.Column('deadline', sa.DateTime(), nullable=False),
+        sa.Column('estimated_hours', sa.Float(), nullable=True),
+        sa.Column('coins_reward', sa.Integer(), nullable=True),
+        sa.Column('completed', sa.Boolean(), nullable=True),
+        sa.Column('completed_date', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'friendships',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sender_id', sa.Integer(), nullable=False),
+        sa.Column('receiver_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'ACCEPTED', 'REJECTED', name='friendshipstatus'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['receiver_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['sender_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('friendships')
+    op.drop_table('assignments')
+    op.drop_table('users')
+    sa.Enum(name='friendshipstatus').drop(op.get_bind(), checkfirst=True)
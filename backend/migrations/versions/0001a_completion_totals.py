@@ -0,0 +1,61 @@
+"""Running completion totals on users (total_completion_days, timed_completions)
+
+Fills the totals from the completed assignments, the same way `flask rebuild-stats` does.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18 09:02:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001a'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases built by db.create_all() may already have the columns
+    user_columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+
+    with op.batch_alter_table('users') as batch_op:
+        if 'total_completion_days' not in user_columns:
+            batch_op.add_column(sa.Column('total_completion_days', sa.Integer(), nullable=True))
+        if 'timed_completions' not in user_columns:
+            batch_op.add_column(sa.Column('timed_completions', sa.Integer(), nullable=True))
+
+    bind = op.get_bind()
+    users = sa.table('users', sa.column('id'), sa.column('total_completion_days'), sa.column('timed_completions'))
+    assignments = sa.table(
+        'assignments', sa.column('user_id'), sa.column('completed'),
+        sa.column('start_date', sa.DateTime()), sa.column('completed_date', sa.DateTime())
+    )
+
+    totals = {}
+
+    for user_id, start_date, completed_date in bind.execute(
+        sa.select(assignments.c.user_id, assignments.c.start_date, assignments.c.completed_date)
+        .where(assignments.c.completed == sa.true())
+    ):
+        days, count = totals.get(user_id, (0, 0))
+        totals[user_id] = (days + ((completed_date - start_date).days if completed_date else 0), count + 1)
+
+    bind.execute(users.update().values(total_completion_days=0, timed_completions=0))
+
+    if totals:
+        bind.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id')).values(
+                total_completion_days=sa.bindparam('days'), timed_completions=sa.bindparam('count')
+            ),
+            [{'user_id': user_id, 'days': days, 'count': count} for user_id, (days, count) in totals.items()]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('timed_completions')
+        batch_op.drop_column('total_completion_days')
@@ -0,0 +1,45 @@
+"""Indexes for the assignment and friendship query shapes
+
+assignments: per-user listing (filtered by completion, ordered by deadline, id)
+and course cohorts. friendships: each direction of the friend graph by status,
+and the sender/receiver pair lookups behind invite/accept/reject/remove.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-18 09:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001a'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_assignments_user_completed_deadline', 'assignments', ['user_id', 'completed', 'deadline']),
+    ('ix_assignments_user_deadline', 'assignments', ['user_id', 'deadline', 'id']),
+    ('ix_assignments_course_user', 'assignments', ['course', 'user_id']),
+    ('ix_friendships_sender_status', 'friendships', ['sender_id', 'status']),
+    ('ix_friendships_receiver_status', 'friendships', ['receiver_id', 'status']),
+    ('ix_friendships_sender_receiver', 'friendships', ['sender_id', 'receiver_id']),
+]
+
+
+def _existing_indexes(table):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        # Databases built by db.create_all() may already have some of these
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
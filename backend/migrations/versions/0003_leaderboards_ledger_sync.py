@@ -0,0 +1,100 @@
+"""Stored leaderboards, QuackCoin ledger and sync tombstones
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _create_index(name, table, columns, **kwargs):
+    if name not in {index['name'] for index in _inspector().get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def upgrade():
+    # Parts of this may already exist in databases built by db.create_all()
+    tables = set(_inspector().get_table_names())
+    _create_index('ix_assignments_completed_deadline', 'assignments', ['completed', 'deadline', 'id'])
+    _create_index('ix_assignments_updated_at', 'assignments', ['updated_at'])
+    _create_index('ix_assignments_user_updated', 'assignments', ['user_id', 'updated_at', 'id'])
+
+    if 'leaderboard_entries' not in tables:
+        op.create_table(
+            'leaderboard_entries',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('owner_id', sa.Integer(), nullable=False),
+            sa.Column('member_id', sa.Integer(), nullable=False),
+            sa.Column('quack_coins', sa.Integer(), nullable=True),
+            sa.Column('completed', sa.Integer(), nullable=True),
+            sa.Column('early_rate', sa.Integer(), nullable=True),
+            sa.Column('avg_time', sa.Float(), nullable=True),
+            sa.Column('comparison', sa.String(length=200), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['member_id'], ['users.id']),
+            sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('owner_id', 'member_id', name='uq_leaderboard_owner_member')
+        )
+    _create_index('ix_leaderboard_member', 'leaderboard_entries', ['member_id'])
+
+    if 'coin_transactions' not in tables:
+        op.create_table(
+            'coin_transactions',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('assignment_id', sa.Integer(), nullable=True),
+            sa.Column('amount', sa.Integer(), nullable=False),
+            sa.Column('reason', sa.String(length=50), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['assignment_id'], ['assignments.id'], ondelete='SET NULL'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    _create_index('ix_coin_transactions_user_created', 'coin_transactions', ['user_id', 'created_at'])
+
+    if 'daily_coin_totals' not in tables:
+        op.create_table(
+            'daily_coin_totals',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('coins', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'day')
+        )
+    _create_index('ix_daily_coin_totals_day_user', 'daily_coin_totals', ['day', 'user_id'])
+
+    if 'assignment_tombstones' not in tables:
+        op.create_table(
+            'assignment_tombstones',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('assignment_id', sa.Integer(), nullable=False),
+            sa.Column('deleted_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+    _create_index('ix_assignment_tombstones_user_deleted', 'assignment_tombstones', ['user_id', 'deleted_at', 'id'])
+
+
+def downgrade():
+    op.drop_table('assignment_tombstones')
+    op.drop_table('daily_coin_totals')
+    op.drop_table('coin_transactions')
+    op.drop_table('leaderboard_entries')
+
+    op.drop_index('ix_assignments_user_updated', table_name='assignments')
+    op.drop_index('ix_assignments_updated_at', table_name='assignments')
+    op.drop_index('ix_assignments_completed_deadline', table_name='assignments')
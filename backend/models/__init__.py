@@ -1,9 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from .session import RoutingSession
 
-db = SQLAlchemy()
+# Reads in GET requests can be routed to replicas (see RoutingSession)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Import all models here to make them available when importing the db
 from .user import User
 from .assignment import Assignment
-from .friendship import Friendship, FriendshipStatus
\ No newline at end of file
+from .friendship import Friendship, FriendshipStatus
+from .leaderboard import LeaderboardEntry
+from .coin_transaction import CoinTransaction, DailyCoinTotal
+from .assignment_tombstone import AssignmentTombstone
\ No newline at end of file
@@ -1,11 +1,23 @@
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from . import db
 
 class Assignment(db.Model):
     """Assignment model for storing assignment related data"""
     __tablename__ = 'assignments'
+    __table_args__ = (
+        # Serves the per-user listing filtered by completion and paged by deadline
+        Index('ix_assignments_user_completed_deadline', 'user_id', 'completed', 'deadline'),
+        # Unfiltered listing in (deadline, id) order, and course cohorts for the leaderboards
+        Index('ix_assignments_user_deadline', 'user_id', 'deadline', 'id'),
+        Index('ix_assignments_course_user', 'course', 'user_id'),
+        # The reminder scheduler walks open assignments by deadline and polls recent edits
+        Index('ix_assignments_completed_deadline', 'completed', 'deadline', 'id'),
+        Index('ix_assignments_updated_at', 'updated_at'),
+        # Delta sync walks one user's changes in (updated_at, id) order
+        Index('ix_assignments_user_updated', 'user_id', 'updated_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
@@ -48,9 +60,40 @@ class Assignment(db.Model):
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
     
-    def complete(self):
-        """Mark assignment as completed and return earned coins"""
-        from services.coins_service import calculate_quack_coins
+    def completion_days(self):
+        """Whole days from start to completion (0 if not completed yet)"""
+        if not self.completed or not self.completed_date:
+            return 0
+        return (self.completed_date - self.start_date).days
+    
+    def completion_time_counters(self):
+        """This assignment's share of the user's running completion totals (empty if not completed)"""
+        if not self.completed:
+            return {}
+        return {'timed_completions': 1, 'total_completion_days': self.completion_days()}
+    
+    def completion_counters(self):
+        """User counter deltas for completing this assignment (call after complete())"""
+        early = self.completed_date < self.deadline
+        
+        # Calculate time saved (in hours) if completed early
+        time_saved = (self.deadline - self.completed_date).total_seconds() / 3600 if early else 0
+        
+        return dict(
+            completed_assignments=1,
+            early_completion_count=int(early),
+            total_time_saved=round(time_saved),
+            **self.completion_time_counters()
+        )
+    
+    def complete(self, deferred=False):
+        """
+        Mark assignment as completed and return earned coins
+        With deferred=True the counter, coin balance and leaderboard updates are left to
+        the caller, so a batch can apply them once per user (see completion_counters
+        and settle_completions)
+        """
+        from services.coins_service import calculate_quack_coins, record_coin_award, settle_completions
         
         if not self.completed:
             self.completed = True
@@ -58,19 +101,15 @@ class Assignment(db.Model):
             
             # Calculate earned coins
             earned_coins = calculate_quack_coins(self, self.completed_date)
-            
-            # Update user statistics
             user = self.user
-            user.quack_coins += earned_coins
-            user.completed_assignments += 1
             
-            # Check if completed early
-            if self.completed_date < self.deadline:
-                user.early_completion_count += 1
-                
-                # Calculate time saved (in hours)
-                time_saved = (self.deadline - self.completed_date).total_seconds() / 3600  # Convert to hours
-                user.total_time_saved += round(time_saved)
+            # Record the award in the ledger; the balance moves with an atomic UPDATE
+            record_coin_award(user, earned_coins, assignment=self, when=self.completed_date)
+            
+            if not deferred:
+                # One atomic UPDATE for the counters and the running completion totals
+                user.increment(**self.completion_counters())
+                settle_completions(user, earned_coins, self.course)
             
             return earned_coins
         
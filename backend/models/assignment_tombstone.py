@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, DateTime, Index
+from . import db
+
+class AssignmentTombstone(db.Model):
+    """Record of a deleted assignment, kept so sync clients can learn about the deletion"""
+    __tablename__ = 'assignment_tombstones'
+    __table_args__ = (
+        # Delta sync reads one user's deletions in (deleted_at, id) order after a cursor
+        Index('ix_assignment_tombstones_user_deleted', 'user_id', 'deleted_at', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # No foreign keys: the assignment is gone, and the user may be deleted later too
+    user_id = Column(Integer, nullable=False)
+    assignment_id = Column(Integer, nullable=False)
+
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<AssignmentTombstone {self.assignment_id} ({self.deleted_at})>'
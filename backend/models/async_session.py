@@ -0,0 +1,39 @@
+from sqlalchemy.engine import make_url
+from .sqlite_tuning import init_sqlite
+
+# Async drivers for the databases we deploy on
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql'
+}
+
+def async_database_url(url):
+    """
+    The async-driver equivalent of a database URL, or None if there isn't one
+    In-memory SQLite has no equivalent: an async engine would open a different, empty database
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend not in ASYNC_DRIVERS or (backend == 'sqlite' and url.database in (None, '', ':memory:')):
+        return None
+
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_session_factory(app, engine):
+    """
+    AsyncEngine and session factory for the database behind a (sync) engine, with the same
+    pool settings and SQLite profile; returns (None, None) when there is no async driver for it
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    url = async_database_url(engine.url)
+
+    if url is None:
+        return None, None
+
+    async_engine = create_async_engine(url, **app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    init_sqlite(app, [async_engine.sync_engine])
+
+    return async_engine, async_sessionmaker(async_engine, expire_on_commit=False)
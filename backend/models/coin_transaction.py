@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
+from . import db
+
+class CoinTransaction(db.Model):
+    """Append-only ledger of QuackCoin awards"""
+    __tablename__ = 'coin_transactions'
+    __table_args__ = (
+        Index('ix_coin_transactions_user_created', 'user_id', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    assignment_id = Column(Integer, ForeignKey('assignments.id', ondelete='SET NULL'), nullable=True)
+
+    amount = Column(Integer, nullable=False)
+    reason = Column(String(50), nullable=False, default='assignment_completed')
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<CoinTransaction {self.user_id} {self.amount:+d} ({self.reason})>'
+
+    def to_dict(self):
+        """Convert transaction object to dictionary for API responses"""
+        return {
+            'id': self.id,
+            'assignmentId': self.assignment_id,
+            'amount': self.amount,
+            'reason': self.reason,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+
+class DailyCoinTotal(db.Model):
+    """Coins earned per user per UTC day, pre-aggregated from the ledger"""
+    __tablename__ = 'daily_coin_totals'
+    __table_args__ = (
+        # Period leaderboards scan a range of days and group by user
+        Index('ix_daily_coin_totals_day_user', 'day', 'user_id'),
+    )
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    coins = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyCoinTotal {self.user_id} {self.day} {self.coins}>'
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from . import db
 
@@ -13,6 +13,13 @@ class FriendshipStatus(str, Enum):
 class Friendship(db.Model):
     """Friendship model for storing user friendships"""
     __tablename__ = 'friendships'
+    __table_args__ = (
+        # One per direction, matching the sender/receiver + status lookups
+        Index('ix_friendships_sender_status', 'sender_id', 'status'),
+        Index('ix_friendships_receiver_status', 'receiver_id', 'status'),
+        # Pair lookups when inviting, accepting, rejecting and removing
+        Index('ix_friendships_sender_receiver', 'sender_id', 'receiver_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     sender_id = Column(Integer, ForeignKey('users.id'), nullable=False)
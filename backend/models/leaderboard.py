@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from . import db
+
+class LeaderboardEntry(db.Model):
+    """
+    Stored row of a user's friends leaderboard (one per owner/member pair)
+    Ranks aren't stored: they come from the coins order when the board is read
+    """
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        UniqueConstraint('owner_id', 'member_id', name='uq_leaderboard_owner_member'),
+        Index('ix_leaderboard_member', 'member_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    member_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+
+    # Headline stats copied from the member when they change
+    quack_coins = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    early_rate = Column(Integer, default=0)
+    avg_time = Column(Float, default=0)
+    comparison = Column(String(200), nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    member = relationship('User', foreign_keys=[member_id])
+
+    def __repr__(self):
+        return f'<LeaderboardEntry {self.owner_id}:{self.member_id}>'
+
+    @staticmethod
+    def stats_values(user):
+        """The headline stats columns for a member user"""
+        return {
+            'quack_coins': user.quack_coins or 0,
+            'completed': user.completed_assignments or 0,
+            'early_rate': user.calculate_early_rate(),
+            'avg_time': user.calculate_avg_time(),
+            'comparison': user.generate_comparison()
+        }
+
+    def copy_stats(self, user):
+        """Copy the headline stats from the member user"""
+        for name, value in self.stats_values(user).items():
+            setattr(self, name, value)
+
+    def stats_dict(self):
+        """Stats block in the same shape as User.to_dict()"""
+        return {
+            'completed': self.completed,
+            'earlyRate': self.early_rate,
+            'avgTime': self.avg_time,
+            'comparison': self.comparison
+        }
+
+    def to_dict(self, rank):
+        """Convert leaderboard entry to dictionary for API responses"""
+        user_dict = self.member.to_dict(stats=self.stats_dict())
+        user_dict['quackCoins'] = self.quack_coins
+        user_dict['rank'] = rank
+        user_dict['isCurrentUser'] = (self.member_id == self.owner_id)
+        return user_dict
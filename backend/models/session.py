@@ -0,0 +1,136 @@
+import random
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+from .sqlite_tuning import IMMEDIATE_OPTION
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+REPLICA_PREFIX = 'replica_'
+PRIMARY_COOKIE = 'eb_primary_until'
+
+def replica_keys(app=None):
+    """Bind keys of the configured read replicas"""
+    app = app or current_app
+    return [key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_PREFIX)]
+
+def _sticky_users(app):
+    """Per-process map of user id -> time until which their reads stay on the primary"""
+    sticky = app.extensions.get('primary_sticky')
+
+    if sticky is None:
+        from services.cache import TTLCache
+        sticky = TTLCache(max_size=100000, ttl=app.config['DB_STICKY_SECONDS'])
+        app.extensions['primary_sticky'] = sticky
+
+    return sticky
+
+def _replica_allowed():
+    """
+    Replicas serve reads in authenticated GET/HEAD requests, unless the user wrote recently
+    Token lookups (no g.identity yet), background jobs and CLI commands always use the primary
+    """
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+
+    identity = g.get('identity')
+
+    if identity is None:
+        return False
+
+    # The cookie carries the window across workers; the per-process map covers clients without cookies
+    try:
+        if float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time():
+            return False
+    except ValueError:
+        pass
+
+    return _sticky_users(current_app).get(identity.user_id) is None
+
+class RoutingSession(Session):
+    """
+    Session that sends read-only request traffic to a read replica and everything else to the primary
+    Once a session flushes it stays on the primary, so a request reads its own writes
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('wrote') and not isinstance(clause, UpdateBase):
+            keys = replica_keys()
+
+            if keys and _replica_allowed():
+                if '_replica_key' not in g:
+                    g._replica_key = random.choice(keys)
+
+                return self._db.engines[g._replica_key]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_written(orm_execute_state):
+    # UPDATE/DELETE/INSERT statements run through session.execute() bypass the flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session):
+    if not session.info.pop('wrote', False) or not has_request_context() or not replica_keys():
+        return
+
+    # Keep this user's reads on the primary until the replicas have caught up
+    until = time.time() + current_app.config['DB_STICKY_SECONDS']
+    g._primary_until = until
+
+    identity = g.get('identity')
+    if identity is not None:
+        _sticky_users(current_app).put(identity.user_id, until)
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('wrote', None)
+
+def set_primary_cookie(response):
+    """after_request hook: tell the client how long its reads should stay on the primary"""
+    until = g.get('_primary_until')
+
+    if until is not None:
+        response.set_cookie(
+            PRIMARY_COOKIE, f'{until:.3f}',
+            max_age=int(current_app.config['DB_STICKY_SECONDS']) + 1,
+            httponly=True, samesite='Lax'
+        )
+
+    return response
+
+def begin_write(session=None):
+    """
+    Start the session's transaction with the write lock held (BEGIN IMMEDIATE on SQLite), so
+    rows a request reads to decide what to write can't change before it commits
+    A read-only transaction already open (e.g. from the token lookup) is ended first;
+    once the session has written, its transaction is left as it is
+    """
+    if session is None:
+        from models import db
+        session = db.session()
+
+    if session.in_transaction():
+        if session.new or session.dirty or session.deleted or session.info.get('wrote'):
+            return
+
+        session.rollback()
+
+    session.connection(execution_options={IMMEDIATE_OPTION: True})
+
+def write_transaction(f):
+    """Route decorator: run the handler in a transaction started by begin_write()"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        begin_write()
+        return f(*args, **kwargs)
+
+    return decorated
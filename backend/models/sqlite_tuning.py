@@ -0,0 +1,52 @@
+from sqlalchemy import event
+
+# Connection execution option asking for the transaction to start with the write lock held
+IMMEDIATE_OPTION = 'sqlite_begin_immediate'
+
+def _pragmas(config):
+    """PRAGMA statements applied to every new SQLite connection"""
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        'PRAGMA temp_store=MEMORY'
+    ]
+
+def tune_engine(engine, config):
+    """
+    Apply the SQLite concurrency profile to an engine: WAL so readers never block the writer,
+    busy_timeout so writers wait for the lock instead of failing with "database is locked",
+    and BEGIN IMMEDIATE for transactions started with the IMMEDIATE_OPTION execution option
+    """
+    pragmas = _pragmas(config)
+    begin_immediate = config['SQLITE_BEGIN_IMMEDIATE']
+
+    @event.listens_for(engine, 'connect')
+    def _configure(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (pysqlite's implicit transactions can't be IMMEDIATE)
+        dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _begin(connection):
+        # Units of work that read, check and then write opt in with begin_write(): holding the
+        # write lock from the start keeps their reads valid until commit
+        if begin_immediate and connection.get_execution_options().get(IMMEDIATE_OPTION):
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+        else:
+            connection.exec_driver_sql('BEGIN')
+
+def init_sqlite(app, engines):
+    """Tune every file-backed SQLite engine when SQLITE_TUNED is on"""
+    if not app.config['SQLITE_TUNED']:
+        return
+
+    for engine in engines:
+        if engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:'):
+            tune_engine(engine, app.config)
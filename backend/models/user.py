@@ -1,6 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, Text, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Text, JSON, DateTime, and_, or_, case, func, update
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from . import db
 
 class User(db.Model):
@@ -28,6 +29,10 @@ class User(db.Model):
     early_completion_count = Column(Integer, default=0)
     total_time_saved = Column(Integer, default=0)  # In hours
     
+    # Running totals behind calculate_avg_time (completed assignments still on record)
+    total_completion_days = Column(Integer, default=0)
+    timed_completions = Column(Integer, default=0)
+    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -54,7 +59,7 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.email}>'
     
-    def to_dict(self):
+    def to_dict(self, stats=None):
         """Convert user object to dictionary for API responses"""
         return {
             'id': self.id,
@@ -66,15 +71,19 @@ class User(db.Model):
             'year': self.year,
             'bio': self.bio,
             'preferences': self.preferences,
-            'stats': {
-                'completed': self.completed_assignments,
-                'earlyRate': self.calculate_early_rate(),
-                'avgTime': self.calculate_avg_time(),
-                'comparison': self.generate_comparison()
-            },
+            'stats': stats if stats is not None else self.stats_dict(),
             'createdAt': self.created_at.isoformat() if self.created_at else None
         }
     
+    def stats_dict(self):
+        """Headline stats shown on profiles and leaderboards"""
+        return {
+            'completed': self.completed_assignments,
+            'earlyRate': self.calculate_early_rate(),
+            'avgTime': self.calculate_avg_time(),
+            'comparison': self.generate_comparison()
+        }
+    
     def calculate_early_rate(self):
         """Calculate percentage of assignments completed early"""
         if self.completed_assignments == 0:
@@ -83,66 +92,125 @@ class User(db.Model):
     
     def calculate_avg_time(self):
         """Calculate average time to complete assignments (in days)"""
-        completed_assignments = [a for a in self.assignments if a.completed]
-        if not completed_assignments:
+        if not self.timed_completions:
             return 0
             
-        total_days = sum((a.completed_date - a.start_date).days for a in completed_assignments if a.completed_date)
-        return round(total_days / len(completed_assignments), 1)
+        return round((self.total_completion_days or 0) / self.timed_completions, 1)
+    
+    def update_counters(self, **values):
+        """
+        Set counter columns to SQL expressions in one atomic UPDATE, so concurrent requests
+        can't lose each other's changes; the new values are read back with RETURNING, or with
+        a SELECT in the same transaction on databases without it (MySQL)
+        """
+        if not values:
+            return
+        
+        columns = [getattr(User, name) for name in values]
+        statement = (
+            update(User)
+            .where(User.id == self.id)
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if db.engine.dialect.update_returning:
+            row = db.session.execute(statement.returning(*columns)).one()
+        else:
+            db.session.execute(statement)
+            row = db.session.query(*columns).filter(User.id == self.id).one()
+        
+        # Reflect the database values on this user without marking it dirty
+        for name, value in zip(values, row):
+            set_committed_value(self, name, value)
+    
+    def increment(self, **deltas):
+        """Add to counter columns atomically; zero deltas are skipped and counters never drop below zero"""
+        values = {}
+        
+        for name, delta in deltas.items():
+            if not delta:
+                continue
+            
+            total = func.coalesce(getattr(User, name), 0) + delta
+            values[name] = total if delta > 0 else case((total > 0, total), else_=0)
+        
+        self.update_counters(**values)
+    
+    def remove_completion_time(self, assignment):
+        """Take a completed assignment back out of the running completion totals"""
+        self.increment(**{name: -delta for name, delta in assignment.completion_time_counters().items()})
+    
+    def rebuild_completion_totals(self):
+        """Recompute the running completion totals from the assignments table"""
+        from .assignment import Assignment
+        
+        rows = db.session.query(Assignment.start_date, Assignment.completed_date).filter(
+            Assignment.user_id == self.id,
+            Assignment.completed == True
+        ).all()
+        
+        self.timed_completions = len(rows)
+        self.total_completion_days = sum(
+            (completed_date - start_date).days for start_date, completed_date in rows if completed_date
+        )
     
     def generate_comparison(self):
         """Generate a comparison string for the leaderboard"""
         if self.completed_assignments < 3:
             return "Just getting started"
         
-        if self.calculate_early_rate() > 80:
-            return f"Completes assignments {self.calculate_early_rate() - 50}% faster than average"
+        early_rate = self.calculate_early_rate()
+        
+        if early_rate > 80:
+            return f"Completes assignments {early_rate - 50}% faster than average"
         elif self.early_completion_count > 5:
             return f"Earned {self.quack_coins} QuackCoins from early completions"
         else:
             return f"Completed {self.completed_assignments} assignments"
     
-    @property
-    def friends(self):
-        """Get all confirmed friends"""
+    def friend_graph(self, include_pending=True):
+        """
+        Get confirmed friends and pending requests (sent and received) in one query
+        Returns a (friends, pending_sent, pending_received) tuple of user lists
+        """
         from .friendship import FriendshipStatus, Friendship
         
-        sent_friends = User.query.join(
-            Friendship, User.id == Friendship.receiver_id
+        rows = db.session.query(User, Friendship.sender_id, Friendship.status).join(
+            Friendship, or_(
+                and_(Friendship.sender_id == self.id, Friendship.receiver_id == User.id),
+                and_(Friendship.receiver_id == self.id, Friendship.sender_id == User.id)
+            )
         ).filter(
-            Friendship.sender_id == self.id,
-            Friendship.status == FriendshipStatus.ACCEPTED
+            Friendship.status.in_(
+                [FriendshipStatus.ACCEPTED, FriendshipStatus.PENDING] if include_pending
+                else [FriendshipStatus.ACCEPTED]
+            )
         ).all()
         
-        received_friends = User.query.join(
-            Friendship, User.id == Friendship.sender_id
-        ).filter(
-            Friendship.receiver_id == self.id,
-            Friendship.status == FriendshipStatus.ACCEPTED
-        ).all()
+        friends, pending_sent, pending_received = {}, {}, {}
         
-        return list(set(sent_friends + received_friends))
+        for user, sender_id, status in rows:
+            if status == FriendshipStatus.ACCEPTED:
+                friends[user.id] = user
+            elif sender_id == self.id:
+                pending_sent[user.id] = user
+            else:
+                pending_received[user.id] = user
+        
+        return list(friends.values()), list(pending_sent.values()), list(pending_received.values())
+    
+    @property
+    def friends(self):
+        """Get all confirmed friends"""
+        return self.friend_graph(include_pending=False)[0]
     
     @property
     def pending_sent_requests(self):
         """Get all pending friend requests sent by this user"""
-        from .friendship import FriendshipStatus
-        
-        return User.query.join(
-            Friendship, User.id == Friendship.receiver_id
-        ).filter(
-            Friendship.sender_id == self.id,
-            Friendship.status == FriendshipStatus.PENDING
-        ).all()
+        return self.friend_graph()[1]
     
     @property
     def pending_received_requests(self):
         """Get all pending friend requests received by this user"""
-        from .friendship import FriendshipStatus
-        
-        return User.query.join(
-            Friendship, User.id == Friendship.sender_id
-        ).filter(
-            Friendship.receiver_id == self.id,
-            Friendship.status == FriendshipStatus.PENDING
-        ).all()
\ No newline at end of file
+        return self.friend_graph()[2]
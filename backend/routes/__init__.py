@@ -1,20 +1,28 @@
 from flask import Blueprint
+from models.session import set_primary_cookie
 
 # Create blueprints for different route groups
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 assignments_bp = Blueprint('assignments', __name__, url_prefix='/api/assignments')
 users_bp = Blueprint('users', __name__, url_prefix='/api/users')
 friends_bp = Blueprint('friends', __name__, url_prefix='/api/friends')
+leaderboard_bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboard')
 
 # Import routes to register them with blueprints
 from .auth import *
 from .assignments import *
 from .users import *
 from .friendships import *
+from .leaderboard import *
+from . import http_cache
 
 def register_routes(app):
     """Register all route blueprints with the Flask app"""
+    http_cache.init_app(app)
+    app.after_request(set_primary_cookie)
+    
     app.register_blueprint(auth_bp)
     app.register_blueprint(assignments_bp)
     app.register_blueprint(users_bp)
-    app.register_blueprint(friends_bp)
\ No newline at end of file
+    app.register_blueprint(friends_bp)
+    app.register_blueprint(leaderboard_bp)
\ No newline at end of file
@@ -1,30 +1,190 @@
 from flask import request, jsonify, g
 from datetime import datetime
+import base64
+import json
+from collections import Counter
+from sqlalchemy import and_, or_
 from models import Assignment, db
+from models.session import write_transaction
 from routes.auth import token_required
+from services.leaderboard_service import refresh_member_stats
+from services.coins_service import settle_completions
+from services.ranking_service import queue_rank_update
+from services.serializers import ASSIGNMENT_COLUMNS, assignment_dict, json_response
+from services.sync_service import get_changes, CursorExpiredError
+from .http_cache import conditional
+from services.versions import assignments_version
 from . import assignments_bp
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def _encode_cursor(assignment):
+    """Encode the (deadline, id) keyset position of an assignment as an opaque cursor"""
+    raw = json.dumps([assignment.deadline.isoformat(), assignment.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Decode a cursor back into its (deadline, id) keyset position"""
+    deadline, assignment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(deadline), int(assignment_id)
+
 @assignments_bp.route('', methods=['GET'])
 @token_required
+@conditional(assignments_version)
 def get_assignments():
-    """Get all assignments for the current user"""
-    current_user = g.current_user
+    """
+    Get assignments for the current user, ordered by deadline
+    Supports ?completed=, ?course=, ?from=/?to= (deadline range), ?order=asc|desc
+    and keyset pagination through ?limit= (default DEFAULT_PAGE_SIZE) and the returned nextCursor;
+    ?limit=all returns every row in one response
+    """
+    current_user_id = g.identity.user_id
+    args = request.args
+    
+    # Select plain columns; rows are serialized without building ORM objects
+    query = db.session.query(*ASSIGNMENT_COLUMNS).filter(Assignment.user_id == current_user_id)
+    
+    try:
+        # Apply filters
+        if 'completed' in args:
+            query = query.filter(Assignment.completed == (args['completed'].lower() == 'true'))
+        
+        if 'course' in args:
+            query = query.filter(Assignment.course == args['course'])
+        
+        if args.get('from'):
+            query = query.filter(Assignment.deadline >= datetime.fromisoformat(args['from']))
+        
+        if args.get('to'):
+            query = query.filter(Assignment.deadline <= datetime.fromisoformat(args['to']))
+        
+        descending = args.get('order', 'asc').lower() == 'desc'
+        
+        # Continue after the last row of the previous page
+        if args.get('cursor'):
+            cursor_deadline, cursor_id = _decode_cursor(args['cursor'])
+            
+            if descending:
+                query = query.filter(or_(
+                    Assignment.deadline < cursor_deadline,
+                    and_(Assignment.deadline == cursor_deadline, Assignment.id < cursor_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    Assignment.deadline > cursor_deadline,
+                    and_(Assignment.deadline == cursor_deadline, Assignment.id > cursor_id)
+                ))
+        
+        limit = args.get('limit') or DEFAULT_PAGE_SIZE
+        limit = None if limit == 'all' else int(limit)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+    
+    if descending:
+        query = query.order_by(Assignment.deadline.desc(), Assignment.id.desc())
+    else:
+        query = query.order_by(Assignment.deadline, Assignment.id)
     
-    # Query assignments for the current user
-    assignments = Assignment.query.filter_by(user_id=current_user.id).all()
+    next_cursor = None
+    
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        # Fetch one extra row to know whether another page exists
+        assignments = query.limit(limit + 1).all()
+        
+        if len(assignments) > limit:
+            assignments = assignments[:limit]
+            next_cursor = _encode_cursor(assignments[-1])
+    else:
+        assignments = query.all()
     
     # Convert to dictionaries for JSON response
-    assignments_data = [assignment.to_dict() for assignment in assignments]
+    assignments_data = [assignment_dict(row) for row in assignments]
     
-    return jsonify({
-        'assignments': assignments_data
-    }), 200
+    return json_response({
+        'assignments': assignments_data,
+        'nextCursor': next_cursor
+    })
+
+MAX_CHANGES_PAGE_SIZE = 1000
+
+@assignments_bp.route('/changes', methods=['GET'])
+@token_required
+def get_assignment_changes():
+    """
+    Delta sync: assignments created, updated or deleted after ?since=<cursor>
+    Without ?since= returns every assignment; keep calling with the returned cursor while hasMore
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit', 500)), MAX_CHANGES_PAGE_SIZE))
+        upserted, deleted, cursor, has_more = get_changes(g.identity.user_id, request.args.get('since'), limit)
+    except CursorExpiredError:
+        return jsonify({'error': 'Sync cursor has expired, please resync without ?since=!'}), 410
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+    
+    return json_response({
+        'assignments': upserted,
+        'deleted': deleted,
+        'cursor': cursor,
+        'hasMore': has_more
+    })
+
+MAX_BATCH_SIZE = 500
+
+def _build_assignment(user_id, data):
+    """Create an Assignment from request data (raises ValueError on bad input)"""
+    # Parse dates from ISO format
+    start_date = datetime.fromisoformat(data.get('startDate')) if data.get('startDate') else datetime.utcnow()
+    deadline = datetime.fromisoformat(data.get('deadline'))
+    
+    return Assignment(
+        user_id=user_id,
+        title=data.get('title'),
+        description=data.get('description', ''),
+        course=data.get('course', ''),
+        start_date=start_date,
+        deadline=deadline,
+        estimated_hours=float(data.get('estimatedHours', 1.0)),
+        coins_reward=int(data.get('coinsReward', 10))
+    )
+
+def _apply_fields(assignment, data):
+    """Update the editable assignment fields present in request data (raises ValueError on bad input)"""
+    if 'title' in data:
+        assignment.title = data['title']
+    
+    if 'description' in data:
+        assignment.description = data['description']
+    
+    if 'course' in data:
+        assignment.course = data['course']
+    
+    if 'startDate' in data:
+        assignment.start_date = datetime.fromisoformat(data['startDate'])
+    
+    if 'deadline' in data:
+        assignment.deadline = datetime.fromisoformat(data['deadline'])
+    
+    if 'estimatedHours' in data:
+        assignment.estimated_hours = float(data['estimatedHours'])
+    
+    if 'coinsReward' in data:
+        assignment.coins_reward = int(data['coinsReward'])
+
+def _completion_time_change(assignment, before):
+    """Change to the user's running completion totals since `before` was taken; empty if none"""
+    change = Counter(assignment.completion_time_counters())
+    change.subtract(before)
+    return {name: delta for name, delta in change.items() if delta}
 
 @assignments_bp.route('', methods=['POST'])
 @token_required
 def create_assignment():
     """Create a new assignment"""
-    current_user = g.current_user
+    current_user_id = g.identity.user_id
     data = request.get_json()
     
     # Validate required fields
@@ -34,23 +194,11 @@ def create_assignment():
             return jsonify({'error': f'{field} is required!'}), 400
     
     try:
-        # Parse dates from ISO format
-        start_date = datetime.fromisoformat(data.get('startDate')) if data.get('startDate') else datetime.utcnow()
-        deadline = datetime.fromisoformat(data.get('deadline'))
-        
         # Create new assignment
-        new_assignment = Assignment(
-            user_id=current_user.id,
-            title=data.get('title'),
-            description=data.get('description', ''),
-            course=data.get('course', ''),
-            start_date=start_date,
-            deadline=deadline,
-            estimated_hours=float(data.get('estimatedHours', 1.0)),
-            coins_reward=int(data.get('coinsReward', 10))
-        )
+        new_assignment = _build_assignment(current_user_id, data)
         
         db.session.add(new_assignment)
+        queue_rank_update(current_user_id, course=new_assignment.course)
         db.session.commit()
         
         return jsonify({
@@ -68,10 +216,10 @@ def create_assignment():
 @token_required
 def get_assignment(assignment_id):
     """Get a specific assignment"""
-    current_user = g.current_user
+    current_user_id = g.identity.user_id
     
     # Query assignment by ID and user ID for security
-    assignment = Assignment.query.filter_by(id=assignment_id, user_id=current_user.id).first()
+    assignment = Assignment.query.filter_by(id=assignment_id, user_id=current_user_id).first()
     
     if not assignment:
         return jsonify({'error': 'Assignment not found!'}), 404
@@ -82,6 +230,7 @@ def get_assignment(assignment_id):
 
 @assignments_bp.route('/<int:assignment_id>', methods=['PUT'])
 @token_required
+@write_transaction
 def update_assignment(assignment_id):
     """Update an assignment"""
     current_user = g.current_user
@@ -94,41 +243,31 @@ def update_assignment(assignment_id):
         return jsonify({'error': 'Assignment not found!'}), 404
     
     try:
-        # Update fields if provided
-        if 'title' in data:
-            assignment.title = data['title']
+        # Its share of the running totals before the edit; only a change to it touches the user
+        before = assignment.completion_time_counters()
         
-        if 'description' in data:
-            assignment.description = data['description']
-        
-        if 'course' in data:
-            assignment.course = data['course']
-        
-        if 'startDate' in data:
-            assignment.start_date = datetime.fromisoformat(data['startDate'])
-        
-        if 'deadline' in data:
-            assignment.deadline = datetime.fromisoformat(data['deadline'])
-        
-        if 'estimatedHours' in data:
-            assignment.estimated_hours = float(data['estimatedHours'])
-        
-        if 'coinsReward' in data:
-            assignment.coins_reward = int(data['coinsReward'])
+        # Update fields if provided
+        _apply_fields(assignment, data)
         
         if 'completed' in data:
-            was_completed = assignment.completed
-            assignment.completed = data['completed']
-            
             # If marking as completed for the first time
-            if data['completed'] and not was_completed:
+            if data['completed'] and not assignment.completed:
                 earned_coins = assignment.complete()
+                db.session.commit()
                 
                 return jsonify({
                     'message': f'Assignment completed! Earned {earned_coins} QuackCoins!',
                     'assignment': assignment.to_dict(),
                     'earnedCoins': earned_coins
                 }), 200
+            
+            assignment.completed = bool(data['completed'])
+        
+        change = _completion_time_change(assignment, before)
+        
+        if change:
+            current_user.increment(**change)
+            refresh_member_stats(current_user)
         
         db.session.commit()
         
@@ -145,6 +284,7 @@ def update_assignment(assignment_id):
 
 @assignments_bp.route('/<int:assignment_id>', methods=['DELETE'])
 @token_required
+@write_transaction
 def delete_assignment(assignment_id):
     """Delete an assignment"""
     current_user = g.current_user
@@ -156,6 +296,10 @@ def delete_assignment(assignment_id):
         return jsonify({'error': 'Assignment not found!'}), 404
     
     try:
+        if assignment.completed:
+            current_user.remove_completion_time(assignment)
+            refresh_member_stats(current_user)
+        
         db.session.delete(assignment)
         db.session.commit()
         
@@ -169,6 +313,7 @@ def delete_assignment(assignment_id):
 
 @assignments_bp.route('/<int:assignment_id>/complete', methods=['POST'])
 @token_required
+@write_transaction
 def complete_assignment(assignment_id):
     """Mark an assignment as complete"""
     current_user = g.current_user
@@ -194,4 +339,168 @@ def complete_assignment(assignment_id):
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Failed to complete assignment: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Failed to complete assignment: {str(e)}'}), 500
+
+@assignments_bp.route('/batch', methods=['POST'])
+@token_required
+@write_transaction
+def batch_assignments():
+    """
+    Apply an ordered list of create/update/delete/complete operations in one transaction
+    Each operation looks like {"op": "update", "id": 3, "data": {...}}; if any
+    operation fails, nothing is saved and the per-operation results say why
+    """
+    current_user = g.current_user
+    data = request.get_json()
+    
+    operations = data.get('operations') if data else None
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list!'}), 400
+    
+    if len(operations) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'A batch can contain at most {MAX_BATCH_SIZE} operations!'}), 400
+    
+    # Load every referenced assignment in a single query
+    referenced_ids = {
+        op.get('id') for op in operations
+        if isinstance(op, dict) and op.get('op') in ('update', 'delete', 'complete')
+    }
+    assignments = {
+        assignment.id: assignment
+        for assignment in Assignment.query.filter(
+            Assignment.user_id == current_user.id,
+            Assignment.id.in_(referenced_ids)
+        ).all()
+    } if referenced_ids else {}
+    
+    results = []
+    created = []
+    # User counter deltas, applied in one UPDATE at the end
+    counters = Counter()
+    stats_changed = False
+    completed_any = False
+    earned_total = 0
+    failed = False
+    
+    try:
+        for index, op in enumerate(operations):
+            result = {'index': index, 'op': op.get('op') if isinstance(op, dict) else None}
+            results.append(result)
+            
+            try:
+                if not isinstance(op, dict):
+                    raise ValueError('operation must be an object')
+                
+                kind = op.get('op')
+                op_data = op.get('data') or {}
+                
+                if kind == 'create':
+                    for field in ('title', 'deadline'):
+                        if field not in op_data:
+                            raise ValueError(f'{field} is required!')
+                    
+                    new_assignment = _build_assignment(current_user.id, op_data)
+                    created.append(new_assignment)
+                    result['assignment'] = new_assignment
+                    result['status'] = 'created'
+                    continue
+                
+                if kind not in ('update', 'delete', 'complete'):
+                    raise ValueError(f'Unknown operation: {kind}')
+                
+                assignment = assignments.get(op.get('id'))
+                
+                if not assignment:
+                    raise LookupError('Assignment not found!')
+                
+                if kind == 'delete':
+                    if assignment.completed:
+                        counters.subtract(assignment.completion_time_counters())
+                        stats_changed = True
+                    
+                    db.session.delete(assignment)
+                    del assignments[assignment.id]
+                    result['id'] = assignment.id
+                    result['status'] = 'deleted'
+                    continue
+                
+                if kind == 'complete' or (kind == 'update' and op_data.get('completed') and not assignment.completed):
+                    if kind == 'complete' and assignment.completed:
+                        raise ValueError('Assignment is already completed!')
+                    
+                    _apply_fields(assignment, op_data)
+                    result['earnedCoins'] = assignment.complete(deferred=True)
+                    counters.update(assignment.completion_counters())
+                    earned_total += result['earnedCoins']
+                    completed_any = True
+                    result['assignment'] = assignment
+                    result['status'] = 'completed'
+                    stats_changed = True
+                    continue
+                
+                # Plain update, mirroring update_assignment
+                before = assignment.completion_time_counters()
+                _apply_fields(assignment, op_data)
+                
+                if 'completed' in op_data:
+                    assignment.completed = bool(op_data['completed'])
+                
+                change = _completion_time_change(assignment, before)
+                counters.update(change)
+                stats_changed = stats_changed or bool(change)
+                result['assignment'] = assignment
+                result['status'] = 'updated'
+                
+            except (ValueError, TypeError, LookupError) as e:
+                result['status'] = 'error'
+                result['error'] = str(e)
+                failed = True
+                break
+        
+        if failed:
+            db.session.rollback()
+            
+            return jsonify({
+                'error': 'Batch failed, no changes were saved!',
+                'results': _serialize_batch_results(results)
+            }), 400
+        
+        # Insert all new assignments together
+        db.session.add_all(created)
+        
+        for course in {assignment.course for assignment in created if assignment.course}:
+            queue_rank_update(current_user.id, course=course)
+        
+        # Coin and stat changes are applied once for the whole batch
+        current_user.increment(**counters)
+        
+        if completed_any:
+            settle_completions(current_user, earned_total)
+        elif stats_changed:
+            refresh_member_stats(current_user)
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'Applied {len(results)} operations!',
+            'results': _serialize_batch_results(results)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to apply batch: {str(e)}'}), 500
+
+def _serialize_batch_results(results):
+    """Convert batch results to dictionaries for the JSON response"""
+    serialized = []
+    
+    for result in results:
+        entry = dict(result)
+        
+        if 'assignment' in entry:
+            entry['assignment'] = entry['assignment'].to_dict()
+        
+        serialized.append(entry)
+    
+    return serialized
\ No newline at end of file
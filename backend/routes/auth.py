@@ -1,16 +1,38 @@
-from flask import request, jsonify, g, current_app
+from flask import request, jsonify, g, current_app, abort, make_response
 from flask_cors import cross_origin
 from functools import wraps
 import jwt
-from email_validator import validate_email, EmailNotValidError
+from werkzeug.local import LocalProxy
 
 from models import User, db
-from services.auth_service import generate_magic_link, verify_magic_link, get_token_identity
+from services.auth_service import (
+    generate_magic_link, verify_magic_link, decode_auth_token,
+    TokenIdentity, get_token_cache
+)
 from services.email_service import send_magic_link_email
+from services.email_validation import validate_address
+from .http_cache import conditional
+from services.versions import profile_version
 from . import auth_bp
 
+def _load_current_user():
+    """Load the authenticated user's row the first time a handler touches it"""
+    if '_current_user' not in g:
+        user = db.session.get(User, g.identity.user_id)
+        
+        if not user:
+            abort(make_response(jsonify({'error': 'User not found!'}), 401))
+        
+        g._current_user = user
+    
+    return g._current_user
+
 def token_required(f):
-    """Decorator to require JWT token for authentication"""
+    """
+    Decorator to require JWT token for authentication
+    Sets g.identity from the token cache and g.current_user as a lazy proxy,
+    so the user row is only loaded when a handler needs more than the id
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -23,17 +45,25 @@ def token_required(f):
             return jsonify({'error': 'Authentication token is missing!'}), 401
         
         try:
-            user_id = get_token_identity(token)
+            cache = get_token_cache()
+            identity = cache.get(token)
             
-            if not user_id:
-                return jsonify({'error': 'Invalid authentication token!'}), 401
+            if identity is None:
+                payload = decode_auth_token(token)
                 
-            current_user = User.query.get(user_id)
-            
-            if not current_user:
-                return jsonify({'error': 'User not found!'}), 401
+                if not payload or not payload.get('sub'):
+                    return jsonify({'error': 'Invalid authentication token!'}), 401
                 
-            g.current_user = current_user
+                row = db.session.query(User.id, User.email).filter(User.id == payload['sub']).first()
+                
+                if not row:
+                    return jsonify({'error': 'User not found!'}), 401
+                
+                identity = TokenIdentity(row.id, row.email, payload['exp'])
+                cache.put(token, identity)
+            
+            g.identity = identity
+            g.current_user = LocalProxy(_load_current_user)
         except Exception as e:
             return jsonify({'error': f'Error authenticating token: {str(e)}'}), 401
             
@@ -44,6 +74,9 @@ def token_required(f):
 @auth_bp.route('/login', methods=['POST'])
 def login():
     """Send magic link for authentication"""
+    # email_validator pulls in dnspython; import it on first login rather than at boot
+    from email_validator import EmailNotValidError
+    
     data = request.get_json()
     
     if not data or not data.get('email'):
@@ -53,7 +86,7 @@ def login():
     
     # Validate email
     try:
-        validate_email(email)
+        validate_address(email)
     except EmailNotValidError as e:
         return jsonify({'error': f'Invalid email: {str(e)}'}), 400
     
@@ -95,6 +128,7 @@ def verify():
 
 @auth_bp.route('/me', methods=['GET'])
 @token_required
+@conditional(profile_version)
 def get_current_user():
     """Get current authenticated user"""
     current_user = g.current_user
@@ -1,19 +1,27 @@
 from flask import request, jsonify, g
-from email_validator import validate_email, EmailNotValidError
+import csv
+import io
+from sqlalchemy import insert
 from models import User, Friendship, FriendshipStatus, db
+from models.session import begin_write, write_transaction
 from routes.auth import token_required
-from services.coins_service import calculate_user_ranking
+from services.coins_service import calculate_user_ranking, period_leaderboard, PERIODS
+from services.leaderboard_service import get_leaderboard_dicts, add_friendship, remove_friendship
+from services.friends_service import get_friend_graph_records
+from services.ranking_service import queue_rank_update
+from services.serializers import json_response
+from services.email_validation import validate_address
+from .http_cache import conditional
+from services.versions import friends_version
 from . import friends_bp
 
 @friends_bp.route('', methods=['GET'])
 @token_required
+@conditional(friends_version)
 def get_friends():
     """Get user's friends"""
-    current_user = g.current_user
-    
-    # Get confirmed friends
-    friends = current_user.friends
-    friends_data = [user.to_dict() for user in friends]
+    # Get confirmed friends and pending requests (sent and received) together, as column records
+    friends, pending_sent, pending_received = get_friend_graph_records(g.identity.user_id)
     
     # Apply ranking
     ranked_friends = calculate_user_ranking(friends)
@@ -25,23 +33,21 @@ def get_friends():
         user_dict["rank"] = entry["rank"]
         ranked_data.append(user_dict)
     
-    # Get pending friend requests (sent and received)
-    pending_sent = current_user.pending_sent_requests
     pending_sent_data = [user.to_dict() for user in pending_sent]
-    
-    pending_received = current_user.pending_received_requests
     pending_received_data = [user.to_dict() for user in pending_received]
     
-    return jsonify({
+    return json_response({
         'friends': ranked_data,
         'pendingSent': pending_sent_data,
         'pendingReceived': pending_received_data
-    }), 200
+    })
 
 @friends_bp.route('/invite', methods=['POST'])
 @token_required
 def invite_friend():
     """Send a friend invitation"""
+    from email_validator import EmailNotValidError
+    
     current_user = g.current_user
     data = request.get_json()
     
@@ -52,13 +58,16 @@ def invite_friend():
     
     # Validate email
     try:
-        validate_email(friend_email)
+        validate_address(friend_email)
     except EmailNotValidError as e:
         return jsonify({'error': f'Invalid email: {str(e)}'}), 400
     
     # Check if trying to add self
     if friend_email == current_user.email:
         return jsonify({'error': 'You cannot add yourself as a friend!'}), 400
+    
+    # The checks below decide what to insert; hold the write lock from here to commit
+    begin_write()
         
     # Find the friend user
     friend = User.query.filter_by(email=friend_email).first()
@@ -71,6 +80,7 @@ def invite_friend():
         )
         db.session.add(friend)
         db.session.flush()  # Get ID without committing
+        queue_rank_update(friend.id, 0)
     
     # Check if friendship already exists
     existing_friendship = Friendship.query.filter(
@@ -87,6 +97,7 @@ def invite_friend():
             else:
                 # This user already sent us a request, so accept it
                 existing_friendship.status = FriendshipStatus.ACCEPTED
+                add_friendship(current_user, friend)
                 db.session.commit()
                 
                 return jsonify({
@@ -114,8 +125,161 @@ def invite_friend():
         db.session.rollback()
         return jsonify({'error': f'Failed to send friend request: {str(e)}'}), 500
 
+MAX_BULK_INVITES = 200
+
+def _parse_invite_emails():
+    """
+    Collect emails from a bulk invite request
+    Accepts JSON {"emails": [...]} or {"csv": "..."}, a CSV upload in the
+    'file' form field, or a raw text/csv body; any cell containing '@' counts
+    """
+    data = request.get_json(silent=True)
+    
+    if isinstance(data, dict) and isinstance(data.get('emails'), list):
+        return [str(email).strip() for email in data['emails'] if str(email).strip()]
+    
+    if isinstance(data, dict) and data.get('csv'):
+        text = data['csv']
+    elif 'file' in request.files:
+        text = request.files['file'].read().decode('utf-8', errors='replace')
+    else:
+        text = request.get_data(as_text=True)
+    
+    return [
+        cell.strip()
+        for row in csv.reader(io.StringIO(text or ''))
+        for cell in row
+        if '@' in cell
+    ]
+
+@friends_bp.route('/invite/bulk', methods=['POST'])
+@token_required
+def invite_friends_bulk():
+    """Send friend invitations to a list or CSV of emails in one transaction"""
+    from email_validator import EmailNotValidError
+    
+    current_user = g.current_user
+    emails = _parse_invite_emails()
+    
+    if not emails:
+        return jsonify({'error': 'At least one email is required!'}), 400
+    
+    if len(emails) > MAX_BULK_INVITES:
+        return jsonify({'error': f'You can invite at most {MAX_BULK_INVITES} emails at once!'}), 400
+    
+    results = {}
+    candidates = []
+    
+    # Validate emails; deliverability is cached per domain
+    for email in emails:
+        if email in results:
+            continue
+        
+        try:
+            validate_address(email)
+        except EmailNotValidError as e:
+            results[email] = {'email': email, 'status': 'invalid', 'error': str(e)}
+            continue
+        
+        if email == current_user.email:
+            results[email] = {'email': email, 'status': 'self'}
+            continue
+        
+        results[email] = {'email': email}
+        candidates.append(email)
+    
+    # Validation is done; hold the write lock while existing users and friendships are checked
+    begin_write()
+    
+    try:
+        # Resolve existing users in one query, then insert the missing ones together
+        users = {user.email: user for user in User.query.filter(User.email.in_(candidates)).all()} if candidates else {}
+        
+        placeholders = [
+            {'email': email, 'name': email.split('@')[0]}  # Use email username as display name
+            for email in candidates if email not in users
+        ]
+        
+        if placeholders:
+            # One multi-row INSERT, then read the new IDs back by email
+            db.session.execute(insert(User.__table__).values(placeholders))
+            created = User.query.filter(User.email.in_([row['email'] for row in placeholders])).all()
+            users.update((user.email, user) for user in created)
+            
+            for user in created:
+                queue_rank_update(user.id, 0)
+        
+        friend_ids = [users[email].id for email in candidates]
+        
+        # Every existing friendship with these users, in either direction
+        existing = {}
+        status_priority = {FriendshipStatus.ACCEPTED: 0, FriendshipStatus.PENDING: 1, FriendshipStatus.REJECTED: 2}
+        
+        if friend_ids:
+            for friendship in Friendship.query.filter(
+                ((Friendship.sender_id == current_user.id) & (Friendship.receiver_id.in_(friend_ids))) |
+                ((Friendship.receiver_id == current_user.id) & (Friendship.sender_id.in_(friend_ids)))
+            ).all():
+                other_id = friendship.receiver_id if friendship.sender_id == current_user.id else friendship.sender_id
+                current = existing.get(other_id)
+                
+                if current is None or status_priority[friendship.status] < status_priority[current.status]:
+                    existing[other_id] = friendship
+        
+        new_friendships = []
+        accepted = []
+        
+        for email in candidates:
+            friend = users[email]
+            friendship = existing.get(friend.id)
+            result = results[email]
+            result['userId'] = friend.id
+            
+            if friendship and friendship.status == FriendshipStatus.ACCEPTED:
+                result['status'] = 'already_friends'
+            elif friendship and friendship.status == FriendshipStatus.PENDING:
+                if friendship.sender_id == current_user.id:
+                    result['status'] = 'already_requested'
+                else:
+                    # This user already sent us a request, so accept it
+                    friendship.status = FriendshipStatus.ACCEPTED
+                    accepted.append(friend)
+                    result['status'] = 'accepted'
+            else:
+                new_friendships.append({
+                    'sender_id': current_user.id,
+                    'receiver_id': friend.id,
+                    'status': FriendshipStatus.PENDING
+                })
+                result['status'] = 'invited'
+        
+        # No IDs needed back, so the requests go in as a single executemany
+        if new_friendships:
+            db.session.execute(insert(Friendship.__table__), new_friendships)
+        
+        for friend in accepted:
+            add_friendship(current_user, friend)
+        
+        db.session.commit()
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to send friend requests: {str(e)}'}), 500
+    
+    outcomes = list(results.values())
+    summary = {}
+    for outcome in outcomes:
+        summary[outcome['status']] = summary.get(outcome['status'], 0) + 1
+    
+    return jsonify({
+        'message': 'Friend requests processed!',
+        'results': outcomes,
+        'summary': summary
+    }), 200
+
 @friends_bp.route('/accept/<int:user_id>', methods=['POST'])
 @token_required
+@write_transaction
 def accept_friend_request(user_id):
     """Accept a friend request"""
     current_user = g.current_user
@@ -133,6 +297,7 @@ def accept_friend_request(user_id):
     try:
         # Accept the friendship
         friendship.status = FriendshipStatus.ACCEPTED
+        add_friendship(friendship.sender, current_user)
         db.session.commit()
         
         return jsonify({
@@ -146,6 +311,7 @@ def accept_friend_request(user_id):
 
 @friends_bp.route('/reject/<int:user_id>', methods=['POST'])
 @token_required
+@write_transaction
 def reject_friend_request(user_id):
     """Reject a friend request"""
     current_user = g.current_user
@@ -175,6 +341,7 @@ def reject_friend_request(user_id):
 
 @friends_bp.route('/<int:friend_id>', methods=['DELETE'])
 @token_required
+@write_transaction
 def remove_friend(friend_id):
     """Remove a friend"""
     current_user = g.current_user
@@ -196,6 +363,7 @@ def remove_friend(friend_id):
     
     try:
         db.session.delete(friendship)
+        remove_friendship(current_user.id, friend_id)
         db.session.commit()
         
         return jsonify({
@@ -209,23 +377,32 @@ def remove_friend(friend_id):
 @friends_bp.route('/leaderboard', methods=['GET'])
 @token_required
 def get_leaderboard():
-    """Get leaderboard of friends by QuackCoins"""
+    """Get leaderboard of friends by QuackCoins (all time, or ?period=week|month)"""
     current_user = g.current_user
+    period = request.args.get('period')
     
-    # Get friends and add the current user
-    all_users = current_user.friends + [current_user]
+    if period and period not in PERIODS:
+        return jsonify({'error': f'period must be one of {", ".join(PERIODS)}'}), 400
     
-    # Calculate ranking
-    ranked_users = calculate_user_ranking(all_users)
+    # Read the stored, pre-ranked board (computed without writing if it isn't stored yet), already formatted with ranking
+    ranked_data = get_leaderboard_dicts(current_user)
     
-    # Format response with ranking
-    ranked_data = []
-    for entry in ranked_users:
-        user_dict = entry["user"].to_dict()
-        user_dict["rank"] = entry["rank"]
-        user_dict["isCurrentUser"] = (entry["user"].id == current_user.id)
-        ranked_data.append(user_dict)
+    if period:
+        # Re-rank the same members by coins earned in the period
+        period_coins = {
+            row['userId']: row['quackCoins']
+            for row in period_leaderboard(period, user_ids=[user_dict['id'] for user_dict in ranked_data])
+        }
+        
+        for user_dict in ranked_data:
+            user_dict['quackCoins'] = period_coins.get(user_dict['id'], 0)
+        
+        ranked_data.sort(key=lambda user_dict: (-user_dict['quackCoins'], user_dict['id']))
+        
+        for index, user_dict in enumerate(ranked_data):
+            user_dict['rank'] = index + 1
     
-    return jsonify({
-        'leaderboard': ranked_data
-    }), 200
\ No newline at end of file
+    return json_response({
+        'leaderboard': ranked_data,
+        'period': period
+    })
\ No newline at end of file
@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+from functools import wraps
+from flask import request, g, current_app
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/csv', 'application/javascript'}
+
+def make_etag(*parts):
+    """Strong ETag value from the parts that determine a response"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def _match(etag):
+    """The ETag or compressed variant named in If-None-Match, or None"""
+    if_none_match = request.if_none_match
+
+    if not if_none_match:
+        return None
+
+    for candidate in (etag, f'{etag}-gzip', f'{etag}-br'):
+        if if_none_match.contains(candidate):
+            return candidate
+
+    return None
+
+def _set_validators(response, etag):
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+
+def conditional(version):
+    """
+    ETag a GET endpoint from version(user_id), answering a matching If-None-Match with 304
+    before the view runs. Apply below token_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user_id = g.identity.user_id
+            etag = make_etag(request.path, request.query_string.decode(), user_id, *version(user_id))
+
+            matched = _match(etag)
+
+            if matched:
+                response = current_app.response_class(status=304)
+                _set_validators(response, matched)
+                response.vary.add('Accept-Encoding')
+                return response
+
+            response = current_app.make_response(f(*args, **kwargs))
+
+            if response.status_code == 200:
+                _set_validators(response, etag)
+
+            return response
+
+        return decorated
+    return decorator
+
+def _choose_encoding():
+    """Preferred encoding the client accepts: brotli (when installed), then gzip"""
+    accepted = request.accept_encodings
+
+    if accepted.quality('br') > 0:
+        try:
+            import brotli  # noqa: F401
+            return 'br'
+        except ImportError:
+            pass
+
+    if accepted.quality('gzip') > 0:
+        return 'gzip'
+
+    return None
+
+def compress_response(response):
+    """Compress large text responses for clients that accept it"""
+    config = current_app.config
+
+    if (not config['COMPRESS_ENABLED']
+            or response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    encoding = _choose_encoding()
+
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        import brotli
+        compressed = brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    else:
+        compressed = gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'])
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+
+    # Each encoding is a different byte stream, so it gets its own strong ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+
+    return response
+
+def init_app(app):
+    """Register response compression on the app"""
+    app.after_request(compress_response)
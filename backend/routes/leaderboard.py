@@ -0,0 +1,99 @@
+from flask import request, jsonify, g, current_app
+from models import User, Assignment, db
+from routes.auth import token_required
+from services.ranking_service import get_rank_registry, sql_page, RANK_METHODS
+from services.coins_service import period_leaderboard, PERIODS
+from services.serializers import json_response
+from . import leaderboard_bp
+
+MAX_PAGE_SIZE = 100
+
+def _attach_profiles(entries):
+    """Add name and avatar to rank entries with a single query"""
+    user_ids = [entry['userId'] for entry in entries]
+    
+    profiles = {
+        row.id: row for row in db.session.query(User.id, User.name, User.avatar).filter(User.id.in_(user_ids)).all()
+    } if user_ids else {}
+    
+    for entry in entries:
+        profile = profiles.get(entry['userId'])
+        entry['name'] = profile.name if profile else None
+        entry['avatar'] = profile.avatar if profile else None
+        entry['isCurrentUser'] = (entry['userId'] == g.identity.user_id)
+    
+    return entries
+
+def _rank_args():
+    """Read the cohort and tie-handling method from the query string"""
+    method = request.args.get('method', 'competition')
+    
+    if method not in RANK_METHODS:
+        raise ValueError(f'method must be one of {", ".join(RANK_METHODS)}')
+    
+    return request.args.get('course') or None, method
+
+@leaderboard_bp.route('', methods=['GET'])
+@token_required
+def get_global_leaderboard():
+    """Get a page of the campus-wide (or ?course=) leaderboard by QuackCoins, optionally for ?period=week|month"""
+    try:
+        course, method = _rank_args()
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = max(1, min(int(request.args.get('limit', 10)), MAX_PAGE_SIZE))
+        period = request.args.get('period')
+        
+        if period and period not in PERIODS:
+            raise ValueError(f'period must be one of {", ".join(PERIODS)}')
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+    
+    if period:
+        # Time-windowed boards are summed from the daily coin buckets
+        cohort = db.session.query(Assignment.user_id).filter(Assignment.course == course) if course else None
+        entries = period_leaderboard(period, user_ids=cohort, offset=offset, limit=limit)
+        total = None
+    elif current_app.config['RANK_INDEX_ENABLED']:
+        index = get_rank_registry().get(course)
+        entries = index.page(offset, limit, method)
+        total = len(index)
+    else:
+        entries = sql_page(course, offset, limit, method)
+        total = None
+    
+    return json_response({
+        'leaderboard': _attach_profiles(entries),
+        'total': total,
+        'period': period
+    })
+
+@leaderboard_bp.route('/me', methods=['GET'])
+@token_required
+def get_my_rank():
+    """Get the current user's rank and the entries around them"""
+    user_id = g.identity.user_id
+    
+    try:
+        course, method = _rank_args()
+        radius = max(0, min(int(request.args.get('radius', 5)), MAX_PAGE_SIZE // 2))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {str(e)}'}), 400
+    
+    if current_app.config['RANK_INDEX_ENABLED']:
+        index = get_rank_registry().get(course)
+        rank = index.rank(user_id, method)
+        entries = index.around(user_id, radius, method)
+        total = len(index)
+    else:
+        entries = sql_page(course, method=method, around_user_id=user_id, radius=radius)
+        rank = next((entry['rank'] for entry in entries if entry['userId'] == user_id), None)
+        total = None
+    
+    if rank is None:
+        return jsonify({'error': 'You are not on this leaderboard yet!'}), 404
+    
+    return json_response({
+        'rank': rank,
+        'total': total,
+        'leaderboard': _attach_profiles(entries)
+    })
@@ -1,10 +1,16 @@
 from flask import request, jsonify, g
+from datetime import datetime
 from models import User, db
 from routes.auth import token_required
+from services.stats_service import get_assignment_stats
+from services.auth_service import invalidate_user_tokens
+from .http_cache import conditional
+from services.versions import profile_version
 from . import users_bp
 
 @users_bp.route('/me', methods=['GET'])
 @token_required
+@conditional(profile_version)
 def get_user_profile():
     """Get current user profile"""
     current_user = g.current_user
@@ -39,15 +45,12 @@ def update_user_profile():
         
         # Update preferences
         if 'preferences' in data:
-            preferences = data['preferences']
-            
-            if not current_user.preferences:
-                current_user.preferences = {}
-            
-            for key, value in preferences.items():
-                current_user.preferences[key] = value
+            # Assign a new dict: in-place edits to the JSON column aren't detected,
+            # so they were never saved and never bumped updated_at (which ETags rely on)
+            current_user.preferences = {**(current_user.preferences or {}), **data['preferences']}
         
         db.session.commit()
+        invalidate_user_tokens(current_user.id)
         
         return jsonify({
             'message': 'Profile updated successfully!',
@@ -61,26 +64,27 @@ def update_user_profile():
 @users_bp.route('/me/stats', methods=['GET'])
 @token_required
 def get_user_stats():
-    """Get user statistics"""
+    """Get user statistics, optionally filtered by ?from=, ?to= (deadline) and ?course="""
     current_user = g.current_user
     
-    # Calculate stats
-    total_assignments = len(current_user.assignments)
-    completed_assignments = sum(1 for a in current_user.assignments if a.completed)
+    try:
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+    
+    # Aggregate in the database instead of loading every assignment
+    totals = get_assignment_stats(current_user.id, start=start, end=end, course=request.args.get('course'))
+    
+    total_assignments = totals['total']
+    completed_assignments = totals['completed']
     completion_rate = (completed_assignments / total_assignments * 100) if total_assignments > 0 else 0
     
-    early_completions = sum(1 for a in current_user.assignments 
-                            if a.completed and a.completed_date < a.deadline)
+    early_completions = totals['early']
     early_rate = (early_completions / completed_assignments * 100) if completed_assignments > 0 else 0
     
     # Calculate average time saved (in days)
-    time_saved = 0
-    if completed_assignments > 0:
-        for a in current_user.assignments:
-            if a.completed and a.completed_date < a.deadline:
-                time_saved += (a.deadline - a.completed_date).days
-    
-    avg_time_saved = time_saved / completed_assignments if completed_assignments > 0 else 0
+    avg_time_saved = totals['days_saved'] / completed_assignments if completed_assignments > 0 else 0
     
     return jsonify({
         'stats': {
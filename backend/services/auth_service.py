@@ -1,9 +1,13 @@
 import time
+from collections import namedtuple
 from datetime import datetime, timedelta
 import jwt
-from flask import current_app
+from flask import current_app, has_app_context
 from itsdangerous import URLSafeTimedSerializer
 from models import User, db
+from services.cache import TTLCache
+from services import metrics
+from services.ranking_service import queue_rank_update
 
 def generate_magic_link(email):
     """Generate a magic link for the given email"""
@@ -15,6 +19,7 @@ def generate_magic_link(email):
     
     # Construct the magic link URL
     magic_link = f"{current_app.config['FRONTEND_URL']}/auth/verify?token={token}"
+    metrics.increment('magic_links')
     
     return token, magic_link
 
@@ -37,6 +42,10 @@ def verify_magic_link(token, expiration=86400):  # Default to 24 hours
             # Create new user if they don't exist
             user = User(email=email, name=email.split('@')[0])
             db.session.add(user)
+            db.session.flush()
+            
+            # On the campus board right away, not at the next index rebuild
+            queue_rank_update(user.id, 0)
         
         # Update last login time
         user.last_login = datetime.utcnow()
@@ -65,12 +74,69 @@ def generate_auth_token(user_id):
         algorithm='HS256'
     )
 
-def get_token_identity(token):
-    """Extract the user ID from the JWT token"""
+def decode_auth_token(token):
+    """Decode and verify a JWT token, returning its payload or None"""
     try:
-        payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
-        return payload['sub']
+        return jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         return None  # Token has expired
     except jwt.InvalidTokenError:
-        return None  # Invalid token
\ No newline at end of file
+        return None  # Invalid token
+
+def get_token_identity(token):
+    """Extract the user ID from the JWT token"""
+    payload = decode_auth_token(token)
+    return payload['sub'] if payload else None
+
+# Lightweight record of who a verified token belongs to
+TokenIdentity = namedtuple('TokenIdentity', ['user_id', 'email', 'expires_at'])
+
+class TokenCache(TTLCache):
+    """
+    Cache of verified tokens to their identity
+    Entries expire after the TTL or at the token's own exp, whichever is sooner.
+    """
+    
+    def __init__(self, max_size=10000, ttl=300):
+        super().__init__(max_size=max_size, ttl=ttl)
+        self._tokens_by_user = {}
+    
+    def put(self, token, identity):
+        """Cache a verified token's identity"""
+        super().put(token, identity, expires_at=identity.expires_at)
+    
+    def invalidate_user(self, user_id):
+        """Drop every cached token belonging to a user"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+    
+    def _on_store(self, token, identity):
+        self._tokens_by_user.setdefault(identity.user_id, set()).add(token)
+    
+    def _on_discard(self, token, identity):
+        tokens = self._tokens_by_user.get(identity.user_id)
+        
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[identity.user_id]
+
+def get_token_cache(app=None):
+    """Return the app's token cache, creating it on first use"""
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('token_cache')
+    
+    if cache is None:
+        cache = TokenCache(
+            max_size=app.config['AUTH_CACHE_SIZE'],
+            ttl=app.config['AUTH_CACHE_TTL']
+        )
+        app.extensions['token_cache'] = cache
+    
+    return cache
+
+def invalidate_user_tokens(user_id):
+    """Forget cached identities for a user after their record changes"""
+    if has_app_context():
+        get_token_cache().invalidate_user(user_id)
\ No newline at end of file
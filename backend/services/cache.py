@@ -0,0 +1,80 @@
+import time
+import threading
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Thread-safe bounded LRU cache whose entries also expire after a TTL
+    Caches are per process, so invalidation only reaches the current worker;
+    the TTL bounds how stale other workers can be.
+    """
+
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            value, valid_until = entry
+
+            if time.time() >= valid_until:
+                self._discard(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, expires_at=None):
+        """Cache a value until the TTL passes (or expires_at, if sooner)"""
+        valid_until = time.time() + self.ttl
+
+        if expires_at is not None:
+            valid_until = min(valid_until, expires_at)
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, valid_until)
+            self._on_store(key, value)
+
+            # Evict the least recently used entries
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def pop(self, key):
+        """Drop a key from the cache"""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def reset_lock(self):
+        """Replace the lock in a forked child, where a parent thread may have been holding it"""
+        self._lock = threading.Lock()
+
+    def _discard(self, key):
+        """Remove a key (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._on_discard(key, entry[0])
+
+    def _on_store(self, key, value):
+        """Hook for subclasses keeping secondary indexes (called with the lock held)"""
+
+    def _on_discard(self, key, value):
+        """Hook for subclasses keeping secondary indexes (called with the lock held)"""
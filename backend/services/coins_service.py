@@ -1,7 +1,58 @@
+import json
 import math
-from datetime import datetime
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import func, update
+from models import User, CoinTransaction, DailyCoinTotal, db
+from services.leaderboard_service import refresh_member_stats
+from services.auth_service import invalidate_user_tokens
+from services.ranking_service import queue_rank_update
+from services import metrics
 
-def calculate_quack_coins(assignment, completion_date):
+class RewardPolicy:
+    """
+    Early completion bonus tiers: (max share of time used, bonus as a share of the base reward)
+    Tiers are checked in order; completions past the last threshold get the fallback bonus
+    """
+
+    def __init__(self, tiers=((0.25, 0.5), (0.5, 0.3), (0.75, 0.15)), fallback=0.05):
+        self.tiers = tuple(sorted((float(threshold), float(bonus)) for threshold, bonus in tiers))
+        self.fallback = float(fallback)
+
+    def bonus_rate(self, time_used_percentage):
+        """Bonus share of the base reward for the given share of time used"""
+        for threshold, bonus in self.tiers:
+            if time_used_percentage <= threshold:
+                return bonus
+        return self.fallback
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a policy from {"tiers": [[threshold, bonus], ...], "fallback": bonus}"""
+        return cls(tiers=data['tiers'], fallback=data.get('fallback', 0.05))
+
+    def to_dict(self):
+        return {'tiers': [list(tier) for tier in self.tiers], 'fallback': self.fallback}
+
+# Maximum bonus (50%) in the first quarter of the time, 30% in the first half,
+# 15% in the third quarter and 5% in the last quarter
+DEFAULT_REWARD_POLICY = RewardPolicy()
+
+def get_reward_policy():
+    """The active reward policy (REWARD_POLICY config as JSON, or the default)"""
+    if has_app_context() and current_app.config.get('REWARD_POLICY'):
+        raw = current_app.config['REWARD_POLICY']
+        cached = current_app.extensions.get('reward_policy')
+
+        if cached is None or cached[0] != raw:
+            cached = (raw, RewardPolicy.from_dict(json.loads(raw) if isinstance(raw, str) else raw))
+            current_app.extensions['reward_policy'] = cached
+
+        return cached[1]
+
+    return DEFAULT_REWARD_POLICY
+
+def calculate_quack_coins(assignment, completion_date, policy=None):
     """
     Calculate the QuackCoins earned for completing an assignment
     This matches the algorithm in the frontend mockData.js but is implemented server-side
@@ -9,6 +60,8 @@ def calculate_quack_coins(assignment, completion_date):
     if not assignment:
         return 0
 
+    policy = policy or get_reward_policy()
+
     # Base reward for completing the assignment
     coins = assignment.coins_reward
 
@@ -26,20 +79,7 @@ def calculate_quack_coins(assignment, completion_date):
     time_used_percentage = 1 - (days_before_deadline / total_days)
 
     # Early completion bonus: more coins the earlier it's completed
-    early_bonus = 0
-
-    if time_used_percentage <= 0.25:
-        # Maximum bonus (50% of base reward) if completed in first quarter of time
-        early_bonus = assignment.coins_reward * 0.5
-    elif time_used_percentage <= 0.5:
-        # 30% bonus if completed in first half
-        early_bonus = assignment.coins_reward * 0.3
-    elif time_used_percentage <= 0.75:
-        # 15% bonus if completed in third quarter
-        early_bonus = assignment.coins_reward * 0.15
-    else:
-        # 5% bonus if completed in last quarter but before deadline
-        early_bonus = assignment.coins_reward * 0.05
+    early_bonus = assignment.coins_reward * policy.bonus_rate(time_used_percentage)
 
     # Round the earlyBonus to nearest integer
     early_bonus = round(early_bonus)
@@ -59,4 +99,112 @@ def calculate_user_ranking(users):
     sorted_users = sorted(users, key=lambda user: user.quack_coins, reverse=True)
 
     # Add ranking information
-    return [{"user": user, "rank": index + 1} for index, user in enumerate(sorted_users)]
\ No newline at end of file
+    return [{"user": user, "rank": index + 1} for index, user in enumerate(sorted_users)]
+
+def record_coin_award(user, amount, assignment=None, reason='assignment_completed', when=None):
+    """Append an award to the QuackCoin ledger (the balance is applied separately)"""
+    transaction = CoinTransaction(
+        user_id=user.id,
+        assignment_id=assignment.id if assignment else None,
+        amount=amount,
+        reason=reason,
+        created_at=when or datetime.utcnow()
+    )
+    db.session.add(transaction)
+    return transaction
+
+def _add_to_daily_total(user_id, day, amount):
+    """Atomically add coins to a user's bucket for the day, creating it if needed"""
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        # Dialect modules are imported here: postgresql alone costs tens of ms at startup
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        statement = insert(DailyCoinTotal).values(user_id=user_id, day=day, coins=amount)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id', 'day'],
+            set_={'coins': DailyCoinTotal.coins + statement.excluded.coins}
+        ))
+        return
+
+    result = db.session.execute(
+        update(DailyCoinTotal)
+        .where(DailyCoinTotal.user_id == user_id, DailyCoinTotal.day == day)
+        .values(coins=DailyCoinTotal.coins + amount)
+    )
+
+    if result.rowcount == 0:
+        db.session.add(DailyCoinTotal(user_id=user_id, day=day, coins=amount))
+
+def apply_coin_balance(user, amount, when=None):
+    """
+    Add coins to a user's balance with an atomic UPDATE ... SET quack_coins = quack_coins + n
+    so concurrent completions can't lose each other's updates; also bumps the daily bucket
+    """
+    if not amount:
+        return user.quack_coins
+
+    # Reflects the database value on the loaded user without marking it dirty
+    user.update_counters(quack_coins=func.coalesce(User.quack_coins, 0) + amount)
+    new_balance = user.quack_coins
+
+    _add_to_daily_total(user.id, (when or datetime.utcnow()).date(), amount)
+    metrics.increment_on_commit(db.session, 'coins_awarded', amount)
+
+    return new_balance
+
+def settle_completions(user, earned_coins, course=None):
+    """Apply the balance, leaderboard, token cache and rank index updates for completed work"""
+    apply_coin_balance(user, earned_coins)
+
+    # Keep stored friend leaderboards in step with the new stats
+    refresh_member_stats(user)
+
+    invalidate_user_tokens(user.id)
+    queue_rank_update(user.id, user.quack_coins, course)
+
+PERIODS = ('week', 'month')
+
+def period_start(period, today=None):
+    """First UTC day of the current week (Monday) or month"""
+    today = today or datetime.utcnow().date()
+
+    if period == 'week':
+        return today - timedelta(days=today.weekday())
+
+    if period == 'month':
+        return today.replace(day=1)
+
+    raise ValueError(f'period must be one of {", ".join(PERIODS)}')
+
+def period_leaderboard(period, user_ids=None, offset=0, limit=None):
+    """
+    Rank users by coins earned this week/month, summed from the daily buckets
+    user_ids may be a list or a subquery restricting the board (friends, a course)
+    """
+    coins = func.sum(DailyCoinTotal.coins)
+
+    query = db.session.query(
+        DailyCoinTotal.user_id,
+        coins.label('coins'),
+        func.rank().over(order_by=coins.desc()).label('rank')
+    ).filter(
+        DailyCoinTotal.day >= period_start(period)
+    )
+
+    if user_ids is not None:
+        query = query.filter(DailyCoinTotal.user_id.in_(user_ids))
+
+    query = query.group_by(DailyCoinTotal.user_id).order_by(coins.desc(), DailyCoinTotal.user_id)
+
+    if offset:
+        query = query.offset(offset)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [{'userId': user_id, 'quackCoins': total, 'rank': rank} for user_id, total, rank in query.all()]
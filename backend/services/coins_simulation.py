@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from models import Assignment, db
+from services.coins_service import get_reward_policy
+
+MICROSECONDS_PER_DAY = 86400 * 10**6
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+def _to_microseconds(values):
+    """Convert datetimes (or a datetime64 array) to int64 microseconds since the epoch"""
+    import numpy as np
+
+    if isinstance(values, np.ndarray):
+        return values.astype('datetime64[us]').astype(np.int64)
+
+    # Much faster than letting numpy parse each datetime object
+    return np.fromiter(((value - EPOCH) // ONE_MICROSECOND for value in values), dtype=np.int64, count=len(values))
+
+def calculate_quack_coins_batch(start_dates, deadlines, completion_dates, rewards, policy=None):
+    """
+    Vectorized calculate_quack_coins over arrays of timestamps and base rewards
+    Returns an int64 array matching the scalar function element for element
+    """
+    import numpy as np
+
+    policy = policy or get_reward_policy()
+
+    start_dates = _to_microseconds(start_dates)
+    deadlines = _to_microseconds(deadlines)
+    completion_dates = _to_microseconds(completion_dates)
+    rewards = np.asarray(rewards, dtype=np.float64)
+
+    # Whole days, floored like timedelta.days
+    total_days = np.floor_divide(deadlines - start_dates, MICROSECONDS_PER_DAY)
+    total_days = np.where(total_days <= 0, 1, total_days)
+
+    days_before_deadline = np.floor_divide(deadlines - completion_dates, MICROSECONDS_PER_DAY)
+    days_before_deadline = np.maximum(days_before_deadline, 0)
+
+    time_used_percentage = 1 - (days_before_deadline / total_days)
+
+    # First tier whose threshold is >= the time used, else the fallback
+    thresholds = np.array([threshold for threshold, _ in policy.tiers], dtype=np.float64)
+    rates = np.array([bonus for _, bonus in policy.tiers] + [policy.fallback], dtype=np.float64)
+    bonus_rate = rates[np.searchsorted(thresholds, time_used_percentage, side='left')]
+
+    # np.round rounds halves to even, like the builtin round()
+    early_bonus = np.round(rewards * bonus_rate)
+
+    return (rewards + early_bonus).astype(np.int64)
+
+def iter_completed_chunks(chunk_size=10000):
+    """Stream completed assignments as column tuples in id order, one chunk at a time"""
+    last_id = 0
+
+    while True:
+        rows = db.session.query(
+            Assignment.id,
+            Assignment.user_id,
+            Assignment.start_date,
+            Assignment.deadline,
+            Assignment.completed_date,
+            Assignment.coins_reward
+        ).filter(
+            Assignment.completed == True,
+            Assignment.completed_date != None,
+            Assignment.id > last_id
+        ).order_by(Assignment.id).limit(chunk_size).all()
+
+        if not rows:
+            return
+
+        last_id = rows[-1][0]
+        yield rows
+
+def simulate_reward_policy(candidate, baseline=None, chunk_size=10000):
+    """
+    Re-score every historical completion under a candidate policy
+    Returns per-user coin totals under the baseline and candidate and the delta
+    """
+    import numpy as np
+
+    baseline = baseline or get_reward_policy()
+    totals = {}
+    completions = 0
+
+    for rows in iter_completed_chunks(chunk_size):
+        _, user_ids, start_dates, deadlines, completion_dates, rewards = zip(*rows)
+        rewards = np.array([10 if reward is None else reward for reward in rewards], dtype=np.float64)
+
+        # Convert once, both policies score the same arrays
+        start_dates, deadlines, completion_dates = (
+            _to_microseconds(values).astype('datetime64[us]')
+            for values in (start_dates, deadlines, completion_dates)
+        )
+
+        current = calculate_quack_coins_batch(start_dates, deadlines, completion_dates, rewards, baseline)
+        proposed = calculate_quack_coins_batch(start_dates, deadlines, completion_dates, rewards, candidate)
+
+        # Sum per user within the chunk before merging into the running totals
+        user_ids = np.asarray(user_ids)
+        unique_ids, inverse = np.unique(user_ids, return_inverse=True)
+        current_sums = np.bincount(inverse, weights=current, minlength=len(unique_ids))
+        proposed_sums = np.bincount(inverse, weights=proposed, minlength=len(unique_ids))
+
+        for user_id, current_sum, proposed_sum in zip(unique_ids.tolist(), current_sums, proposed_sums):
+            entry = totals.setdefault(user_id, [0, 0])
+            entry[0] += int(current_sum)
+            entry[1] += int(proposed_sum)
+
+        completions += len(rows)
+
+    users = [
+        {'userId': user_id, 'currentCoins': current, 'candidateCoins': proposed, 'delta': proposed - current}
+        for user_id, (current, proposed) in sorted(totals.items())
+    ]
+
+    return {
+        'completions': completions,
+        'baseline': baseline.to_dict(),
+        'candidate': candidate.to_dict(),
+        'totalDelta': sum(user['delta'] for user in users),
+        'users': users
+    }
@@ -1,14 +1,48 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import atexit
+import os
+import queue
+import threading
+import time
+from html import escape
 from flask import current_app
+from services import metrics
 
-def send_email(to_email, subject, html_content, text_content=None):
-    """Send an email using the configured mail server"""
+def _mail_settings(config):
+    """Snapshot the SMTP settings so they can be used outside the app context"""
+    return {
+        'server': config['MAIL_SERVER'],
+        'port': config['MAIL_PORT'],
+        'use_tls': config['MAIL_USE_TLS'],
+        'username': config['MAIL_USERNAME'],
+        'password': config['MAIL_PASSWORD'],
+        'sender': config['MAIL_DEFAULT_SENDER'],
+        'timeout': config['MAIL_TIMEOUT']
+    }
+
+def _open_connection(settings):
+    """Open, secure and authenticate an SMTP connection"""
+    import smtplib
+    
+    server = smtplib.SMTP(settings['server'], settings['port'], timeout=settings['timeout'])
+    
+    if settings['use_tls']:
+        server.starttls()
+    
+    # Login if credentials provided
+    if settings['username'] and settings['password']:
+        server.login(settings['username'], settings['password'])
+    
+    return server
+
+def build_message(sender, to_email, subject, html_content, text_content=None):
+    """Build a multipart email message"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
     # Create message container
     msg = MIMEMultipart('alternative')
     msg['Subject'] = subject
-    msg['From'] = current_app.config['MAIL_DEFAULT_SENDER']
+    msg['From'] = sender
     msg['To'] = to_email
     
     # Add plain text version if provided
@@ -18,38 +52,247 @@ def send_email(to_email, subject, html_content, text_content=None):
     # Add HTML version
     msg.attach(MIMEText(html_content, 'html'))
     
+    return msg
+
+def send_email(to_email, subject, html_content, text_content=None):
+    """Send an email using the configured mail server"""
+    settings = _mail_settings(current_app.config)
+    msg = build_message(settings['sender'], to_email, subject, html_content, text_content)
+    
     try:
         # Connect to mail server
-        server = smtplib.SMTP(
-            current_app.config['MAIL_SERVER'], 
-            current_app.config['MAIL_PORT']
-        )
-        
-        if current_app.config['MAIL_USE_TLS']:
-            server.starttls()
-        
-        # Login if credentials provided
-        if current_app.config['MAIL_USERNAME'] and current_app.config['MAIL_PASSWORD']:
-            server.login(
-                current_app.config['MAIL_USERNAME'], 
-                current_app.config['MAIL_PASSWORD']
-            )
+        server = _open_connection(settings)
         
         # Send email
-        server.sendmail(
-            current_app.config['MAIL_DEFAULT_SENDER'],
-            to_email,
-            msg.as_string()
-        )
+        server.sendmail(settings['sender'], to_email, msg.as_string())
         server.quit()
         
         return True
     except Exception as e:
         print(f"Error sending email: {e}")
+        metrics.increment('email_failures', reason='error')
         return False
 
-def send_magic_link_email(email, magic_link):
-    """Send a magic link email for authentication"""
+class EmailDeliveryWorker:
+    """
+    Background email sender with a bounded queue, one persistent SMTP
+    connection and retry with exponential backoff
+    """
+    
+    def __init__(self, settings, queue_size=1000, max_retries=3, retry_backoff=1.0, idle_timeout=60):
+        self.settings = settings
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        
+        self.owner_pid = os.getpid()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._connection = None
+        self._last_used = 0
+        self._lock = threading.Lock()
+        
+        # Delivery statistics
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+    
+    @property
+    def queue_depth(self):
+        """Number of messages waiting to be sent"""
+        return self._queue.qsize()
+    
+    def start(self):
+        """Start the worker thread if it isn't running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            
+            self._connection = None
+            self._thread = threading.Thread(target=self._run, name='email-delivery', daemon=True)
+            self._thread.start()
+    
+    def enqueue(self, to_email, message):
+        """Queue a message for delivery, returning False if the queue is full"""
+        self.start()
+        
+        try:
+            self._queue.put_nowait((to_email, message, time.monotonic()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            metrics.increment('email_failures', reason='dropped')
+            print(f"Email queue full, dropping message to {to_email}")
+            return False
+    
+    def flush(self, timeout=None):
+        """Wait until every queued message has been handled"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        
+        return True
+    
+    def stats(self):
+        """Queue depth and send latency figures (seconds)"""
+        return {
+            'queueDepth': self.queue_depth,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'dropped': self.dropped,
+            'avgLatency': self.total_latency / self.sent if self.sent else 0.0,
+            'maxLatency': self.max_latency,
+            'lastLatency': self.last_latency
+        }
+    
+    def _run(self):
+        """Worker loop: send queued messages, closing the connection when idle"""
+        while True:
+            try:
+                to_email, message, queued_at = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._close()
+                continue
+            
+            try:
+                self._deliver(to_email, message, queued_at)
+            finally:
+                self._queue.task_done()
+    
+    def _deliver(self, to_email, message, queued_at):
+        """Send one message, retrying with backoff on failure"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                connection = self._get_connection()
+                connection.sendmail(self.settings['sender'], to_email, message)
+                self._last_used = time.monotonic()
+                
+                latency = time.monotonic() - queued_at
+                self.sent += 1
+                self.total_latency += latency
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                return True
+            except Exception as e:
+                # Drop the connection, it may be the reason for the failure
+                self._close()
+                
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    metrics.increment('email_failures', reason='error')
+                    print(f"Error sending email: {e}")
+                    return False
+                
+                self.retries += 1
+                time.sleep(self.retry_backoff * (2 ** attempt))
+    
+    def _get_connection(self):
+        """Return the open SMTP connection, reconnecting if it went stale"""
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            try:
+                self._connection.noop()
+            except Exception:
+                self._connection = None
+        
+        if self._connection is None:
+            self._connection = _open_connection(self.settings)
+            self._last_used = time.monotonic()
+        
+        return self._connection
+    
+    def _close(self):
+        """Close the SMTP connection if one is open"""
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                pass
+            self._connection = None
+
+_worker_lock = threading.Lock()
+
+def _reset_worker_lock():
+    # A fork can land while another thread holds the lock; the child gets a fresh one
+    global _worker_lock
+    _worker_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_worker_lock)
+
+def get_delivery_worker(app=None):
+    """
+    Return the app's email delivery worker, creating it on first use
+    A forked process gets its own worker: the parent's queue and locks may have been mid-operation
+    """
+    app = app or current_app._get_current_object()
+    worker = app.extensions.get('email_delivery')
+    
+    if worker is not None and worker.owner_pid == os.getpid():
+        return worker
+    
+    with _worker_lock:
+        worker = app.extensions.get('email_delivery')
+        
+        if worker is None or worker.owner_pid != os.getpid():
+            worker = EmailDeliveryWorker(
+                _mail_settings(app.config),
+                queue_size=app.config['MAIL_QUEUE_SIZE'],
+                max_retries=app.config['MAIL_MAX_RETRIES'],
+                retry_backoff=app.config['MAIL_RETRY_BACKOFF'],
+                idle_timeout=app.config['MAIL_CONNECTION_IDLE_TIMEOUT']
+            )
+            app.extensions['email_delivery'] = worker
+            
+            # Give queued mail a chance to go out on shutdown
+            atexit.register(worker.flush, timeout=5)
+    
+    return worker
+
+def queue_email(to_email, subject, html_content, text_content=None):
+    """Queue an email for background delivery (sends inline when MAIL_ASYNC is off)"""
+    if not current_app.config['MAIL_ASYNC']:
+        return send_email(to_email, subject, html_content, text_content)
+    
+    worker = get_delivery_worker()
+    msg = build_message(worker.settings['sender'], to_email, subject, html_content, text_content)
+    
+    return worker.enqueue(to_email, msg.as_string())
+
+async def send_email_async(to_email, subject, html_content, text_content=None, settings=None, timeout=None):
+    """
+    Send an email without blocking the event loop (used by the ASGI app)
+    Takes the settings snapshot explicitly since there's no app context on the event loop
+    """
+    import aiosmtplib
+    
+    msg = build_message(settings['sender'], to_email, subject, html_content, text_content)
+    
+    try:
+        await aiosmtplib.send(
+            msg,
+            hostname=settings['server'],
+            port=settings['port'],
+            start_tls=settings['use_tls'],
+            username=settings['username'] if settings['password'] else None,
+            password=settings['password'] or None,
+            timeout=timeout
+        )
+        return True
+    except Exception as e:
+        print(f"Error sending email: {e}")
+        metrics.increment('email_failures', reason='error')
+        return False
+
+def magic_link_message(magic_link):
+    """Subject, HTML and plain-text bodies of the magic link email"""
     subject = "Your Early Bird Login Link"
     
     html_content = f"""
@@ -122,4 +365,53 @@ def send_magic_link_email(email, magic_link):
     Early Bird - Start assignments early, earn rewards!
     """
     
-    return send_email(email, subject, html_content, text_content)
\ No newline at end of file
+    return subject, html_content, text_content
+
+def send_magic_link_email(email, magic_link):
+    """Send a magic link email for authentication"""
+    return queue_email(email, *magic_link_message(magic_link))
+
+def _reminder_line(item):
+    """One line of a reminder digest"""
+    label = f"{item['title']} ({item['course']})" if item.get('course') else item['title']
+    due = item['deadline'].strftime('%a %b %d, %H:%M UTC')
+    
+    if item['kind'] == 'bonus':
+        drops_at = item['dropsAt'].strftime('%a %b %d, %H:%M UTC')
+        return (f"{label}: finish before {drops_at} to keep your {round(item['bonus'] * 100)}% "
+                f"early bonus (it drops to {round(item['nextBonus'] * 100)}%). Due {due}.")
+    
+    days = item['daysLeft']
+    return f"{label}: due in {days} day{'s' if days != 1 else ''} ({due})."
+
+def send_reminder_email(email, name, items):
+    """Send one digest email covering every reminder due for a user"""
+    subject = "Early Bird: 1 assignment reminder" if len(items) == 1 else f"Early Bird: {len(items)} assignment reminders"
+    lines = [_reminder_line(item) for item in items]
+    greeting = f"Hello {name}," if name else "Hello,"
+    
+    list_items = ''.join(f"<li>{escape(line)}</li>" for line in lines)
+    
+    html_content = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #eee; border-radius: 5px;">
+            <p>{escape(greeting)}</p>
+            <p>Here's what's coming up:</p>
+            <ul>{list_items}</ul>
+            <p style="margin-top: 30px; font-size: 12px; color: #666;">
+                Early Bird - Start assignments early, earn rewards!<br>
+                You can turn these emails off in your profile settings.
+            </p>
+        </div>
+    </body>
+    </html>
+    """
+    
+    text_content = "\n".join([greeting, "", "Here's what's coming up:", ""] + [f"- {line}" for line in lines] + [
+        "",
+        "Early Bird - Start assignments early, earn rewards!",
+        "You can turn these emails off in your profile settings."
+    ])
+    
+    return queue_email(email, subject, html_content, text_content)
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app
+from services.cache import TTLCache
+
+def lookup_deliverability(resolver, domain, timeout):
+    """
+    email_validator's deliverability rules: the domain must exist and have an MX record (or,
+    failing that, an A/AAAA record) that isn't a null MX
+    Returns '' when deliverable, an error message when not, or None when DNS didn't answer
+    """
+    import dns.exception
+    import dns.resolver
+
+    try:
+        try:
+            answer = resolver.resolve(domain, 'MX', lifetime=timeout)
+            # A single "MX 0 ." record means the domain explicitly accepts no mail (RFC 7505)
+            if all(str(record.exchange) == '.' for record in answer):
+                return f'The domain name {domain} does not accept email.'
+            return ''
+        except dns.resolver.NoAnswer:
+            pass
+
+        for record_type in ('A', 'AAAA'):
+            try:
+                resolver.resolve(domain, record_type, lifetime=timeout)
+                return ''
+            except dns.resolver.NoAnswer:
+                continue
+
+        return f'The domain name {domain} does not accept email.'
+    except dns.resolver.NXDOMAIN:
+        return f'The domain name {domain} does not exist.'
+    except (dns.exception.Timeout, dns.resolver.NoNameservers):
+        return None
+
+class StubResolver:
+    """
+    Resolver answering from a dict instead of DNS, for tests and offline development
+    records maps domain -> list of MX hosts: [] means the domain has only an A record,
+    ['.'] is a null MX and domains not in the dict don't exist
+    """
+
+    def __init__(self, records, delay=0.0):
+        self.records = {domain.lower(): hosts for domain, hosts in records.items()}
+        self.delay = delay
+        self.queries = 0
+
+    def resolve(self, domain, record_type='A', lifetime=None):
+        import dns.exception
+        import dns.resolver
+
+        self.queries += 1
+
+        if self.delay:
+            if lifetime is not None and self.delay > lifetime:
+                time.sleep(lifetime)
+                raise dns.exception.Timeout()
+            time.sleep(self.delay)
+
+        hosts = self.records.get(domain.lower())
+
+        if hosts is None:
+            raise dns.resolver.NXDOMAIN()
+
+        if record_type == 'MX' and hosts:
+            return [type('MX', (), {'exchange': host})() for host in hosts]
+
+        if record_type == 'A' and not hosts:
+            return ['127.0.0.1']
+
+        raise dns.resolver.NoAnswer()
+
+class DeliverabilityChecker:
+    """
+    Per-domain deliverability results cached with a TTL, looked up on a small thread pool
+    Requests wait at most `budget` seconds for a lookup; if DNS is slower the address is
+    accepted and the lookup finishes in the background to fill the cache for the next request
+    """
+
+    def __init__(self, resolver=None, timeout=3.0, budget=0.5, ttl=21600, negative_ttl=900,
+                 unknown_ttl=60, max_size=10000, workers=4):
+        self.resolver = resolver
+        self.timeout = timeout
+        self.budget = budget
+        self.negative_ttl = negative_ttl
+        self.unknown_ttl = unknown_ttl
+        self.workers = workers
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.prewarm_pid = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        _checkers.add(self)
+
+    def _get_resolver(self):
+        if self.resolver is None:
+            import dns.resolver
+            self.resolver = dns.resolver.Resolver()
+
+        return self.resolver
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='email-dns')
+
+        return self._executor
+
+    def _after_fork(self):
+        # Threads don't survive a fork and a lock may have been held by one of them;
+        # the child keeps the cached results but gets fresh locks and its own pool
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._executor = None
+        self.cache.reset_lock()
+
+    def _lookup(self, domain):
+        result = lookup_deliverability(self._get_resolver(), domain, self.timeout)
+
+        if result == '':
+            self.cache.put(domain, (None,))
+        elif result is None:
+            # Retry soon, but don't hit a struggling resolver on every request
+            self.cache.put(domain, (None,), expires_at=time.time() + self.unknown_ttl)
+        else:
+            self.cache.put(domain, (result,), expires_at=time.time() + self.negative_ttl)
+
+        return result or None
+
+    def _submit(self, domain):
+        """Start (or join) the lookup for a domain"""
+        with self._lock:
+            executor = self._get_executor()
+            future = self._pending.get(domain)
+
+            if future is None:
+                future = executor.submit(self._lookup, domain)
+                self._pending[domain] = future
+                future.add_done_callback(lambda _: self._pending.pop(domain, None))
+
+            return future
+
+    def cached(self, domain):
+        """(problem,) from the cache, or None when the domain hasn't been checked recently"""
+        return self.cache.get(domain.lower())
+
+    def check(self, domain):
+        """Error message if the domain can't receive mail, else None; blocks for at most `budget`"""
+        domain = domain.lower()
+        entry = self.cache.get(domain)
+
+        if entry is not None:
+            return entry[0]
+
+        try:
+            return self._submit(domain).result(timeout=self.budget)
+        except FutureTimeoutError:
+            return None
+
+    async def check_async(self, domain):
+        """Same as check(), awaiting the lookup instead of blocking the event loop"""
+        domain = domain.lower()
+        entry = self.cache.get(domain)
+
+        if entry is not None:
+            return entry[0]
+
+        try:
+            # shield: giving up on the wait must not cancel the lookup that fills the cache
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._submit(domain))), self.budget)
+        except asyncio.TimeoutError:
+            return None
+
+    def prewarm(self, domains):
+        """Look up domains in the background so the first requests for them hit the cache"""
+        for domain in domains:
+            if domain and self.cached(domain) is None:
+                self._submit(domain.lower())
+
+_checkers = weakref.WeakSet()
+
+def _reset_checkers_after_fork():
+    for checker in list(_checkers):
+        checker._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_checkers_after_fork)
+
+def _configured_resolver(config):
+    """StubResolver from EMAIL_DNS_STUB (JSON), or None for the system resolver"""
+    stub = config['EMAIL_DNS_STUB']
+
+    if not stub:
+        return None
+
+    if os.path.isfile(stub):
+        with open(stub) as f:
+            return StubResolver(json.load(f))
+
+    return StubResolver(json.loads(stub))
+
+def get_deliverability_checker(app=None):
+    """Return the app's deliverability checker, creating it on first use"""
+    app = app or current_app._get_current_object()
+    checker = app.extensions.get('email_deliverability')
+
+    if checker is None:
+        config = app.config
+        checker = DeliverabilityChecker(
+            resolver=_configured_resolver(config),
+            timeout=config['EMAIL_DNS_TIMEOUT'],
+            budget=config['EMAIL_DNS_BUDGET'],
+            ttl=config['EMAIL_DNS_TTL'],
+            negative_ttl=config['EMAIL_DNS_NEGATIVE_TTL'],
+            unknown_ttl=config['EMAIL_DNS_UNKNOWN_TTL'],
+            max_size=config['EMAIL_DNS_CACHE_SIZE'],
+            workers=config['EMAIL_DNS_WORKERS']
+        )
+        app.extensions['email_deliverability'] = checker
+
+    return checker
+
+def validate_address(email):
+    """
+    validate_email() with the syntax check inline and the deliverability check served from
+    the per-domain cache; raises EmailNotValidError like email_validator does
+    """
+    from email_validator import validate_email, EmailUndeliverableError
+
+    validated = validate_email(email, check_deliverability=False)
+
+    if current_app.config['EMAIL_CHECK_DELIVERABILITY']:
+        problem = get_deliverability_checker().check(validated.ascii_domain)
+
+        if problem:
+            raise EmailUndeliverableError(problem)
+
+    return validated
+
+def _popular_domains(limit):
+    """The most common email domains among existing users (split in Python: SQL has no portable position())"""
+    from models import User, db
+
+    domains = Counter(
+        email.rpartition('@')[2].lower() for email, in db.session.query(User.email).yield_per(1000) if email
+    )
+
+    return [domain for domain, _ in domains.most_common(limit)]
+
+def _start_prewarm():
+    """
+    Prewarm once per process, on its first request: with a preloaded app the master process
+    forks the workers, and lookups made there would only fill the master's cache
+    """
+    app = current_app._get_current_object()
+    checker = get_deliverability_checker(app)
+
+    if checker.prewarm_pid == os.getpid():
+        return
+
+    with checker._lock:
+        if checker.prewarm_pid == os.getpid():
+            return
+        checker.prewarm_pid = os.getpid()
+
+    domains = [domain.strip() for domain in app.config['EMAIL_PREWARM_DOMAINS'].split(',')]
+    limit = app.config['EMAIL_PREWARM_TOP_DOMAINS']
+
+    def prewarm():
+        popular = []
+
+        if limit:
+            try:
+                with app.app_context():
+                    popular = _popular_domains(limit)
+            except Exception as e:
+                print(f"Error loading email domains to prewarm: {e}")
+
+        checker.prewarm(domains + popular)
+
+    threading.Thread(target=prewarm, name='email-dns-prewarm', daemon=True).start()
+
+def init_app(app):
+    """
+    Prewarm the deliverability cache with EMAIL_PREWARM_DOMAINS and the most common domains
+    among existing users, in the background of each worker's first request
+    """
+    if app.config['EMAIL_CHECK_DELIVERABILITY']:
+        app.before_request(_start_prewarm)
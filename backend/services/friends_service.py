@@ -0,0 +1,32 @@
+from sqlalchemy import or_, and_
+from models import User, Friendship, FriendshipStatus, db
+from services.serializers import USER_COLUMNS, UserRecord
+
+def get_friend_graph_records(user_id):
+    """
+    Column-only version of User.friend_graph for serialization
+    Returns a (friends, pending_sent, pending_received) tuple of UserRecord lists
+    """
+    rows = db.session.query(*USER_COLUMNS, Friendship.sender_id, Friendship.status).join(
+        Friendship, or_(
+            and_(Friendship.sender_id == user_id, Friendship.receiver_id == User.id),
+            and_(Friendship.receiver_id == user_id, Friendship.sender_id == User.id)
+        )
+    ).filter(
+        Friendship.status.in_([FriendshipStatus.ACCEPTED, FriendshipStatus.PENDING])
+    ).all()
+    
+    friends, pending_sent, pending_received = {}, {}, {}
+    
+    for row in rows:
+        record = UserRecord(row)
+        sender_id, status = row[-2:]
+        
+        if status == FriendshipStatus.ACCEPTED:
+            friends[record.id] = record
+        elif sender_id == user_id:
+            pending_sent.setdefault(record.id, record)
+        else:
+            pending_received.setdefault(record.id, record)
+    
+    return list(friends.values()), list(pending_sent.values()), list(pending_received.values())
@@ -0,0 +1,121 @@
+from sqlalchemy import func, insert, or_, and_
+from models import User, LeaderboardEntry, db
+from services.serializers import USER_COLUMNS, UserRecord
+
+# Rank order of a stored board: highest coins first, ties broken by member id
+BOARD_ORDER = (func.coalesce(LeaderboardEntry.quack_coins, 0).desc(), LeaderboardEntry.member_id)
+
+def _sort_key(entry):
+    # BOARD_ORDER for unsaved entries
+    return (-(entry.quack_coins or 0), entry.member_id)
+
+def _entry_row(owner_id, member):
+    """Column values for one stored entry"""
+    return dict(owner_id=owner_id, member_id=member.id, **LeaderboardEntry.stats_values(member))
+
+def _insert_entries(rows):
+    """Insert entries in one multi-row INSERT, without reading their ids back"""
+    if rows:
+        db.session.execute(insert(LeaderboardEntry.__table__), rows)
+
+def _board_rows(user):
+    """Entry rows for a user's board from their friends' current stats"""
+    return [_entry_row(user.id, member) for member in user.friends + [user]]
+
+def _new_entries(user):
+    """Unsaved entries for a user's board in rank order, computed from their friends' stats"""
+    entries = [LeaderboardEntry(member=member, **_entry_row(user.id, member)) for member in user.friends + [user]]
+    entries.sort(key=_sort_key)
+    return entries
+
+def _has_board(owner_id):
+    """Check whether a stored board exists for the owner"""
+    return db.session.query(
+        LeaderboardEntry.query.filter_by(owner_id=owner_id, member_id=owner_id).exists()
+    ).scalar()
+
+def build_leaderboard(user):
+    """Build (or rebuild) the stored leaderboard for a user from their friends"""
+    LeaderboardEntry.query.filter_by(owner_id=user.id).delete()
+    _insert_entries(_board_rows(user))
+
+def build_missing_leaderboards():
+    """Build the stored board of every user who doesn't have one yet; returns how many were built"""
+    owners = db.session.query(LeaderboardEntry.owner_id).filter(
+        LeaderboardEntry.owner_id == LeaderboardEntry.member_id
+    )
+    users = User.query.filter(User.id.notin_(owners)).all()
+
+    if not users:
+        return 0
+
+    LeaderboardEntry.query.filter(LeaderboardEntry.owner_id.in_([user.id for user in users])).delete()
+    _insert_entries([row for user in users for row in _board_rows(user)])
+
+    return len(users)
+
+def get_leaderboard_dicts(user):
+    """
+    A user's friends leaderboard as LeaderboardEntry.to_dict() shaped dicts, straight from the
+    columns; ranks follow the coins order (ties by member id) at read time, so they can't drift
+    Boards are stored when friendships or coins change; until then the board is computed
+    """
+    if not _has_board(user.id):
+        return [entry.to_dict(index + 1) for index, entry in enumerate(_new_entries(user))]
+
+    rows = db.session.query(
+        LeaderboardEntry.quack_coins.label('entry_coins'),
+        LeaderboardEntry.completed.label('entry_completed'),
+        LeaderboardEntry.early_rate.label('entry_early_rate'),
+        LeaderboardEntry.avg_time.label('entry_avg_time'),
+        LeaderboardEntry.comparison.label('entry_comparison'),
+        *USER_COLUMNS
+    ).join(User, User.id == LeaderboardEntry.member_id).filter(
+        LeaderboardEntry.owner_id == user.id
+    ).order_by(*BOARD_ORDER).all()
+
+    entries = []
+
+    for index, row in enumerate(rows):
+        user_dict = UserRecord(row[5:]).to_dict(stats={
+            'completed': row.entry_completed,
+            'earlyRate': row.entry_early_rate,
+            'avgTime': row.entry_avg_time,
+            'comparison': row.entry_comparison
+        })
+        user_dict['quackCoins'] = row.entry_coins
+        user_dict['rank'] = index + 1
+        user_dict['isCurrentUser'] = (user_dict['id'] == user.id)
+        entries.append(user_dict)
+
+    return entries
+
+def refresh_member_stats(user):
+    """Push a user's changed stats into every board they appear on, building their own board if missing"""
+    if not _has_board(user.id):
+        build_leaderboard(user)
+
+    LeaderboardEntry.query.filter_by(member_id=user.id).update(
+        LeaderboardEntry.stats_values(user), synchronize_session=False
+    )
+
+def add_friendship(user_a, user_b):
+    """Add two new friends to each other's stored boards, building a board that doesn't exist yet"""
+    rows = []
+
+    for owner, member in ((user_a, user_b), (user_b, user_a)):
+        if not _has_board(owner.id):
+            # Includes the new friend, whose accepted friendship is already in the session
+            LeaderboardEntry.query.filter_by(owner_id=owner.id).delete()
+            rows.extend(_board_rows(owner))
+        elif not LeaderboardEntry.query.filter_by(owner_id=owner.id, member_id=member.id).first():
+            rows.append(_entry_row(owner.id, member))
+
+    _insert_entries(rows)
+
+def remove_friendship(user_a_id, user_b_id):
+    """Drop two former friends from each other's stored boards"""
+    LeaderboardEntry.query.filter(or_(
+        and_(LeaderboardEntry.owner_id == user_a_id, LeaderboardEntry.member_id == user_b_id),
+        and_(LeaderboardEntry.owner_id == user_b_id, LeaderboardEntry.member_id == user_a_id)
+    )).delete(synchronize_session=False)
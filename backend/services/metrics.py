@@ -0,0 +1,188 @@
+import hmac
+import os
+import time
+from flask import Response, current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+# Seconds; covers fast cached reads up to slow bulk operations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Metric objects are process-wide (the client registry is global); None until a metrics-enabled app starts
+_metrics = None
+_scrape_cache = {'at': 0.0, 'payload': b''}
+
+def _create_metrics():
+    from prometheus_client import Counter, Gauge, Histogram
+
+    metrics = {
+        'request_latency': Histogram(
+            'early_bird_request_duration_seconds', 'Time to handle an API request',
+            ['blueprint', 'endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+        ),
+        # livesum: added up over live worker processes, dropped when a worker exits
+        'in_flight': Gauge(
+            'early_bird_requests_in_flight', 'Requests currently being handled',
+            ['blueprint'], multiprocess_mode='livesum'
+        ),
+        'coins_awarded': Counter('early_bird_coins_awarded', 'QuackCoins added to user balances'),
+        'magic_links': Counter('early_bird_magic_links_issued', 'Magic login links generated'),
+        'email_failures': Counter(
+            'early_bird_email_send_failures', 'Emails that could not be sent',
+            ['reason']
+        ),
+        'db_pool': Gauge(
+            'early_bird_db_pool_connections', 'Database pool connections by state',
+            ['engine', 'state'], multiprocess_mode='livesum'
+        )
+    }
+
+    # Export zeros before the first failure so rate() works from the start
+    for reason in ('error', 'dropped'):
+        metrics['email_failures'].labels(reason=reason)
+
+    return metrics
+
+def increment(name, amount=1, **labels):
+    """Add to a counter; a no-op when metrics are disabled or prometheus_client isn't installed"""
+    if _metrics is None or amount <= 0:
+        return
+
+    metric = _metrics[name]
+    (metric.labels(**labels) if labels else metric).inc(amount)
+
+def increment_on_commit(session, name, amount=1, **labels):
+    """Like increment(), but only counted once the session commits; dropped on rollback"""
+    if _metrics is None or amount <= 0:
+        return
+
+    session.info.setdefault('metric_increments', []).append((name, amount, labels))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_increments(session):
+    for name, amount, labels in session.info.pop('metric_increments', ()):
+        increment(name, amount, **labels)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_increments(session):
+    session.info.pop('metric_increments', None)
+
+def observe_request(blueprint, endpoint, method, status, seconds):
+    """Record one handled request in the latency histogram"""
+    if _metrics is None:
+        return
+
+    _metrics['request_latency'].labels(
+        blueprint=blueprint, endpoint=endpoint, method=method, status=str(status)
+    ).observe(seconds)
+
+def _multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+def _update_pool_stats():
+    """Record this process's connection pool usage for every engine"""
+    from models import db
+
+    for key, engine in db.engines.items():
+        pool = engine.pool
+
+        if not hasattr(pool, 'checkedout'):
+            continue
+
+        name = key or 'primary'
+        gauge = _metrics['db_pool']
+        gauge.labels(engine=name, state='checked_out').set(pool.checkedout())
+
+        # Only queue pools have a fixed size and an overflow count
+        if hasattr(pool, 'size'):
+            gauge.labels(engine=name, state='idle').set(pool.checkedin())
+            gauge.labels(engine=name, state='overflow').set(max(pool.overflow(), 0))
+            gauge.labels(engine=name, state='size').set(pool.size())
+
+def _start_request():
+    if request.endpoint == 'metrics':
+        return
+
+    g._metrics_started = time.perf_counter()
+    g._metrics_blueprint = request.blueprint or 'none'
+    _metrics['in_flight'].labels(blueprint=g._metrics_blueprint).inc()
+
+def _record_response(response):
+    started = g.get('_metrics_started')
+
+    if started is not None:
+        observe_request(
+            g._metrics_blueprint, request.endpoint or 'unmatched', request.method,
+            response.status_code, time.perf_counter() - started
+        )
+        _update_pool_stats()
+
+    return response
+
+def _finish_request(exception=None):
+    # Teardown runs even when the handler raised, so the gauge can't drift upwards
+    blueprint = g.pop('_metrics_blueprint', None)
+
+    if blueprint is not None:
+        _metrics['in_flight'].labels(blueprint=blueprint).dec()
+
+def render_metrics():
+    """
+    Text exposition of every metric; under gunicorn (PROMETHEUS_MULTIPROC_DIR set) this merges
+    the per-worker files, so any worker can answer a scrape. Cached for METRICS_CACHE_SECONDS
+    """
+    from prometheus_client import CollectorRegistry, REGISTRY, generate_latest
+    from prometheus_client.multiprocess import MultiProcessCollector
+
+    now = time.monotonic()
+
+    if now - _scrape_cache['at'] < current_app.config['METRICS_CACHE_SECONDS']:
+        return _scrape_cache['payload']
+
+    _update_pool_stats()
+
+    if _multiprocess():
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    _scrape_cache['payload'] = generate_latest(registry)
+    _scrape_cache['at'] = now
+
+    return _scrape_cache['payload']
+
+def metrics_view():
+    """Prometheus scrape endpoint, optionally protected by METRICS_TOKEN"""
+    token = current_app.config['METRICS_TOKEN']
+
+    supplied = request.headers.get('Authorization', '')
+
+    if token and not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+
+    return Response(render_metrics(), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    """Register request metrics and the scrape endpoint when METRICS_ENABLED is on"""
+    global _metrics
+
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    if prometheus_client is None:
+        print('prometheus_client is not installed, metrics are disabled')
+        return
+
+    if _metrics is None:
+        _metrics = _create_metrics()
+
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_finish_request)
+    app.add_url_rule(app.config['METRICS_PATH'], 'metrics', metrics_view)
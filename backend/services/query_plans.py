@@ -0,0 +1,98 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event, and_, or_
+from models import User, Assignment, Friendship, FriendshipStatus, LeaderboardEntry, db
+from services.serializers import ASSIGNMENT_COLUMNS
+from services.stats_service import get_assignment_stats
+from services.friends_service import get_friend_graph_records
+from services.sync_service import get_changes
+from services.leaderboard_service import BOARD_ORDER
+from services.versions import assignments_version, friends_version
+
+# Tables that grow with usage; a full scan of any of these on a hot path is a missing index
+INDEXED_TABLES = ('assignments', 'friendships', 'leaderboard_entries', 'assignment_tombstones')
+
+def _hot_paths(user_id, friend_id):
+    """The request-path queries the indexes exist for, as (name, callable) pairs"""
+    listing = db.session.query(*ASSIGNMENT_COLUMNS).filter(Assignment.user_id == user_id)
+    week = datetime.utcnow() + timedelta(days=7)
+
+    return [
+        ('assignments: list', lambda: listing.order_by(Assignment.deadline, Assignment.id).limit(50).all()),
+        ('assignments: list open', lambda: listing.filter(Assignment.completed == False).order_by(
+            Assignment.deadline, Assignment.id).limit(50).all()),
+        ('assignments: list due this week', lambda: listing.filter(Assignment.deadline <= week).order_by(
+            Assignment.deadline, Assignment.id).all()),
+        ('assignments: stats', lambda: get_assignment_stats(user_id)),
+        ('assignments: etag version', lambda: assignments_version(user_id)),
+        ('assignments: changes', lambda: get_changes(user_id, None, 100)),
+        ('friends: graph', lambda: get_friend_graph_records(user_id)),
+        ('friends: etag version', lambda: friends_version(user_id)),
+        ('friends: pair lookup', lambda: Friendship.query.filter(or_(
+            and_(Friendship.sender_id == user_id, Friendship.receiver_id == friend_id),
+            and_(Friendship.sender_id == friend_id, Friendship.receiver_id == user_id)
+        )).first()),
+        ('friends: pending request', lambda: Friendship.query.filter_by(
+            sender_id=friend_id, receiver_id=user_id, status=FriendshipStatus.PENDING
+        ).first()),
+        ('leaderboard: stored board', lambda: LeaderboardEntry.query.filter_by(owner_id=user_id).order_by(
+            *BOARD_ORDER).all()),
+        ('leaderboard: course cohort', lambda: db.session.query(User.id).filter(User.id.in_(
+            db.session.query(Assignment.user_id).filter(Assignment.course == 'CS101')
+        )).all()),
+    ]
+
+@contextmanager
+def capture_plans(engine):
+    """Collect the EXPLAIN output of every SELECT run on the engine inside the block"""
+    plans = []
+    sqlite = engine.dialect.name == 'sqlite'
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            cursor.execute(('EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN ') + statement, parameters)
+            rows = cursor.fetchall()
+            plans.append([row[-1] if sqlite else row[0] for row in rows])
+
+    event.listen(engine, 'before_cursor_execute', explain)
+    try:
+        yield plans
+    finally:
+        event.remove(engine, 'before_cursor_execute', explain)
+
+def full_scans(plan_lines, dialect_name):
+    """Plan lines that read a whole indexed table"""
+    if dialect_name == 'sqlite':
+        pattern = re.compile(r'^SCAN (\w+)(?! USING)')
+    else:
+        pattern = re.compile(r'Seq Scan on (\w+)')
+
+    return [
+        line for line in plan_lines
+        if (match := pattern.search(line.strip())) and match.group(1) in INDEXED_TABLES
+    ]
+
+def check_hot_paths(user_id=1, friend_id=2):
+    """
+    EXPLAIN every hot-path query and report which ones fall back to a full table scan
+    Returns a list of {name, plan, fullScans}; runs in a transaction that is rolled back
+    """
+    engine = db.engine
+    results = []
+
+    if engine.dialect.name == 'postgresql':
+        # Tiny tables make the planner prefer sequential scans; ask whether an index could be used
+        db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+
+    try:
+        for name, run in _hot_paths(user_id, friend_id):
+            with capture_plans(engine) as plans:
+                run()
+
+            plan = [line for statement in plans for line in statement]
+            results.append({'name': name, 'plan': plan, 'fullScans': full_scans(plan, engine.dialect.name)})
+    finally:
+        db.session.rollback()
+
+    return results
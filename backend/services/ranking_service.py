@@ -0,0 +1,379 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from models import User, Assignment, db
+
+RANK_METHODS = ('competition', 'dense')
+
+class _Fenwick:
+    """Binary indexed tree of counts over non-negative integer positions"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.tree = [0] * (capacity + 1)
+        self.total = 0
+
+    def add(self, position, delta):
+        self.total += delta
+        i = position + 1
+        while i <= self.capacity:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, position):
+        """Sum of counts at positions <= position"""
+        i = min(position + 1, self.capacity)
+        result = 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+
+    def find(self, k):
+        """Smallest position whose prefix sum reaches k (1-based k)"""
+        position = 0
+        step = 1 << self.capacity.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.capacity and self.tree[nxt] < k:
+                position = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return position
+
+class RankIndex:
+    """
+    Order-statistic index of users by QuackCoins (highest first, ties by user id)
+    Rank, position and k-th lookups are O(log C) over the coin range C
+    """
+
+    def __init__(self, capacity=1024):
+        self._counts = _Fenwick(capacity)      # users per coin value
+        self._distinct = _Fenwick(capacity)    # 1 for every coin value held by someone
+        self._members = {}                     # coin value -> sorted user ids
+        self._coins = {}                       # user id -> coin value
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._coins)
+
+    def __contains__(self, user_id):
+        return user_id in self._coins
+
+    def update(self, user_id, coins):
+        """Insert a user or move them to a new coin value"""
+        coins = max(int(coins or 0), 0)
+
+        with self._lock:
+            if self._coins.get(user_id) == coins:
+                return
+
+            self.remove(user_id)
+
+            if coins >= self._counts.capacity:
+                self._grow(coins)
+
+            members = self._members.setdefault(coins, [])
+            if not members:
+                self._distinct.add(coins, 1)
+            insort(members, user_id)
+
+            self._counts.add(coins, 1)
+            self._coins[user_id] = coins
+
+    def remove(self, user_id):
+        """Drop a user from the index"""
+        with self._lock:
+            coins = self._coins.pop(user_id, None)
+
+            if coins is None:
+                return
+
+            members = self._members[coins]
+            members.pop(bisect_left(members, user_id))
+            if not members:
+                del self._members[coins]
+                self._distinct.add(coins, -1)
+
+            self._counts.add(coins, -1)
+
+    def coins(self, user_id):
+        """Coin value stored for a user, or None"""
+        return self._coins.get(user_id)
+
+    def rank(self, user_id, method='competition'):
+        """Rank of a user (1 = most coins); competition gives 1,1,3 and dense 1,1,2 for ties"""
+        with self._lock:
+            coins = self._coins.get(user_id)
+
+            if coins is None:
+                return None
+
+            if method == 'dense':
+                return self._distinct.total - self._distinct.prefix(coins) + 1
+
+            return self._counts.total - self._counts.prefix(coins) + 1
+
+    def position(self, user_id):
+        """0-based position of a user in leaderboard order"""
+        with self._lock:
+            coins = self._coins.get(user_id)
+
+            if coins is None:
+                return None
+
+            above = self._counts.total - self._counts.prefix(coins)
+            return above + bisect_left(self._members[coins], user_id)
+
+    def page(self, offset=0, limit=10, method='competition'):
+        """Entries at positions [offset, offset + limit) as dicts of userId, quackCoins and rank"""
+        entries = []
+
+        with self._lock:
+            total = self._counts.total
+            position = max(offset, 0)
+
+            while position < total and len(entries) < limit:
+                # Coin value holding this position, counted from the top
+                coins = self._counts.find(total - position)
+                above = total - self._counts.prefix(coins)
+                members = self._members[coins]
+                rank = above + 1 if method != 'dense' else self._distinct.total - self._distinct.prefix(coins) + 1
+
+                for user_id in members[position - above:]:
+                    if len(entries) >= limit:
+                        break
+                    entries.append({'userId': user_id, 'quackCoins': coins, 'rank': rank})
+                    position += 1
+
+        return entries
+
+    def top(self, n=10, method='competition'):
+        """The top n entries"""
+        return self.page(0, n, method)
+
+    def around(self, user_id, radius=5, method='competition'):
+        """Entries within radius positions of a user"""
+        position = self.position(user_id)
+
+        if position is None:
+            return []
+
+        start = max(position - radius, 0)
+        return self.page(start, position - start + radius + 1, method)
+
+    def _grow(self, coins):
+        """Resize the trees so the coin value fits"""
+        capacity = self._counts.capacity
+        while capacity <= coins:
+            capacity *= 2
+
+        counts, distinct = _Fenwick(capacity), _Fenwick(capacity)
+        for value, members in self._members.items():
+            counts.add(value, len(members))
+            distinct.add(value, 1)
+
+        self._counts, self._distinct = counts, distinct
+
+def cohort_ranking_query(course=None):
+    """
+    SQL leaderboard for the campus (course=None) or one course's students
+    Ranks come from window functions; used to cold-start the in-process index
+    and as the read path when it is disabled
+    """
+    order = (User.quack_coins.desc(), User.id)
+
+    query = db.session.query(
+        User.id.label('user_id'),
+        User.quack_coins.label('quack_coins'),
+        func.rank().over(order_by=User.quack_coins.desc()).label('competition_rank'),
+        func.dense_rank().over(order_by=User.quack_coins.desc()).label('dense_rank'),
+        (func.row_number().over(order_by=order) - 1).label('position')
+    )
+
+    if course is not None:
+        query = query.filter(User.id.in_(
+            db.session.query(Assignment.user_id).filter(Assignment.course == course)
+        ))
+
+    return query.order_by(*order)
+
+def sql_page(course=None, offset=0, limit=10, method='competition', around_user_id=None, radius=5):
+    """
+    Leaderboard page straight from the window-function query
+    With around_user_id, returns the entries within radius positions of that user
+    """
+    ranked = cohort_ranking_query(course).subquery()
+    rank_column = ranked.c.dense_rank if method == 'dense' else ranked.c.competition_rank
+
+    if around_user_id is not None:
+        position = db.session.query(ranked.c.position).filter(ranked.c.user_id == around_user_id).scalar()
+
+        if position is None:
+            return []
+
+        offset = max(position - radius, 0)
+        limit = position - offset + radius + 1
+
+    rows = db.session.query(ranked.c.user_id, ranked.c.quack_coins, rank_column).filter(
+        ranked.c.position >= offset,
+        ranked.c.position < offset + limit
+    ).order_by(ranked.c.position).all()
+
+    return [{'userId': user_id, 'quackCoins': coins or 0, 'rank': rank} for user_id, coins, rank in rows]
+
+class RankRegistry:
+    """
+    Rank indexes for the global board and the most recently used course cohorts
+    Stale indexes keep serving while one background rebuild from SQL replaces them
+    """
+
+    def __init__(self, rebuild_interval=600, max_courses=200):
+        self.rebuild_interval = rebuild_interval
+        self.max_courses = max_courses
+        self._indexes = OrderedDict()
+        self._built_at = {}
+        self._rebuilding = set()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self, course=None):
+        """Return the index for a cohort, building it from SQL when missing"""
+        with self._lock:
+            index = self._indexes.get(course)
+
+            if index is not None:
+                self._indexes.move_to_end(course)
+                stale = time.monotonic() - self._built_at[course] > self.rebuild_interval
+                rebuild = stale and course not in self._rebuilding
+
+                if rebuild:
+                    self._rebuilding.add(course)
+
+        if index is not None:
+            if rebuild:
+                self._rebuild_in_background(course)
+            return index
+
+        # One request builds a missing index while the others wait for it
+        with self._build_lock:
+            index = self._indexes.get(course)
+
+            if index is None:
+                index = self._build(course)
+                self._store(course, index)
+
+            return index
+
+    def _build(self, course):
+        index = RankIndex()
+        for row in cohort_ranking_query(course).all():
+            index.update(row.user_id, row.quack_coins)
+        return index
+
+    def _store(self, course, index):
+        """Keep a built index; courses nobody takes (e.g. a made-up ?course=) aren't kept"""
+        with self._lock:
+            if course is not None and not len(index):
+                self._indexes.pop(course, None)
+                return
+
+            self._indexes[course] = index
+            self._indexes.move_to_end(course)
+            self._built_at[course] = time.monotonic()
+
+            # Evict the least recently used course cohorts; the campus board always stays
+            while len(self._indexes) > self.max_courses + (None in self._indexes):
+                evicted = next(key for key in self._indexes if key is not None)
+                del self._indexes[evicted]
+                self._built_at.pop(evicted, None)
+
+    def _rebuild_in_background(self, course):
+        app = current_app._get_current_object()
+
+        def rebuild():
+            try:
+                with app.app_context():
+                    self._store(course, self._build(course))
+            except Exception as e:
+                print(f"Error rebuilding rank index: {e}")
+            finally:
+                with self._lock:
+                    self._rebuilding.discard(course)
+
+        threading.Thread(target=rebuild, name='rank-rebuild', daemon=True).start()
+
+    def record_coins(self, user_id, coins):
+        """Apply a coin change to every built index that contains the user"""
+        with self._lock:
+            indexes = list(self._indexes.items())
+
+        for course, index in indexes:
+            if course is None or user_id in index:
+                index.update(user_id, coins)
+
+    def record_course(self, user_id, course, coins=None):
+        """Add a user to a built course cohort they just joined"""
+        with self._lock:
+            index = self._indexes.get(course)
+            global_index = self._indexes.get(None)
+
+        if index is None or user_id in index:
+            return
+
+        if coins is None and global_index is not None:
+            # Take the coins from the global board, or rebuild the cohort if unknown
+            coins = global_index.coins(user_id)
+
+        if coins is None:
+            with self._lock:
+                self._indexes.pop(course, None)
+                self._built_at.pop(course, None)
+        else:
+            index.update(user_id, coins)
+
+def get_rank_registry(app=None):
+    """Return the app's rank registry, creating it on first use"""
+    app = app or current_app._get_current_object()
+    registry = app.extensions.get('rank_registry')
+
+    if registry is None:
+        registry = RankRegistry(
+            rebuild_interval=app.config['RANK_INDEX_REBUILD_INTERVAL'],
+            max_courses=app.config['RANK_INDEX_MAX_COURSES']
+        )
+        app.extensions['rank_registry'] = registry
+
+    return registry
+
+def queue_rank_update(user_id, coins=None, course=None):
+    """
+    Queue a change for the rank indexes, applied once the session commits
+    Pass coins when the user's total changed (0 for a new user) and course when they joined a course
+    """
+    if has_app_context():
+        db.session.info.setdefault('rank_updates', []).append((user_id, coins, course))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_rank_updates(session):
+    updates = session.info.pop('rank_updates', None)
+
+    if not updates or not has_app_context():
+        return
+
+    registry = get_rank_registry()
+
+    for user_id, coins, course in updates:
+        if coins is not None:
+            registry.record_coins(user_id, coins)
+
+        if course:
+            registry.record_course(user_id, course, coins)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rank_updates(session):
+    session.info.pop('rank_updates', None)
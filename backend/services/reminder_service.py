@@ -0,0 +1,342 @@
+import heapq
+import math
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_, tuple_
+from models import User, Assignment, db
+from services.coins_service import get_reward_policy
+from services.email_service import send_reminder_email
+
+DEADLINE_REMINDER = 'deadline'
+BONUS_REMINDER = 'bonus'
+
+def _reminder_days(preferences):
+    """Days-before-deadline reminder setting, or None when the user opted out of email"""
+    preferences = preferences or {}
+
+    if not preferences.get('emailNotifications', True):
+        return None
+
+    try:
+        return max(int(preferences.get('reminderTime', 3)), 0)
+    except (TypeError, ValueError):
+        return 3
+
+def tier_drops(start_date, deadline, policy=None):
+    """
+    Moments an open assignment falls from one bonus tier to the next, with the rates on each side
+    Mirrors calculate_quack_coins: completions after the returned moment get the lower rate
+    """
+    policy = policy or get_reward_policy()
+
+    total_days = (deadline - start_date).days
+    if total_days <= 0:
+        total_days = 1
+
+    drops = []
+    rates = [bonus for _, bonus in policy.tiers] + [policy.fallback]
+
+    for i, (threshold, bonus) in enumerate(policy.tiers):
+        # Time used passes the threshold once fewer than (1 - threshold) * total days remain;
+        # nudge the estimate so it agrees with the float comparison calculate_quack_coins makes
+        days_left = math.ceil((1 - threshold) * total_days)
+        while days_left > 0 and 1 - ((days_left - 1) / total_days) <= threshold:
+            days_left -= 1
+        while 1 - (days_left / total_days) > threshold:
+            days_left += 1
+
+        moment = deadline - timedelta(days=days_left)
+
+        if moment <= start_date:
+            continue
+
+        if drops and drops[-1][0] == moment:
+            # Short assignments can skip several tiers at once
+            drops[-1] = (moment, drops[-1][1], rates[i + 1])
+        else:
+            drops.append((moment, bonus, rates[i + 1]))
+
+    return [drop for drop in drops if drop[1] != drop[2]]
+
+def assignment_events(start_date, deadline, reminder_days, policy=None, tier_lead=timedelta(hours=12)):
+    """All reminder events for an open assignment as sorted (fire_at, kind, detail) tuples"""
+    if reminder_days is None:
+        return []
+
+    events = []
+
+    if reminder_days:
+        events.append((deadline - timedelta(days=reminder_days), DEADLINE_REMINDER, reminder_days))
+
+    for moment, bonus, next_bonus in tier_drops(start_date, deadline, policy):
+        events.append((moment - tier_lead, BONUS_REMINDER, (moment, bonus, next_bonus)))
+
+    return sorted(events, key=lambda event: event[0])
+
+class ReminderScheduler:
+    """
+    Min-heap of upcoming reminder events for open assignments
+    Only assignments due within the lookahead are loaded, in (deadline, id) keyset chunks off the
+    (completed, deadline) index, and each holds a single heap entry for its next event; the next
+    one is pushed after it fires. Edits are picked up from updated_at, and every due event is
+    re-validated against the current row before anything is sent.
+    Events at or before `since` (default: the first tick) are treated as already sent.
+    A one_shot scheduler ticks once (cron): it loads only the assignments with an event due by then.
+    """
+
+    def __init__(self, lookahead=timedelta(days=30), tier_lead=timedelta(hours=12), chunk_size=5000,
+                 policy=None, since=None, one_shot=False):
+        self.lookahead = lookahead
+        self.tier_lead = tier_lead
+        self.chunk_size = chunk_size
+        self.policy = policy
+        self.one_shot = one_shot
+
+        self._heap = []          # (fire_at, assignment_id)
+        self._next = {}          # assignment_id -> fire_at of its live heap entry
+        self._loaded_until = None
+        self._last_key = None    # (deadline, id) of the last loaded row
+        self._synced_at = None
+        self._sent_until = since
+
+    def __len__(self):
+        return len(self._next)
+
+    def _columns(self):
+        return db.session.query(
+            Assignment.id,
+            Assignment.user_id,
+            Assignment.start_date,
+            Assignment.deadline,
+            User.preferences
+        ).join(User, User.id == Assignment.user_id)
+
+    def _events(self, start_date, deadline, preferences):
+        return assignment_events(start_date, deadline, _reminder_days(preferences), self.policy, self.tier_lead)
+
+    def _schedule(self, assignment_id, start_date, deadline, preferences, now):
+        """Push an assignment's next event after now, replacing any earlier entry"""
+        upcoming = [event for event in self._events(start_date, deadline, preferences) if event[0] > now]
+
+        if not upcoming:
+            self._next.pop(assignment_id, None)
+            return
+
+        fire_at = upcoming[0][0]
+
+        if self._next.get(assignment_id) != fire_at:
+            # Older heap entries for the assignment no longer match _next and are skipped when popped
+            self._next[assignment_id] = fire_at
+            heapq.heappush(self._heap, (fire_at, assignment_id))
+
+    def due_ranges(self, since, now, window_end):
+        """
+        Merged deadline ranges (start, end] of assignments that can have an event in (since, now]
+        Every event fires a whole number of days before the deadline, less tier_lead for bonus
+        warnings, so a short gap only needs thin slices of the window
+        """
+        ranges = []
+
+        for days in range((now - since + self.lookahead).days + 1):
+            for lead in (timedelta(0), self.tier_lead):
+                offset = timedelta(days=days) + lead
+
+                if since + offset < window_end:
+                    ranges.append((since + offset, now + offset))
+
+        merged = []
+
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+
+        return merged
+
+    def load(self, now):
+        """Load open assignments whose deadline entered the lookahead window"""
+        window_end = now + self.lookahead
+
+        if self._loaded_until is not None and window_end <= self._loaded_until:
+            return 0
+
+        if self._last_key is None:
+            self._last_key = (self._sent_until, 0)
+
+        window = Assignment.deadline < window_end
+
+        if self.one_shot:
+            window = and_(window, or_(*(
+                and_(Assignment.deadline > start, Assignment.deadline <= end)
+                for start, end in self.due_ranges(self._sent_until, now, window_end)
+            )))
+
+        loaded = 0
+
+        while True:
+            rows = self._columns().filter(
+                Assignment.completed == False,
+                tuple_(Assignment.deadline, Assignment.id) > self._last_key,
+                window
+            ).order_by(Assignment.deadline, Assignment.id).limit(self.chunk_size).all()
+
+            for row in rows:
+                self._schedule(row.id, row.start_date, row.deadline, row.preferences, self._sent_until)
+
+            loaded += len(rows)
+
+            if len(rows) < self.chunk_size:
+                break
+
+            self._last_key = (rows[-1].deadline, rows[-1].id)
+
+        if rows:
+            self._last_key = (rows[-1].deadline, rows[-1].id)
+
+        self._loaded_until = window_end
+        return loaded
+
+    def sync(self, now):
+        """Reschedule loaded-window assignments created, edited or completed since the last sync"""
+        since = self._synced_at
+        self._synced_at = now
+
+        if since is None or self._loaded_until is None:
+            return 0
+
+        rows = self._columns().add_columns(Assignment.completed).filter(
+            Assignment.updated_at >= since,
+            Assignment.deadline >= self._sent_until,
+            Assignment.deadline < self._loaded_until
+        ).all()
+
+        for row in rows:
+            if row.completed:
+                self._next.pop(row.id, None)
+            else:
+                self._schedule(row.id, row.start_date, row.deadline, row.preferences, self._sent_until)
+
+        return len(rows)
+
+    def pop_due(self, now):
+        """Ids of assignments whose live event is due"""
+        due = []
+
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, assignment_id = heapq.heappop(self._heap)
+
+            if self._next.get(assignment_id) == fire_at:
+                due.append(assignment_id)
+
+        return due
+
+    def tick(self, now=None):
+        """Load, sync and send every due reminder; returns the number of emails queued"""
+        now = now or datetime.utcnow()
+
+        if self._sent_until is None:
+            self._sent_until = now
+
+        self.load(now)
+        self.sync(now)
+
+        due = self.pop_due(now)
+        self._sent_until = now
+
+        if not due:
+            return 0
+
+        rows = db.session.query(Assignment, User).join(User, User.id == Assignment.user_id).filter(
+            Assignment.id.in_(due),
+            Assignment.completed == False
+        ).all()
+
+        batches = defaultdict(list)
+
+        for assignment, user in rows:
+            fired_at = self._next.pop(assignment.id, None)
+
+            # Drop the event if an edit moved it; either way schedule what comes next
+            for fire_at, kind, detail in self._events(assignment.start_date, assignment.deadline, user.preferences):
+                if fire_at == fired_at:
+                    batches[user].append(_reminder_item(assignment, kind, detail))
+                    break
+
+            self._schedule(assignment.id, assignment.start_date, assignment.deadline, user.preferences, now)
+
+        for id_ in set(due) - {assignment.id for assignment, _ in rows}:
+            self._next.pop(id_, None)
+
+        for user, items in batches.items():
+            send_reminder_email(user.email, user.name, items)
+
+        return len(batches)
+
+    @property
+    def sent_until(self):
+        """Events at or before this moment have been sent (None before the first tick)"""
+        return self._sent_until
+
+    def run(self, interval=60):
+        """Tick forever, sleeping between ticks"""
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error sending reminders: {str(e)}")
+            finally:
+                db.session.remove()
+
+            time.sleep(interval)
+
+def _reminder_item(assignment, kind, detail):
+    """Email line item for a fired event"""
+    item = {
+        'title': assignment.title,
+        'course': assignment.course,
+        'deadline': assignment.deadline,
+        'kind': kind
+    }
+
+    if kind == BONUS_REMINDER:
+        moment, bonus, next_bonus = detail
+        item.update({'dropsAt': moment, 'bonus': bonus, 'nextBonus': next_bonus})
+    else:
+        item['daysLeft'] = detail
+
+    return item
+
+def read_watermark(path):
+    """Moment up to which a previous `send-reminders --once` run sent reminders, or None"""
+    try:
+        with open(path) as f:
+            return datetime.fromisoformat(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def write_watermark(path, moment):
+    """Record the moment reminders were sent up to (written atomically)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f'{path}.tmp'
+
+    with open(temporary, 'w') as f:
+        f.write(moment.isoformat())
+
+    os.replace(temporary, path)
+
+def create_scheduler(app=None, since=None, one_shot=False):
+    """Build a scheduler from the app config"""
+    app = app or current_app._get_current_object()
+
+    return ReminderScheduler(
+        lookahead=timedelta(days=app.config['REMINDER_LOOKAHEAD_DAYS']),
+        tier_lead=timedelta(hours=app.config['REMINDER_TIER_LEAD_HOURS']),
+        chunk_size=app.config['REMINDER_CHUNK_SIZE'],
+        since=since,
+        one_shot=one_shot
+    )
@@ -0,0 +1,108 @@
+import json
+from flask import current_app
+from models import User, Assignment
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+# Column projections for the list endpoints: selecting these skips ORM hydration entirely.
+# The *_dict builders below mirror the models' to_dict() shapes but leave datetimes as
+# datetime objects; dumps() renders them exactly like isoformat() does.
+
+ASSIGNMENT_COLUMNS = (
+    Assignment.id,
+    Assignment.title,
+    Assignment.description,
+    Assignment.course,
+    Assignment.start_date,
+    Assignment.deadline,
+    Assignment.estimated_hours,
+    Assignment.coins_reward,
+    Assignment.completed,
+    Assignment.completed_date,
+    Assignment.created_at
+)
+
+USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.name,
+    User.avatar,
+    User.quack_coins,
+    User.major,
+    User.year,
+    User.bio,
+    User.preferences,
+    User.created_at,
+    User.completed_assignments,
+    User.early_completion_count,
+    User.total_completion_days,
+    User.timed_completions
+)
+
+def assignment_dict(row):
+    """Assignment.to_dict() shape from an ASSIGNMENT_COLUMNS row"""
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'course': row.course,
+        'startDate': row.start_date,
+        'deadline': row.deadline,
+        'estimatedHours': row.estimated_hours,
+        'coinsReward': row.coins_reward,
+        'completed': row.completed,
+        'completedDate': row.completed_date,
+        'createdAt': row.created_at
+    }
+
+class UserRecord:
+    """
+    Read-only stand-in for a User built from a USER_COLUMNS row
+    The stats methods are User's own, so profiles and leaderboards compute identical values
+    """
+    __slots__ = tuple(column.key for column in USER_COLUMNS)
+
+    def __init__(self, row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+
+    calculate_early_rate = User.calculate_early_rate
+    calculate_avg_time = User.calculate_avg_time
+    generate_comparison = User.generate_comparison
+    stats_dict = User.stats_dict
+
+    def to_dict(self, stats=None):
+        """User.to_dict() shape"""
+        return {
+            'id': self.id,
+            'email': self.email,
+            'name': self.name,
+            'avatar': self.avatar,
+            'quackCoins': self.quack_coins,
+            'major': self.major,
+            'year': self.year,
+            'bio': self.bio,
+            'preferences': self.preferences,
+            'stats': stats if stats is not None else self.stats_dict(),
+            'createdAt': self.created_at
+        }
+
+def _default(value):
+    """Encode the types the standard library encoder doesn't know"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(payload):
+    """Encode a payload to JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+def json_response(payload, status=200):
+    """Fast replacement for jsonify() on the list endpoints"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,143 @@
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from functools import lru_cache
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('early_bird.requests')
+
+# Expanded IN lists and multi-row VALUES differ only in how many placeholders they have
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=4096)
+def statement_template(statement):
+    """Normalize a statement so repeats of the same query with different IN-list sizes compare equal"""
+    return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+def _shorten(template, limit=300):
+    """Keep both ends of a long statement: the SELECT list is rarely what identifies it"""
+    if len(template) <= limit:
+        return template
+    return f'{template[:limit // 2]} ... {template[-limit // 2:]}'
+
+class RequestSQLStats:
+    """Statements run and time spent in the database during one request"""
+    __slots__ = ('count', 'seconds', 'templates')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.templates = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.seconds += elapsed
+        self.templates[statement_template(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement templates that ran more than threshold times, most frequent first"""
+        return [(template, count) for template, count in self.templates.most_common() if count > threshold]
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_query_started')
+
+    if not started or not has_request_context():
+        return
+
+    elapsed = time.perf_counter() - started.pop()
+    stats = g.get('_sql_stats')
+
+    if stats is None:
+        stats = g._sql_stats = RequestSQLStats()
+
+    stats.record(statement, elapsed)
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('_query_started'):
+        connection.info['_query_started'].pop()
+
+def instrument_engine(engine):
+    """Count statements and database time per request on this engine"""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+def _start_timer():
+    g._request_started = time.perf_counter()
+
+def _report(app):
+    threshold = app.config['SQL_NPLUSONE_THRESHOLD']
+    server_timing = app.config['SQL_SERVER_TIMING']
+    log_requests = app.config['SQL_LOG_REQUESTS']
+
+    def report(response):
+        started = g.get('_request_started')
+
+        if started is None:
+            return response
+
+        stats = g.get('_sql_stats') or RequestSQLStats()
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats.seconds * 1000
+        repeated = stats.repeated(threshold)
+
+        if server_timing:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={db_ms:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+            )
+
+        if log_requests or repeated:
+            line = {
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'durationMs': round(total_ms, 2),
+                'dbQueries': stats.count,
+                'dbMs': round(db_ms, 2)
+            }
+
+            if repeated:
+                # Likely N+1: the same query issued once per row of an earlier result
+                line['nPlusOne'] = [{'statement': _shorten(template), 'count': count} for template, count in repeated]
+
+            logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(line))
+
+        return response
+
+    return report
+
+def init_app(app, engines):
+    """
+    Register the per-request SQL profiler when SQL_PROFILING is on: a Server-Timing header,
+    one JSON log line per request and a warning when a statement repeats more than
+    SQL_NPLUSONE_THRESHOLD times in a request
+    """
+    if not app.config['SQL_PROFILING']:
+        return
+
+    for engine in engines:
+        instrument_engine(engine)
+
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    app.before_request(_start_timer)
+    app.after_request(_report(app))
@@ -0,0 +1,58 @@
+from sqlalchemy import func, case, cast, and_, literal_column, Integer
+from models import Assignment, db
+
+def _whole_days_between(later, earlier):
+    """SQL expression for the whole days between two datetimes (like timedelta.days)"""
+    dialect = db.engine.dialect.name
+
+    if dialect == 'sqlite':
+        # Work in integer milliseconds so exact day boundaries don't round down
+        millis = cast(
+            func.round((func.julianday(later) - func.julianday(earlier)) * 86400000), Integer
+        )
+        return millis // 86400000
+
+    if dialect == 'postgresql':
+        return func.floor(func.extract('epoch', later - earlier) / 86400)
+
+    # MySQL-style fallback; the unit is a keyword, so it can't be a bound parameter
+    return func.floor(func.timestampdiff(literal_column('SECOND'), earlier, later) / 86400)
+
+def get_assignment_stats(user_id, start=None, end=None, course=None):
+    """
+    Aggregate a user's assignment stats in a single query
+    Optional filters narrow the assignments by deadline range and course
+    """
+    is_early = and_(
+        Assignment.completed == True,
+        Assignment.completed_date != None,
+        Assignment.completed_date < Assignment.deadline
+    )
+
+    query = db.session.query(
+        func.count(Assignment.id),
+        func.sum(case((Assignment.completed == True, 1), else_=0)),
+        func.sum(case((is_early, 1), else_=0)),
+        func.sum(case(
+            (is_early, _whole_days_between(Assignment.deadline, Assignment.completed_date)),
+            else_=0
+        ))
+    ).filter(Assignment.user_id == user_id)
+
+    if start is not None:
+        query = query.filter(Assignment.deadline >= start)
+
+    if end is not None:
+        query = query.filter(Assignment.deadline <= end)
+
+    if course is not None:
+        query = query.filter(Assignment.course == course)
+
+    total, completed, early, days_saved = query.one()
+
+    return {
+        'total': total or 0,
+        'completed': int(completed or 0),
+        'early': int(early or 0),
+        'days_saved': int(days_saved or 0)
+    }
@@ -0,0 +1,133 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert, and_, or_
+from models import Assignment, AssignmentTombstone, db
+from services.serializers import ASSIGNMENT_COLUMNS, assignment_dict
+
+# Changes are ordered by (timestamp, kind, id): upserts sort before deletions at the same instant
+UPSERT, DELETE = 0, 1
+
+class CursorExpiredError(Exception):
+    """The cursor was issued before the tombstone retention window, so deletions may have been compacted"""
+
+def encode_cursor(timestamp, kind, row_id, issued_at):
+    """Opaque cursor for a position in the change stream, stamped with when it was handed out"""
+    raw = json.dumps([timestamp.isoformat(), kind, row_id, issued_at.isoformat()])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor into ((timestamp, kind, id), issued_at) (raises ValueError when malformed)
+    Cursors from before issued_at was added count as issued at their position
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        timestamp, kind, row_id = values[:3]
+        position = (datetime.fromisoformat(timestamp), int(kind), int(row_id))
+        issued_at = datetime.fromisoformat(values[3]) if len(values) > 3 else position[0]
+        return position, issued_at
+    except (TypeError, ValueError, IndexError, json.JSONDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {str(e)}')
+
+def _after(timestamp_column, id_column, kind, cursor):
+    """Keyset condition: (timestamp_column, kind, id_column) > cursor"""
+    timestamp, cursor_kind, row_id = cursor
+
+    if kind > cursor_kind:
+        return timestamp_column >= timestamp
+
+    if kind < cursor_kind:
+        return timestamp_column > timestamp
+
+    return or_(
+        timestamp_column > timestamp,
+        and_(timestamp_column == timestamp, id_column > row_id)
+    )
+
+def get_changes(user_id, since=None, limit=500):
+    """
+    Assignments created, updated or deleted after a cursor, oldest first
+    Without a cursor, returns the current assignments from the start (a full resync)
+    Returns (upserted assignment dicts, deleted assignment ids, next cursor, has more)
+    """
+    cursor = None
+    now = datetime.utcnow()
+
+    if since:
+        cursor, issued_at = decode_cursor(since)
+        horizon = now - timedelta(days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+
+        # What matters is when the client last synced, not how old its newest change is
+        if issued_at < horizon:
+            raise CursorExpiredError()
+
+    upserts = db.session.query(*ASSIGNMENT_COLUMNS, Assignment.updated_at.label('changed_at')).filter(
+        Assignment.user_id == user_id
+    )
+
+    if cursor is not None:
+        upserts = upserts.filter(_after(Assignment.updated_at, Assignment.id, UPSERT, cursor))
+
+    # Fetch one extra from each stream to know whether another page exists
+    changes = [
+        ((row.changed_at, UPSERT, row.id), row)
+        for row in upserts.order_by(Assignment.updated_at, Assignment.id).limit(limit + 1)
+    ]
+
+    if cursor is not None:
+        # A fresh client has nothing to delete
+        deletions = db.session.query(AssignmentTombstone).filter(
+            AssignmentTombstone.user_id == user_id,
+            _after(AssignmentTombstone.deleted_at, AssignmentTombstone.id, DELETE, cursor)
+        ).order_by(AssignmentTombstone.deleted_at, AssignmentTombstone.id).limit(limit + 1)
+
+        changes.extend(((tombstone.deleted_at, DELETE, tombstone.id), tombstone) for tombstone in deletions)
+
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    upserted = [assignment_dict(row) for key, row in changes if key[1] == UPSERT]
+    deleted = [row.assignment_id for key, row in changes if key[1] == DELETE]
+
+    # Timestamps are taken before commit, so a change can become visible after the cursor has
+    # moved past its timestamp. The last page stops SYNC_CURSOR_LAG_SECONDS short of now and the
+    # next call sees the recent changes again (upserts and deletions are idempotent); pages with
+    # more to come advance to their last change so catching up always makes progress
+    settled = (now - timedelta(seconds=current_app.config['SYNC_CURSOR_LAG_SECONDS']), UPSERT, 0)
+
+    if changes:
+        position = changes[-1][0] if has_more else min(changes[-1][0], settled)
+    else:
+        position = min(cursor, settled) if cursor is not None else settled
+
+    if cursor is not None and position < cursor:
+        position = cursor
+
+    # Re-issued even when nothing changed, so an idle client's cursor doesn't expire
+    return upserted, deleted, encode_cursor(*position, now), has_more
+
+def compact_tombstones(retention_days=None):
+    """Delete tombstones older than the retention window; returns how many were removed"""
+    if retention_days is None:
+        retention_days = current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+
+    horizon = datetime.utcnow() - timedelta(days=retention_days)
+
+    removed = AssignmentTombstone.query.filter(AssignmentTombstone.deleted_at < horizon).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+
+    return removed
+
+@event.listens_for(Assignment, 'after_delete')
+def _record_tombstone(mapper, connection, target):
+    # Written on the same connection, so it commits or rolls back with the delete
+    connection.execute(insert(AssignmentTombstone.__table__).values(
+        user_id=target.user_id,
+        assignment_id=target.id,
+        deleted_at=datetime.utcnow()
+    ))
@@ -0,0 +1,30 @@
+from sqlalchemy import func, or_, and_
+from models import User, Assignment, Friendship, FriendshipStatus, db
+
+# Version queries: cheap aggregates that change whenever the matching response would
+
+def profile_version(user_id):
+    """The user's own row (profile, preferences and stats)"""
+    return (db.session.query(User.updated_at).filter(User.id == user_id).scalar(),)
+
+def assignments_version(user_id):
+    """Count catches deletions; max updated_at catches inserts and edits"""
+    return db.session.query(
+        func.count(Assignment.id),
+        func.max(Assignment.updated_at)
+    ).filter(Assignment.user_id == user_id).one()
+
+def friends_version(user_id):
+    """Friendships in either direction plus the friends' own rows (their coins and stats are listed)"""
+    return db.session.query(
+        func.count(Friendship.id),
+        func.max(Friendship.updated_at),
+        func.max(User.updated_at)
+    ).join(
+        User, or_(
+            and_(Friendship.sender_id == user_id, Friendship.receiver_id == User.id),
+            and_(Friendship.receiver_id == user_id, Friendship.sender_id == User.id)
+        )
+    ).filter(
+        Friendship.status.in_([FriendshipStatus.ACCEPTED, FriendshipStatus.PENDING])
+    ).one()
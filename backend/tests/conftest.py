@@ -0,0 +1,98 @@
+import os
+import socketserver
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from config import TestingConfig
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Local SMTP server that accepts everything and keeps the messages
+    fail_next makes that many DATA commands answer 451 (a temporary failure)
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.fail_next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        sink = self.server
+        sink.connections += 1
+        recipients = []
+        self.wfile.write(b'220 sink ESMTP\r\n')
+
+        for line in self.rfile:
+            command = line[:4].upper()
+
+            if command in (b'EHLO', b'HELO'):
+                self.wfile.write(b'250 sink\r\n')
+            elif command == b'RCPT':
+                recipients.append(line.split(b':', 1)[1].strip(b' <>\r\n').decode())
+                self.wfile.write(b'250 OK\r\n')
+            elif command == b'DATA':
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                body = b''.join(iter(self.rfile.readline, b'.\r\n'))
+
+                with sink._lock:
+                    failing = sink.fail_next > 0
+                    sink.fail_next -= failing
+
+                    if not failing:
+                        sink.messages.append({'to': recipients, 'data': body.decode()})
+
+                recipients = []
+                self.wfile.write(b'451 Try again later\r\n' if failing else b'250 OK queued\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+@pytest.fixture
+def smtp_sink():
+    sink = SMTPSink()
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+@pytest.fixture
+def app():
+    """App on an in-memory database, with an app context pushed"""
+    app = create_app(TestingConfig)
+
+    with app.app_context():
+        yield app
+
+@pytest.fixture
+def mail_app(smtp_sink):
+    """App that delivers mail to the local SMTP sink through the background worker"""
+    config = type('MailTestConfig', (TestingConfig,), {
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_sink.port,
+        'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': None,
+        'MAIL_PASSWORD': None,
+        'MAIL_ASYNC': True,
+        'MAIL_RETRY_BACKOFF': 0
+    })
+    app = create_app(config)
+
+    with app.app_context():
+        yield app
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from models import Assignment, User, db
+from routes.assignments import DEFAULT_PAGE_SIZE
+from services.auth_service import generate_auth_token
+
+def _seed(count):
+    user = User(email='student@example.edu')
+    db.session.add(user)
+    db.session.flush()
+
+    deadline = datetime(2026, 5, 1)
+    db.session.add_all(
+        Assignment(user_id=user.id, title=f'assignment {index}', deadline=deadline + timedelta(hours=index))
+        for index in range(count)
+    )
+    db.session.commit()
+
+    return {'Authorization': f'Bearer {generate_auth_token(user.id)}'}
+
+def test_list_is_paged_by_default(app):
+    headers = _seed(DEFAULT_PAGE_SIZE + 5)
+    client = app.test_client()
+
+    first = client.get('/api/assignments', headers=headers).json
+    assert len(first['assignments']) == DEFAULT_PAGE_SIZE
+    assert first['nextCursor']
+
+    second = client.get(f"/api/assignments?cursor={first['nextCursor']}", headers=headers).json
+    assert [row['title'] for row in second['assignments']] == [f'assignment {index}' for index in range(DEFAULT_PAGE_SIZE, DEFAULT_PAGE_SIZE + 5)]
+    assert second['nextCursor'] is None
+
+def test_limit_all_returns_every_row(app):
+    headers = _seed(DEFAULT_PAGE_SIZE + 5)
+
+    response = app.test_client().get('/api/assignments?limit=all', headers=headers).json
+    assert len(response['assignments']) == DEFAULT_PAGE_SIZE + 5
+    assert response['nextCursor'] is None
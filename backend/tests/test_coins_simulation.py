@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Assignment
+from services.coins_service import DEFAULT_REWARD_POLICY, RewardPolicy, calculate_quack_coins
+
+np = pytest.importorskip('numpy')
+
+from services.coins_simulation import _to_microseconds, calculate_quack_coins_batch
+
+def _random_assignments(rng, count):
+    """Assignments with completions before the start, inside the window and late, down to the microsecond"""
+    base = datetime(2026, 1, 1)
+    assignments, completion_dates = [], []
+
+    for _ in range(count):
+        start = base + timedelta(seconds=rng.randrange(0, 365 * 86400), microseconds=rng.randrange(10**6))
+        # Includes deadlines before or at the start (treated as a one-day window)
+        deadline = start + timedelta(seconds=rng.randrange(-2 * 86400, 60 * 86400), microseconds=rng.randrange(10**6))
+        completed = start + timedelta(seconds=rng.randrange(-86400, 70 * 86400), microseconds=rng.randrange(10**6))
+
+        assignments.append(Assignment(start_date=start, deadline=deadline, coins_reward=rng.choice([1, 5, 10, 15, 25, 33])))
+        completion_dates.append(completed)
+
+    return assignments, completion_dates
+
+@pytest.mark.parametrize('policy', [
+    DEFAULT_REWARD_POLICY,
+    RewardPolicy(tiers=((0.1, 1.0), (0.3, 0.5), (0.6, 0.25), (0.9, 0.1)), fallback=0.0)
+], ids=['default', 'custom'])
+def test_batch_scorer_matches_calculate_quack_coins(policy):
+    assignments, completion_dates = _random_assignments(random.Random(42), 5000)
+
+    expected = [calculate_quack_coins(assignment, completed, policy) for assignment, completed in zip(assignments, completion_dates)]
+
+    start_dates = [assignment.start_date for assignment in assignments]
+    deadlines = [assignment.deadline for assignment in assignments]
+    rewards = [assignment.coins_reward for assignment in assignments]
+
+    # Lists of datetimes and datetime64 arrays (what simulate_reward_policy passes) score the same
+    from_lists = calculate_quack_coins_batch(start_dates, deadlines, completion_dates, rewards, policy)
+    from_arrays = calculate_quack_coins_batch(
+        *(_to_microseconds(values).astype('datetime64[us]') for values in (start_dates, deadlines, completion_dates)),
+        rewards, policy
+    )
+
+    assert from_lists.tolist() == expected
+    assert from_arrays.tolist() == expected
@@ -0,0 +1,73 @@
+import socket
+import threading
+
+from services.email_service import EmailDeliveryWorker, get_delivery_worker, queue_email, _mail_settings
+
+def test_queued_mail_is_delivered_over_one_connection(mail_app, smtp_sink):
+    for index in range(3):
+        assert queue_email(f'student{index}@example.edu', 'Hello', '<p>Hi</p>', 'Hi')
+
+    worker = get_delivery_worker()
+    assert worker.flush(timeout=5)
+
+    assert [message['to'] for message in smtp_sink.messages] == [
+        ['student0@example.edu'], ['student1@example.edu'], ['student2@example.edu']
+    ]
+    assert 'Subject: Hello' in smtp_sink.messages[0]['data']
+    assert smtp_sink.connections == 1
+    assert worker.stats()['sent'] == 3
+
+def test_temporary_failure_is_retried(mail_app, smtp_sink):
+    smtp_sink.fail_next = 1
+
+    assert queue_email('student@example.edu', 'Hello', '<p>Hi</p>')
+
+    worker = get_delivery_worker()
+    assert worker.flush(timeout=5)
+    assert len(smtp_sink.messages) == 1
+    assert worker.retries == 1
+    assert worker.failed == 0
+
+def test_message_is_dropped_after_max_retries(mail_app, smtp_sink):
+    worker = EmailDeliveryWorker(_mail_settings(mail_app.config), max_retries=1, retry_backoff=0)
+    smtp_sink.fail_next = 2
+
+    assert worker.enqueue('student@example.edu', 'Subject: Hello\r\n\r\nHi')
+    assert worker.flush(timeout=5)
+    assert smtp_sink.messages == []
+    assert worker.failed == 1
+
+def test_concurrent_first_use_creates_one_worker(mail_app):
+    workers = []
+    threads = [
+        threading.Thread(target=lambda: workers.append(get_delivery_worker(mail_app)))
+        for _ in range(8)
+    ]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(worker) for worker in workers}) == 1
+
+def test_forked_process_gets_its_own_worker(mail_app):
+    worker = get_delivery_worker()
+
+    # As seen from a child process forked after the worker was created
+    worker.owner_pid = -1
+
+    assert get_delivery_worker() is not worker
+
+def test_unresponsive_relay_times_out(mail_app):
+    # Accepts the TCP connection but never sends the SMTP greeting
+    with socket.socket() as relay:
+        relay.bind(('127.0.0.1', 0))
+        relay.listen()
+
+        settings = dict(_mail_settings(mail_app.config), port=relay.getsockname()[1], timeout=0.2)
+        worker = EmailDeliveryWorker(settings, max_retries=0, retry_backoff=0)
+
+        assert worker.enqueue('student@example.edu', 'Subject: Hello\r\n\r\nHi')
+        assert worker.flush(timeout=5)
+        assert worker.failed == 1
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from services.email_validation import DeliverabilityChecker, StubResolver
+
+RECORDS = {'example.edu': ['mx.example.edu'], 'a-only.edu': [], 'nomail.edu': ['.']}
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache TTLs"""
+    now = [time.time()]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+def test_deliverable_domains_are_cached_until_the_ttl(clock):
+    resolver = StubResolver(RECORDS)
+    checker = DeliverabilityChecker(resolver, ttl=600, budget=5)
+
+    assert checker.check('Example.edu') is None
+    assert checker.check('example.edu') is None
+    assert checker.check('a-only.edu') is None
+    assert resolver.queries == 3  # MX for both, then A for the domain without one
+
+    clock[0] += 601
+    assert checker.check('example.edu') is None
+    assert resolver.queries == 4
+
+def test_undeliverable_domains_are_cached_for_the_negative_ttl(clock):
+    resolver = StubResolver(RECORDS)
+    checker = DeliverabilityChecker(resolver, ttl=600, negative_ttl=60, budget=5)
+
+    assert 'does not exist' in checker.check('missing.edu')
+    assert 'does not accept email' in checker.check('nomail.edu')
+    assert 'does not exist' in checker.check('missing.edu')
+    assert resolver.queries == 2
+
+    clock[0] += 61
+    assert 'does not exist' in checker.check('missing.edu')
+    assert resolver.queries == 3
+
+def test_slow_lookup_is_accepted_within_the_budget_and_cached_later():
+    resolver = StubResolver({}, delay=0.3)
+    checker = DeliverabilityChecker(resolver, timeout=2, budget=0.05)
+
+    started = time.monotonic()
+    assert checker.check('missing.edu') is None
+    assert time.monotonic() - started < 0.25
+
+    # The lookup kept running in the background and the next request gets its answer
+    checker._pending['missing.edu'].result(timeout=2)
+    assert 'does not exist' in checker.check('missing.edu')
+    assert resolver.queries == 1
+
+def test_dns_timeout_is_retried_after_the_unknown_ttl(clock):
+    resolver = StubResolver(RECORDS, delay=0.2)
+    checker = DeliverabilityChecker(resolver, timeout=0.01, budget=5, unknown_ttl=30)
+
+    assert checker.check('example.edu') is None
+    assert checker.check('example.edu') is None
+    assert resolver.queries == 1
+
+    clock[0] += 31
+    checker.check('example.edu')
+    assert resolver.queries == 2
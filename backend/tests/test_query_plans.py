@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from models import User, Assignment, Friendship, FriendshipStatus, db
+from services.leaderboard_service import build_leaderboard
+from services.query_plans import check_hot_paths
+
+def test_hot_paths_use_indexes(app):
+    now = datetime.utcnow()
+    users = [User(email=f'student{index}@example.edu', name=f'Student {index}') for index in range(3)]
+    db.session.add_all(users)
+    db.session.flush()
+
+    db.session.add_all(
+        Assignment(user_id=user.id, title=f'Essay {index}', course='CS101', start_date=now,
+                   deadline=now + timedelta(days=index + 1))
+        for user in users for index in range(5)
+    )
+    db.session.add(Friendship(sender_id=users[0].id, receiver_id=users[1].id, status=FriendshipStatus.ACCEPTED))
+    db.session.flush()
+    build_leaderboard(users[0])
+    db.session.commit()
+
+    results = check_hot_paths(users[0].id, users[1].id)
+
+    assert results
+    assert {result['name']: result['fullScans'] for result in results if result['fullScans']} == {}
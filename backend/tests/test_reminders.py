@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Assignment, User, db
+from services import reminder_service
+from services.reminder_service import ReminderScheduler
+
+@pytest.fixture
+def sent(monkeypatch):
+    """(email, title, kind) of every reminder the scheduler sends"""
+    sent = []
+    monkeypatch.setattr(reminder_service, 'send_reminder_email', lambda email, name, items: sent.extend(
+        (email, item['title'], item['kind']) for item in items
+    ))
+    return sent
+
+def _seed(rng, now, count):
+    users = [
+        User(email=f'student{days}@example.edu', preferences={'reminderTime': days})
+        for days in (0, 1, 3, 7)
+    ]
+    db.session.add_all(users)
+    db.session.flush()
+
+    for index in range(count):
+        start = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 40))
+        db.session.add(Assignment(
+            user_id=rng.choice(users).id,
+            title=f'assignment {index}',
+            start_date=start,
+            deadline=now + timedelta(minutes=rng.randrange(-60 * 24, 60 * 24 * 35))
+        ))
+
+    db.session.commit()
+
+@pytest.mark.parametrize('gap', [timedelta(minutes=5), timedelta(hours=2), timedelta(days=3)], ids=['5m', '2h', '3d'])
+def test_one_shot_tick_sends_what_a_full_load_sends(app, sent, gap):
+    now = datetime(2026, 3, 2, 9, 30)
+    _seed(random.Random(7), now, 3000)
+
+    ReminderScheduler(since=now - gap).tick(now)
+    expected = sorted(sent)
+    sent.clear()
+
+    ReminderScheduler(since=now - gap, one_shot=True).tick(now)
+
+    assert expected
+    assert sorted(sent) == expected
+
+def test_one_shot_load_skips_assignments_with_nothing_due(app):
+    now = datetime(2026, 3, 2, 9, 30)
+    _seed(random.Random(7), now, 3000)
+    since = now - timedelta(minutes=5)
+
+    full = ReminderScheduler(since=since).load(now)
+    narrow = ReminderScheduler(since=since, one_shot=True).load(now)
+
+    assert narrow * 20 < full
@@ -0,0 +1,69 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from app import create_app
+from config import TestingConfig, engine_options, replica_binds
+from models import User, db
+from models.session import PRIMARY_COOKIE
+from services.auth_service import generate_auth_token
+
+@pytest.fixture
+def replicated(tmp_path):
+    """
+    App on a primary SQLite file with a replica copy that disagrees on the user's name,
+    so each response shows which database served it; yields (app, auth headers)
+    """
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    config = type('ReplicaTestConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(f'sqlite:///{primary}'),
+        'SQLALCHEMY_BINDS': replica_binds(f'sqlite:///{replica}'),
+        'SQLITE_TUNED': False,
+        'DB_STICKY_SECONDS': 60
+    })
+    app = create_app(config)
+
+    with app.app_context():
+        user = User(email='student@example.edu', name='primary')
+        db.session.add(user)
+        db.session.commit()
+        token = generate_auth_token(user.id)
+        db.session.remove()
+
+        for engine in db.engines.values():
+            engine.dispose()
+
+    shutil.copy(primary, replica)
+
+    with sqlite3.connect(replica) as connection:
+        connection.execute("UPDATE users SET name = 'replica'")
+
+    yield app, {'Authorization': f'Bearer {token}'}
+
+def _name(client, headers):
+    return client.get('/api/users/me', headers=headers).json['user']['name']
+
+def test_reads_use_the_replica_until_the_user_writes(replicated):
+    app, headers = replicated
+    client = app.test_client()
+
+    assert _name(client, headers) == 'replica'
+
+    response = client.put('/api/users/me', json={'bio': 'Hello'}, headers=headers)
+    assert response.status_code == 200
+    assert PRIMARY_COOKIE in response.headers.get('Set-Cookie', '')
+
+    assert _name(client, headers) == 'primary'
+
+def test_sticky_cookie_keeps_reads_on_the_primary_in_other_workers(replicated):
+    app, headers = replicated
+    client = app.test_client()
+    client.put('/api/users/me', json={'bio': 'Hello'}, headers=headers)
+
+    # Another worker doesn't share the per-process map; the cookie alone must do it
+    app.extensions['primary_sticky'].clear()
+
+    assert _name(client, headers) == 'primary'
+    assert _name(app.test_client(), headers) == 'replica'
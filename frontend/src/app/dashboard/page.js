@@ -27,7 +27,7 @@ export default function Dashboard() {
 				setIsLoading(true);
 
 				// Use the API to fetch real assignments instead of mock data
-				const assignmentsResponse = await api.getAssignments();
+				const assignmentsResponse = await api.getAllAssignments({ limit: 200 });
 				const friendsResponse = await api.getFriends();
 
 				setAssignments(assignmentsResponse.assignments || []);
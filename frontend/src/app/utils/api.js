@@ -136,10 +136,30 @@ class Api {
 
 	/**
 	 * Get user assignments
-	 * @returns {Promise} - API response with assignments
+	 * @param {Object} params - Optional filters (completed, course, from, to, order, limit, cursor)
+	 * @returns {Promise} - API response with assignments and nextCursor
 	 */
-	async getAssignments() {
-		return this.request("/assignments");
+	async getAssignments(params = {}) {
+		const query = new URLSearchParams(params).toString();
+		return this.request(query ? `/assignments?${query}` : "/assignments");
+	}
+
+	/**
+	 * Get every matching assignment, following nextCursor page by page
+	 * @param {Object} params - Optional filters (completed, course, from, to, order, limit)
+	 * @returns {Promise} - API response with all assignments
+	 */
+	async getAllAssignments(params = {}) {
+		const assignments = [];
+		let cursor = null;
+
+		do {
+			const response = await this.getAssignments(cursor ? { ...params, cursor } : params);
+			assignments.push(...(response.assignments || []));
+			cursor = response.nextCursor;
+		} while (cursor);
+
+		return { assignments, nextCursor: null };
 	}
 
 	/**